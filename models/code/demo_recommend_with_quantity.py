@@ -2,37 +2,41 @@
 """추천+수량 산정 데모
 - RECS00(간이) 후보 아이템: 최근 인기 상위 K
 - LSTM으로 각 후보 horizon 합계 예측 → 안전재고율 반영 수량 산정
+- 예측은 프로세스 내 LSTMForecastService 하나로 처리합니다(모델/패널 1회 로드).
+  model.npz가 최신이면 NumPy 런타임을 써서 TensorFlow를 import하지 않습니다(runtime='auto').
+- 인기도는 컴파일된 패널의 pair별 y_t 합계(service.store.pair_totals())로 계산합니다.
 """
-import os, json
 import pandas as pd
-import numpy as np
 
-ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-LSTM_TRAIN = os.path.join(ROOT, 'data', 'lstm_forecast', 'train.csv')
-PRED_OUT = os.path.join(ROOT, 'data', 'lstm_forecast', 'predictions.json')
-
-from predict_lstm import main as predict_main
+from forecast_service import LSTMForecastService
 
 
 def topk_candidates(df: pd.DataFrame, shelter_id: str, k: int = 5):
+    """df: shelter_id/relief_item_id/y_t 컬럼(일 단위 패널 또는 pair별 합계)"""
     sub = df[df['shelter_id'] == shelter_id]
-    pop = sub.groupby('relief_item_id')['y_t'].sum().reset_index().sort_values('y_t', ascending=False)
+    pop = sub.groupby('relief_item_id', observed=True)['y_t'].sum().reset_index().sort_values('y_t', ascending=False)
     return list(pop.head(k)['relief_item_id'])
 
 
-def recommend_with_quantity(shelter_id: str, horizon: int = 7, k: int = 5, alpha: float = 0.2):
-    df = pd.read_csv(LSTM_TRAIN, encoding='utf-8-sig')
+def recommend_with_quantity(shelter_id: str, horizon: int = 7, k: int = 5, alpha: float = 0.2,
+                            service: LSTMForecastService | None = None):
+    service = service or LSTMForecastService()
+    df = service.store.pair_totals()
     if df.empty:
-        raise SystemExit('lstm_forecast/train.csv 이 비어있습니다.')
+        raise SystemExit('lstm_forecast 학습 데이터가 비어있습니다.')
     # 후보 아이템 추출(간단 인기기반)
     cand_items = topk_candidates(df, shelter_id, k=k)
+    # 예측 가능한 후보는 한 번의 배치로 예측(lookback보다 짧은 시계열은 수량 없음)
+    available = set(service.pairs)
+    keys = [(str(shelter_id), str(item)) for item in cand_items]
+    preds = {(r['shelter_id'], r['relief_item_id']): r
+             for r in service.forecast_many([k for k in keys if k in available], horizon=horizon, alpha=alpha)}
     results = []
-    for item in cand_items:
-        # predict_lstm.py를 함수로 재사용하기보단 간단 호출: 여기선 직접 호출 대신 동일 로직 구현 권장
-        # 데모 목적상 스크립트 호출은 생략하고, 사용자는 실제 서비스에선 predict 함수를 재사용하세요.
-        os.system(f"python {os.path.join(os.path.dirname(__file__), 'predict_lstm.py')} --shelter_id {shelter_id} --relief_item_id {item} --horizon {horizon}")
-        with open(PRED_OUT, 'r', encoding='utf-8') as f:
-            pred = json.load(f)
+    for item, key in zip(cand_items, keys):
+        pred = preds.get(key)
+        if pred is None:
+            results.append({'relief_item_id': item, 'recommended_quantity': None, 'pred_sum': 0})
+            continue
         results.append({
             'relief_item_id': item,
             'recommended_quantity': pred.get('recommended_quantity'),
@@ -40,14 +44,14 @@ def recommend_with_quantity(shelter_id: str, horizon: int = 7, k: int = 5, alpha
         })
     return results
 
-
 if __name__ == '__main__':
-    # 가장 데이터 많은 shelter를 자동 선택
-    df = pd.read_csv(LSTM_TRAIN, encoding='utf-8-sig')
+    service = LSTMForecastService()
+    df = service.store.pair_totals()
     if df.empty:
-        raise SystemExit('lstm_forecast/train.csv 이 비어있습니다.')
-    sid = df.groupby('shelter_id').size().sort_values(ascending=False).index[0]
-    out = recommend_with_quantity(shelter_id=sid, horizon=7, k=5, alpha=0.2)
+        raise SystemExit('lstm_forecast 학습 데이터가 비어있습니다.')
+    # 가장 데이터(일 수) 많은 shelter를 자동 선택
+    sid = df.groupby('shelter_id', observed=True)['length'].sum().sort_values(ascending=False).index[0]
+    out = recommend_with_quantity(shelter_id=sid, horizon=7, k=5, alpha=0.2, service=service)
     print('추천+수량 산정 결과:')
     for r in out:
         print(r)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""LSTM 체크포인트 → TFLite(양자화) / NumPy 가중치(.npz) 내보내기 + 정확도 비교 리포트
+입력: models/data/lstm_forecast/model.keras(+meta), 컴파일된 패널(train_lstm.py와 동일)
+출력: --format tflite(기본): models/data/lstm_forecast/model.tflite, model.tflite.meta.json, tflite_report.json
+      --format npz: model.npz, model.npz.meta.json, npz_report.json
+
+- --format npz: LSTM/Dense 가중치와 층 구성만 저장(float32). lstm_runtime.NumpyLSTM이 NumPy만으로
+  같은 순전파를 계산하므로 TensorFlow/TFLite 런타임 없이 예측할 수 있습니다(lookback 가변).
+  train_lstm.py / sweep_lstm.py는 save_checkpoint에서 model.npz를 함께 저장하므로 보통 따로 실행할
+  필요가 없습니다(리포트가 필요하거나 다른 체크포인트를 내보낼 때 사용).
+- --quantize int8(tflite 기본): 가중치 int8 + 학습 윈도우로 보정한 int8 활성값(지원하지 않는 연산은 float 유지)
+  float16: 가중치 float16 / dynamic: 가중치만 int8(보정 데이터 없음) / none: float32
+- Keras LSTM 층은 while 루프(TensorList)로 변환되어 TFLite 기본 연산만으로는 실행할 수 없습니다.
+  lookback을 고정하고 unroll=True로 다시 구성한 복제 모델(같은 가중치, 추론 모드)을 변환하므로
+  model.tflite는 해당 lookback 윈도우만 받습니다(배치 크기는 실행 시 조정).
+- 리포트: 검증 pair(train_lstm.py와 같은 분할)의 윈도우에서 Keras float 모델 대비 내보낸 모델의 예측 차이
+  (MAE, 최대 절대 차이, 원래 단위 MAE)와 두 모델의 타깃 MSE(스케일 기준, train val_loss와 같은 단위),
+  파일 크기, 추론 시간을 기록합니다.
+
+사용 예시:
+  python models/code/export_lstm.py                      # tflite int8
+  python models/code/export_lstm.py --quantize float16
+  python models/code/export_lstm.py --format npz
+  python models/code/predict_lstm.py --runtime tflite --all
+  python models/code/predict_lstm.py --runtime numpy --all
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+from lstm_runtime import FEATURE_COLS_DEFAULT, TARGET_COL, TFLiteRollout, NumpyLSTM, file_sha256
+from lstm_utils import load_checkpoint, save_numpy_weights, segment_window_starts
+from train_lstm import OUT_DIR, CKPT, load_panel, split_pairs
+
+FORMATS = ['tflite', 'npz']
+QUANTIZE = ['int8', 'float16', 'dynamic', 'none']
+
+
+def static_clone(model: keras.Model, lookback: int) -> keras.Model:
+    """lookback을 고정하고 LSTM을 unroll한 추론용 복제 모델(순차 구조만, 가중치 공유 없이 복사)"""
+    body = [l for l in model.layers if not isinstance(l, keras.layers.InputLayer)]
+    inputs = keras.Input(shape=(lookback, model.input_shape[-1]), batch_size=1)
+    x = inputs
+    for layer in body:
+        config = layer.get_config()
+        if isinstance(layer, keras.layers.LSTM):
+            config.update(unroll=True, dropout=0.0, recurrent_dropout=0.0)
+        x = layer.__class__.from_config(config)(x)
+    clone = keras.Model(inputs, x)
+    clone.set_weights(model.get_weights())
+    return clone
+
+
+def convert(model: keras.Model, lookback: int, quantize: str, calibration: np.ndarray | None = None) -> bytes:
+    """Keras 모델 → TFLite flatbuffer(bytes)"""
+    if quantize == 'int8' and (calibration is None or len(calibration) == 0):
+        raise ValueError('int8 양자화에는 보정 윈도우가 필요합니다.')
+    with tempfile.TemporaryDirectory() as tmp:
+        # SavedModel을 거쳐야 변수가 상수로 고정됨(concrete function 직접 변환은 int8 보정 시 READ_VARIABLE 실패)
+        static_clone(model, lookback).export(tmp, verbose=False)
+        converter = tf.lite.TFLiteConverter.from_saved_model(tmp)
+        if quantize != 'none':
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if quantize == 'float16':
+            converter.target_spec.supported_types = [tf.float16]
+        if quantize == 'int8':
+            converter.representative_dataset = lambda: ([w[None]] for w in calibration)
+        return converter.convert()
+
+
+def sample_windows(store, pairs, feature_cols: list, continuous_cols: list, lookback: int, scaler,
+                   max_windows: int | None = None, seed: int = 42):
+    """pair 구간의 윈도우 → (스케일된 윈도우 (N, lookback, F), 다음 시점 스케일된 타깃 (N,))
+
+    forecast_service와 같은 전처리: 패널에 없는 피처 열은 0, continuous_cols 열만 스케일링.
+    max_windows를 넘으면 시드 고정 무작위 표본만 사용합니다.
+    """
+    starts = segment_window_starts(pairs['offset'], pairs['length'], lookback)
+    if max_windows and len(starts) > max_windows:
+        starts = np.sort(np.random.default_rng(seed).choice(starts, max_windows, replace=False))
+    x = store.take(starts[:, None] + np.arange(lookback), store.column_index(feature_cols))
+    scaled = np.isin(feature_cols, continuous_cols)
+    x[..., scaled] = scaler.transform(x[..., scaled])
+    y = scaler.transform(store.take(starts + lookback, store.column_index([TARGET_COL]))[:, 0])
+    return x.astype('float32', copy=False), y.astype('float32', copy=False)
+
+
+def _timed(predict, x: np.ndarray, batch_size: int = 1024):
+    t0 = time.perf_counter()
+    out = np.concatenate([predict(x[b0:b0 + batch_size]) for b0 in range(0, len(x), batch_size)]) \
+        if len(x) else np.zeros(0, dtype='float32')
+    return out.reshape(-1), time.perf_counter() - t0
+
+
+def accuracy_report(model: keras.Model, predict, x: np.ndarray, y: np.ndarray, scaler, name: str = 'tflite') -> dict:
+    """검증 윈도우에서 Keras float 모델 vs 내보낸 모델(predict: (B, lookback, F) → (B,)) 다음 시점 예측 비교"""
+    ref, keras_seconds = _timed(lambda b: model.predict_on_batch(b), x)
+    lite, lite_seconds = _timed(predict, x)
+    diff = np.abs(lite - ref)
+    return {
+        'windows': int(len(x)),
+        'mae_vs_float': float(diff.mean()) if len(x) else None,
+        'max_abs_diff_vs_float': float(diff.max()) if len(x) else None,
+        'mae_vs_float_units': float(diff.mean() * scaler.std_) if len(x) else None,
+        'float_mse': float(np.mean((ref - y) ** 2)) if len(x) else None,
+        f'{name}_mse': float(np.mean((lite - y) ** 2)) if len(x) else None,
+        'float_predict_seconds': round(keras_seconds, 4),
+        f'{name}_predict_seconds': round(lite_seconds, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LSTM 체크포인트 → TFLite(양자화) / NumPy 가중치 내보내기')
+    parser.add_argument('--ckpt', type=str, default=CKPT, help='입력 체크포인트(확장자 .keras 생략 가능)')
+    parser.add_argument('--format', type=str, default='tflite', choices=FORMATS)
+    parser.add_argument('--out', type=str, default=None, help='출력 경로(기본: 체크포인트 경로 + .tflite/.npz)')
+    parser.add_argument('--quantize', type=str, default=None, choices=QUANTIZE, help='tflite 양자화(기본 int8)')
+    parser.add_argument('--calib_windows', type=int, default=8192, help='int8 보정에 쓸 학습 윈도우 수')
+    parser.add_argument('--max_val_windows', type=int, default=20000, help='리포트에 쓸 검증 윈도우 상한')
+    parser.add_argument('--report', type=str, default=None, help='기본: models/data/lstm_forecast/<format>_report.json')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    if args.format == 'npz' and args.quantize not in (None, 'none'):
+        raise SystemExit('npz 형식은 float32 가중치만 저장합니다(--quantize는 tflite 전용).')
+    quantize = args.quantize or ('int8' if args.format == 'tflite' else 'none')
+
+    ckpt = args.ckpt[:-len('.keras')] if args.ckpt.endswith('.keras') else args.ckpt
+    if not os.path.exists(ckpt + '.keras'):
+        raise SystemExit(f'체크포인트가 없습니다: {ckpt}.keras (먼저 train_lstm.py를 실행하세요)')
+    model, scaler, meta = load_checkpoint(ckpt)
+    feature_cols = meta.get('feature_cols', FEATURE_COLS_DEFAULT)
+    continuous_cols = meta.get('continuous_cols', [c for c in feature_cols if c in FEATURE_COLS_DEFAULT])
+    lookback = int(meta.get('lookback', 28))
+    out = args.out or f'{ckpt}.{args.format}'
+    report_path = args.report or os.path.join(OUT_DIR, f'{args.format}_report.json')
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+
+    store = load_panel()
+    train_pairs, val_pairs = split_pairs(store)
+    if args.format == 'tflite':
+        calibration = None
+        if quantize == 'int8':
+            calibration, _ = sample_windows(store, train_pairs, feature_cols, continuous_cols, lookback, scaler,
+                                            args.calib_windows, args.seed)
+        print(f'🔨 TFLite 변환: quantize={quantize}, lookback={lookback}, 피처 {len(feature_cols)}개')
+        with open(out, 'wb') as f:
+            f.write(convert(model, lookback, quantize, calibration))
+        with open(out + '.meta.json', 'w', encoding='utf-8') as f:
+            json.dump({'scaler': scaler.to_dict(),
+                       'meta': {**meta, 'lookback': lookback, 'quantize': quantize,
+                                'source': os.path.basename(ckpt + '.keras'),
+                                'source_sha256': file_sha256(ckpt + '.keras')}}, f, ensure_ascii=False, indent=2)
+    else:
+        print(f'🔨 NumPy 가중치 내보내기: lookback={lookback}, 피처 {len(feature_cols)}개')
+        try:
+            save_numpy_weights(out, model, scaler, {**meta, 'lookback': lookback}, source=ckpt + '.keras')
+        except ValueError as e:
+            raise SystemExit(str(e))
+
+    x_va, y_va = sample_windows(store, val_pairs, feature_cols, continuous_cols, lookback, scaler,
+                                args.max_val_windows, args.seed)
+    predict = TFLiteRollout(out).predict if args.format == 'tflite' else NumpyLSTM.load(out).predict
+    report = {
+        'format': args.format,
+        'quantize': quantize,
+        'lookback': lookback,
+        'keras_bytes': os.path.getsize(ckpt + '.keras'),
+        f'{args.format}_bytes': os.path.getsize(out),
+        'validation': accuracy_report(model, predict, x_va, y_va, scaler, args.format),
+    }
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    v = report['validation']
+    print(f"✅ {out} ({report[f'{args.format}_bytes'] / 1024:.0f} KB, keras {report['keras_bytes'] / 1024:.0f} KB)")
+    if v['windows']:
+        print(f"  검증 윈도우 {v['windows']}개: float 대비 MAE={v['mae_vs_float']:.5f} "
+              f"max={v['max_abs_diff_vs_float']:.5f}, MSE float={v['float_mse']:.5f} "
+              f"{args.format}={v[f'{args.format}_mse']:.5f}")
+    print(f'  리포트: {report_path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""LSTM 수량 예측 서비스(프로세스 내 상주)
+
+predict_lstm.py를 항목마다 별도 프로세스로 실행하면 매번 TensorFlow import, model.keras 로드,
+학습 패널 전체 로드, predictions.json 파일 왕복이 반복됩니다. LSTMForecastService는 체크포인트와
+컴파일된 패널(panel_store.CompiledPanel, memmap)을 한 번만 열고, 질의한 pair의 마지막 lookback
+구간(연속 슬라이스)만 읽어 스케일링한 뒤 모델 추론을 수행합니다. 컴파일된 패널이 없거나 오래되면
+train 파일에서 메모리에 만듭니다.
+
+- forecast(shelter_id, relief_item_id, horizon): predictions.json과 같은 구조의 dict 반환
+- forecast_many(pairs, horizon) / forecast_table(...): 여러 pair의 마지막 lookback 윈도우를
+  (N, lookback, feat) 텐서로 쌓아 horizon 스텝을 함께 전개(LSTMRollout 그래프 1회 호출)
+- serve(): 같은 서비스를 로컬 HTTP(JSON)로 노출 (GET /forecast?shelter_id=...&relief_item_id=...&horizon=7,
+  relief_item_id를 생략하면 해당 대피소의 모든 pair 목록)
+- runtime: keras(model.keras, TensorFlow) / numpy(export_lstm.py --format npz가 만든 model.npz를
+  lstm_runtime.NumpyRollout으로 실행) / tflite(model.tflite, lstm_runtime.TFLiteRollout, lookback 고정).
+  numpy/tflite는 TensorFlow를 import하지 않으므로 시작이 빠르고 메모리가 적습니다.
+  기본 auto: model.npz가 현재 model.keras에서 내보낸 것이면 numpy, 아니면 keras.
+
+사용 예시:
+  service = LSTMForecastService()
+  result = service.forecast('shelter_0038', 'relief_item_0139', horizon=7)
+
+  python models/code/forecast_service.py --port 8765
+  curl "http://127.0.0.1:8765/forecast?shelter_id=shelter_0038&relief_item_id=relief_item_0139&horizon=7"
+"""
+import os
+import json
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from lstm_runtime import FEATURE_COLS_DEFAULT, NumpyLSTM, NumpyRollout, TFLiteRollout, file_sha256, read_meta
+from panel_store import CompiledPanel
+from table_io import read_dataset
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DATA_DIR = os.path.join(ROOT, 'data', 'lstm_forecast')
+CKPT = os.path.join(ROOT, 'data', 'lstm_forecast', 'model')
+SERIES_KEYS = ['shelter_id', 'relief_item_id']
+
+DEFAULT_HORIZON = 7
+# 권장 수량 = 예측 합계 * (1 + alpha)
+DEFAULT_ALPHA = 0.2
+# 배치 예측 시 한 번의 모델 호출에 넣는 최대 시계열 수
+DEFAULT_BATCH_SIZE = 4096
+# 모델 실행 방식: keras(model.keras + tf.function), numpy(model.npz, NumPy 순전파), tflite(model.tflite)
+# auto는 최신 model.npz가 있으면 numpy, 없으면 keras
+RUNTIMES = ['auto', 'keras', 'numpy', 'tflite']
+
+
+def is_current_export(model_path: str, ckpt: str = CKPT) -> bool:
+    """내보낸 모델(.npz/.tflite)이 현재 model.keras에서 만든 것인지(.keras가 없으면 True)"""
+    keras_path = ckpt + '.keras'
+    return not os.path.exists(keras_path) or read_meta(model_path)[1].get('source_sha256') == file_sha256(keras_path)
+
+
+def resolve_runtime(ckpt: str = CKPT) -> str:
+    """auto 런타임 선택: model.npz가 현재 model.keras에서 내보낸 것이면(또는 .keras 없이 .npz만 있으면) numpy"""
+    npz = ckpt + '.npz'
+    if os.path.exists(npz) and os.path.exists(npz + '.meta.json') and is_current_export(npz, ckpt):
+        return 'numpy'
+    return 'keras'
+
+
+class LSTMForecastService:
+    """체크포인트와 패널을 한 번 로드해 두고 시계열별 horizon-step 예측을 반환"""
+
+    def __init__(self, data_dir: str = DATA_DIR, ckpt: str = CKPT, lookback: int | None = None,
+                 reuse_state: bool = False, runtime: str = 'auto', num_threads: int | None = None):
+        if runtime not in RUNTIMES:
+            raise ValueError(f'지원하지 않는 runtime: {runtime} (지원: {", ".join(RUNTIMES)})')
+        ckpt = ckpt[:-len('.keras')] if ckpt.endswith('.keras') else ckpt
+        self.runtime = resolve_runtime(ckpt) if runtime == 'auto' else runtime
+        if self.runtime == 'keras':
+            from lstm_utils import load_checkpoint  # TensorFlow import는 keras 런타임에서만
+            self.model, self.scaler, self.meta = load_checkpoint(ckpt)
+        else:
+            if reuse_state and self.runtime == 'tflite':
+                raise ValueError('reuse_state는 keras/numpy 런타임에서만 지원합니다.')
+            model_path = f'{ckpt}.{"npz" if self.runtime == "numpy" else "tflite"}'
+            if not is_current_export(model_path, ckpt):
+                # 재학습/sweep 후 이전 모델을 조용히 서비스하지 않도록 거부
+                raise ValueError(f'{model_path}는 현재 {ckpt}.keras에서 내보낸 모델이 아닙니다 '
+                                 '(export_lstm.py로 다시 내보내세요).')
+            self.model = NumpyLSTM.load(model_path) if self.runtime == 'numpy' else None
+            self.scaler, self.meta = read_meta(model_path)
+        self.feature_cols = self.meta.get('feature_cols', FEATURE_COLS_DEFAULT)
+        self.continuous_cols = self.meta.get('continuous_cols',
+                                             [c for c in self.feature_cols if c in FEATURE_COLS_DEFAULT])
+        self.lookback = lookback or int(self.meta.get('lookback', 28))
+        # y_t 컬럼 인덱스(없다면 0으로 폴백)
+        self.y_idx = self.feature_cols.index('y_t') if 'y_t' in self.feature_cols else 0
+        if self.runtime == 'keras':
+            from lstm_utils import LSTMRollout
+            # horizon 전체를 그래프 하나로 실행하는 컴파일된 예측 경로
+            self.rollout = LSTMRollout(self.model, self.y_idx, reuse_state=reuse_state)
+        elif self.runtime == 'numpy':
+            self.rollout = NumpyRollout(self.model, self.y_idx, reuse_state=reuse_state)
+        else:
+            self.rollout = TFLiteRollout(model_path, self.y_idx, num_threads=num_threads)
+            if self.lookback != self.rollout.lookback:
+                raise ValueError(f'TFLite 모델의 lookback은 {self.rollout.lookback}로 고정되어 있습니다 '
+                                 f'(요청: {self.lookback}).')
+        # 모델 호출은 스레드 간 직렬화(HTTP 서버는 요청마다 스레드)
+        self._lock = threading.Lock()
+
+        self.store = CompiledPanel.open(data_dir) or CompiledPanel.from_frame(read_dataset(data_dir))
+        # 패널에 없는 피처 컬럼은 0으로 채움(주로 one-hot 안전장치)
+        self._cols = self.store.column_index(self.feature_cols)
+        self._scaled = np.isin(self.feature_cols, self.continuous_cols)
+        index = self.store.index
+        self.series_length = pd.Series(index['length'].to_numpy(), name='length',
+                                       index=pd.MultiIndex.from_frame(index[SERIES_KEYS]))
+        # (shelter_id, relief_item_id) → 패널 구간 끝(exclusive) 행 번호, 길이
+        ends = (index['offset'] + index['length']).to_numpy()
+        self._series = {(sid, iid): (int(e), int(n)) for sid, iid, e, n
+                        in zip(index['shelter_id'], index['relief_item_id'], ends, index['length'])}
+
+    def _windows(self, keys) -> np.ndarray:
+        """pair별 마지막 lookback 구간 → 스케일링된 (N, lookback, feat) float32"""
+        ends = np.array([self._series[k][0] for k in keys], dtype='int64')
+        rows = ends[:, None] - self.lookback + np.arange(self.lookback)
+        x = self.store.take(rows, self._cols)
+        x[..., self._scaled] = self.scaler.transform(x[..., self._scaled])
+        return x
+
+    def last_date(self, key) -> pd.Timestamp:
+        return pd.Timestamp(self.store.dates[self._series[key][0] - 1])
+
+    @property
+    def pairs(self):
+        """예측 가능한(길이 ≥ lookback) (shelter_id, relief_item_id) 목록"""
+        return [k for k, (_, n) in self._series.items() if n >= self.lookback]
+
+    def default_pair(self):
+        """가장 데이터가 많은 (shelter_id, relief_item_id)"""
+        cnt = self.series_length.reset_index(name='n').sort_values('n', ascending=False)
+        if cnt.empty:
+            raise ValueError('예측할 시계열이 없습니다.')
+        return str(cnt.iloc[0]['shelter_id']), str(cnt.iloc[0]['relief_item_id'])
+
+    def select_pairs(self, shelter_id: str | None = None):
+        """예측 가능한 pair 목록(shelter_id를 주면 해당 대피소의 pair만)"""
+        pairs = self.pairs
+        if shelter_id is not None:
+            pairs = [k for k in pairs if k[0] == str(shelter_id)]
+        return pairs
+
+    def _rollout(self, windows: np.ndarray, horizon: int, batch_size: int) -> np.ndarray:
+        """(N, lookback, feat) 윈도우를 horizon 스텝 함께 전개 → 스케일된 예측 (N, horizon)
+
+        batch_size개씩 LSTMRollout(컴파일된 그래프) / NumpyRollout / TFLiteRollout을 한 번 호출해 horizon 전체를 계산합니다.
+        """
+        out = np.empty((len(windows), horizon), dtype='float32')
+        with self._lock:
+            for b0 in range(0, len(windows), batch_size):
+                out[b0:b0 + batch_size] = self.rollout(windows[b0:b0 + batch_size], horizon)
+        return out
+
+    def forecast_many(self, pairs, horizon: int = DEFAULT_HORIZON, alpha: float = DEFAULT_ALPHA,
+                      batch_size: int = DEFAULT_BATCH_SIZE) -> list[dict]:
+        """여러 pair를 한 텐서로 묶어 예측(스텝당 모델 호출 1회). 결과는 forecast()와 같은 dict 목록"""
+        if isinstance(horizon, bool) or not isinstance(horizon, (int, np.integer)) or horizon < 1:
+            raise ValueError(f'horizon은 1 이상의 정수여야 합니다: {horizon!r}')
+        keys = [(str(sid), str(iid)) for sid, iid in pairs]
+        short = [k for k in keys if k not in self._series or self._series[k][1] < self.lookback]
+        if short:
+            raise ValueError(f'해당 pair의 데이터가 lookback보다 적습니다: {short[:5]}')
+        if not keys:
+            return []
+        yhat = self.scaler.inverse_transform(self._rollout(self._windows(keys), horizon, batch_size))
+        results = []
+        for i, key in enumerate(keys):
+            last_known_date = self.last_date(key)
+            preds = [{'date': str((last_known_date + pd.Timedelta(days=h + 1)).date()), 'yhat': float(yhat[i, h])}
+                     for h in range(horizon)]
+            recommended_quantity = int(np.ceil(sum(p['yhat'] for p in preds) * (1 + alpha)))
+            results.append({'shelter_id': key[0], 'relief_item_id': key[1], 'horizon': horizon,
+                            'preds': preds, 'recommended_quantity': recommended_quantity})
+        return results
+
+    def forecast(self, shelter_id: str, relief_item_id: str, horizon: int = DEFAULT_HORIZON,
+                 alpha: float = DEFAULT_ALPHA) -> dict:
+        """horizon일 오토리그레시브 예측 + 권장 수량(predictions.json과 같은 구조)"""
+        key = (str(shelter_id), str(relief_item_id))
+        if key not in self._series or self._series[key][1] < self.lookback:
+            raise ValueError('해당 pair의 데이터가 lookback보다 적습니다.')
+        return self.forecast_many([key], horizon=horizon, alpha=alpha)[0]
+
+    def forecast_table(self, pairs, horizon: int = DEFAULT_HORIZON, alpha: float = DEFAULT_ALPHA,
+                       batch_size: int = DEFAULT_BATCH_SIZE):
+        """배치 예측 결과를 테이블 두 개로 반환
+
+        - preds: (shelter_id, relief_item_id, step, date, yhat) 롱 포맷
+        - summary: (shelter_id, relief_item_id, last_date, pred_sum, recommended_quantity)
+        """
+        results = self.forecast_many(pairs, horizon=horizon, alpha=alpha, batch_size=batch_size)
+        preds = pd.DataFrame([
+            {'shelter_id': r['shelter_id'], 'relief_item_id': r['relief_item_id'], 'step': h + 1,
+             'date': p['date'], 'yhat': p['yhat']}
+            for r in results for h, p in enumerate(r['preds'])
+        ], columns=['shelter_id', 'relief_item_id', 'step', 'date', 'yhat'])
+        summary = pd.DataFrame([
+            {'shelter_id': r['shelter_id'], 'relief_item_id': r['relief_item_id'],
+             'last_date': str(self.last_date((r['shelter_id'], r['relief_item_id'])).date()),
+             'pred_sum': sum(p['yhat'] for p in r['preds']), 'recommended_quantity': r['recommended_quantity']}
+            for r in results
+        ], columns=['shelter_id', 'relief_item_id', 'last_date', 'pred_sum', 'recommended_quantity'])
+        return preds, summary
+
+
+def make_handler(service: LSTMForecastService):
+    class ForecastHandler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body):
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/health':
+                return self._send(200, {'status': 'ok', 'series': len(service.pairs)})
+            if url.path != '/forecast':
+                return self._send(404, {'error': f'알 수 없는 경로: {url.path}'})
+            q = {k: v[0] for k, v in parse_qs(url.query).items()}
+            try:
+                shelter_id = q.get('shelter_id')
+                relief_item_id = q.get('relief_item_id')
+                try:
+                    horizon = int(q.get('horizon', DEFAULT_HORIZON))
+                except ValueError:
+                    raise ValueError(f"horizon은 1 이상의 정수여야 합니다: {q['horizon']!r}") from None
+                try:
+                    alpha = float(q.get('alpha', DEFAULT_ALPHA))
+                except ValueError:
+                    raise ValueError(f"alpha는 숫자여야 합니다: {q['alpha']!r}") from None
+                if shelter_id and not relief_item_id:
+                    # 대피소의 모든 pair를 한 번에
+                    result = service.forecast_many(service.select_pairs(shelter_id), horizon=horizon, alpha=alpha)
+                else:
+                    if not shelter_id or not relief_item_id:
+                        shelter_id, relief_item_id = service.default_pair()
+                    result = service.forecast(shelter_id, relief_item_id, horizon=horizon, alpha=alpha)
+            except ValueError as e:
+                return self._send(400, {'error': str(e)})
+            self._send(200, result)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return ForecastHandler
+
+
+def serve(service: LSTMForecastService, host: str = '127.0.0.1', port: int = 8765):
+    """로컬 HTTP 예측 엔드포인트(종료: Ctrl+C)"""
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f'LSTM 예측 서비스: http://{host}:{port}/forecast (시계열 {len(service.pairs)}개)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LSTM 예측 서비스(로컬 HTTP)')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--lookback', type=int, default=None, help='미지정 시 체크포인트 메타의 lookback')
+    parser.add_argument('--reuse_state', action='store_true',
+                        help='LSTM 상태를 이어 써서 스텝당 1 타임스텝만 계산(빠른 근사)')
+    parser.add_argument('--runtime', type=str, default='auto', choices=RUNTIMES,
+                        help='numpy/tflite: export_lstm.py로 만든 model.npz/model.tflite 사용(TensorFlow 불필요). '
+                             'auto: 최신 model.npz가 있으면 numpy, 없으면 keras')
+    parser.add_argument('--num_threads', type=int, default=None, help='tflite 런타임 스레드 수')
+    args = parser.parse_args()
+    try:
+        service = LSTMForecastService(lookback=args.lookback, reuse_state=args.reuse_state, runtime=args.runtime,
+                                      num_threads=args.num_threads)
+    except (ValueError, FileNotFoundError, ImportError) as e:
+        raise SystemExit(str(e))
+    serve(service, host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""RECS00/RECS01 GBDT 베이스라인 공통 학습 모듈
+
+- 백엔드: hist(HistGradientBoostingClassifier, 기본 — 피처 구간화 + OpenMP 멀티코어),
+  gbdt(GradientBoostingClassifier, 기존 단일 스레드)
+- --n_jobs: 학습/예측에 쓰는 OpenMP 스레드 수(threadpoolctl로 제한, 미지정 시 모든 코어).
+  metrics의 n_jobs는 hist면 실제 적용된 OpenMP 스레드 수, gbdt면 1
+- --early_stopping: auto(hist는 1만 행 초과 시 사용) / on / off. 내부 검증 분할(validation_fraction)의
+  손실이 n_iter_no_change번 개선되지 않으면 중단
+- model_metrics.json에 fit_seconds, rows_per_sec(학습 행/초), 실제 반복 수(n_iter)를 함께 기록
+
+사용 예시:
+  parser = argparse.ArgumentParser(...)
+  add_gbdt_args(parser)
+  args = parser.parse_args()
+  train_and_evaluate('RECS01', df, feature_cols, OUT, args)
+"""
+import os
+import json
+import time
+
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import roc_auc_score, average_precision_score
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier
+from threadpoolctl import threadpool_info, threadpool_limits
+
+BACKENDS = ['hist', 'gbdt']
+DEFAULT_BACKEND = 'hist'
+DEFAULT_MAX_ITER = 100
+N_ITER_NO_CHANGE = 10
+VALIDATION_FRACTION = 0.1
+
+
+def add_gbdt_args(parser):
+    """백엔드/스레드/조기 종료 CLI 옵션 추가"""
+    parser.add_argument('--backend', type=str, default=DEFAULT_BACKEND, choices=BACKENDS,
+                        help='hist: HistGradientBoosting(멀티코어), gbdt: 기존 GradientBoosting')
+    parser.add_argument('--n_jobs', type=int, default=None, help='OpenMP 스레드 수(미지정 시 모든 코어)')
+    parser.add_argument('--early_stopping', type=str, default='auto', choices=['auto', 'on', 'off'],
+                        help='검증 손실 기반 조기 종료(auto: hist는 1만 행 초과 시)')
+    parser.add_argument('--max_iter', type=int, default=DEFAULT_MAX_ITER, help='부스팅 반복(트리) 수 상한')
+    parser.add_argument('--learning_rate', type=float, default=0.1)
+    return parser
+
+
+def make_classifier(backend: str = DEFAULT_BACKEND, early_stopping: str = 'auto', max_iter: int = DEFAULT_MAX_ITER,
+                    learning_rate: float = 0.1, random_state: int = 42):
+    if backend == 'hist':
+        return HistGradientBoostingClassifier(
+            max_iter=max_iter, learning_rate=learning_rate, random_state=random_state,
+            early_stopping={'auto': 'auto', 'on': True, 'off': False}[early_stopping],
+            n_iter_no_change=N_ITER_NO_CHANGE, validation_fraction=VALIDATION_FRACTION)
+    if backend == 'gbdt':
+        # GradientBoosting은 n_iter_no_change를 주면 조기 종료(auto는 기존 동작대로 끔)
+        stop = early_stopping == 'on'
+        return GradientBoostingClassifier(
+            n_estimators=max_iter, learning_rate=learning_rate, random_state=random_state,
+            n_iter_no_change=N_ITER_NO_CHANGE if stop else None, validation_fraction=VALIDATION_FRACTION)
+    raise ValueError(f'지원하지 않는 백엔드: {backend} (지원: {", ".join(BACKENDS)})')
+
+
+def n_iterations(clf) -> int:
+    """실제로 학습된 부스팅 반복 수(조기 종료 반영)"""
+    return int(getattr(clf, 'n_iter_', None) or getattr(clf, 'n_estimators_', 0))
+
+
+def _openmp_threads() -> int:
+    """현재 적용 중인 OpenMP 스레드 수(threadpool_limits 안에서 호출, OpenMP 미로드 시 코어 수)"""
+    threads = [p['num_threads'] for p in threadpool_info() if p.get('user_api') == 'openmp']
+    return max(threads) if threads else os.cpu_count()
+
+
+def _save_metrics(metrics: dict, out_path: str):
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(metrics, f, ensure_ascii=False, indent=2)
+
+
+def train_and_evaluate(name: str, df, feature_cols, out_path: str, args, label_col: str = 'label') -> dict:
+    """라벨 단일 클래스면 건너뛰고, 아니면 8:2 층화 분할 → 학습 → ROC/PR AUC + 학습 시간 기록"""
+    y = df[label_col]
+    X = df[feature_cols].fillna(0)
+    if y.nunique() < 2:
+        metrics = {
+            'note': 'single-class labels; skipped ROC/PR',
+            'positive_rate': float(y.mean()),
+            'features': feature_cols,
+            'samples': int(len(df))
+        }
+        _save_metrics(metrics, out_path)
+        print(f'{name} baseline metrics:', metrics)
+        return metrics
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    clf = make_classifier(args.backend, args.early_stopping, args.max_iter, args.learning_rate)
+    with threadpool_limits(limits=args.n_jobs, user_api='openmp'):
+        t0 = time.perf_counter()
+        clf.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - t0
+        proba = clf.predict_proba(X_test)[:, 1]
+        # gbdt(GradientBoosting)는 OpenMP를 쓰지 않는 단일 스레드 학습
+        n_jobs = _openmp_threads() if args.backend == 'hist' else 1
+
+    metrics = {}
+    try:
+        metrics['roc_auc'] = float(roc_auc_score(y_test, proba))
+    except Exception as e:
+        metrics['roc_auc'] = None
+        metrics['roc_auc_error'] = str(e)
+    try:
+        metrics['pr_auc'] = float(average_precision_score(y_test, proba))
+    except Exception as e:
+        metrics['pr_auc'] = None
+        metrics['pr_auc_error'] = str(e)
+    metrics['features'] = feature_cols
+    metrics['samples'] = int(len(df))
+    metrics['backend'] = args.backend
+    metrics['n_jobs'] = n_jobs
+    metrics['n_iter'] = n_iterations(clf)
+    metrics['train_rows'] = int(len(X_train))
+    metrics['fit_seconds'] = round(fit_seconds, 4)
+    metrics['rows_per_sec'] = round(len(X_train) / fit_seconds, 1) if fit_seconds > 0 else None
+    _save_metrics(metrics, out_path)
+    print(f'{name} baseline metrics:', metrics)
+    return metrics
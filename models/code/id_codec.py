@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""문자열 ID ↔ int32 대리 키(surrogate key) 인코딩
+
+생성기의 ID는 make_id로 만든 0 패딩 문자열(`user_000123`)입니다. table_io는 ID 컬럼을
+category로 읽지만, 테이블마다 사전(categories)이 다르면 merge/비교 시 pandas가 문자열로
+되돌아가고, `.to_numpy()`/`.astype(object)`는 행마다 문자열 객체를 만듭니다.
+
+- 네임스페이스: 컬럼 이름 → ID 종류(donation_wish_id → wish, donor_id/manager_id → user 등).
+  같은 네임스페이스의 컬럼은 align_ids로 정렬된 하나의 사전을 공유하므로 int32 코드끼리 바로
+  조인/비교할 수 있고, merge/groupby도 코드 기반으로 처리됩니다.
+- 문자열은 사전에만 한 번 보관하고, 행 단위 문자열은 내보낼 때(CSV/JSON 또는 str 변환)만 만듭니다.
+- 사전은 문자열 정렬 순서이므로 코드 순 정렬 = 문자열 정렬입니다.
+
+사용 예시:
+  wishes, requests, matches = align_ids(wishes, requests, matches)
+  item_codes = id_codes(wishes['relief_item_id'])        # int32, 결측 -1
+  chunk = pd.DataFrame({'wish_id': take_ids(wishes['wish_id'], rows)})
+"""
+import numpy as np
+import pandas as pd
+
+from table_io import is_id_column
+
+# ID 컬럼 → 네임스페이스(없으면 컬럼 이름에서 '_id'를 뗀 값)
+ID_NAMESPACES = {
+    'user_id': 'user',
+    'donor_id': 'user',
+    'manager_id': 'user',
+    'wish_id': 'wish',
+    'donation_wish_id': 'wish',
+    'request_id': 'request',
+    'relief_request_id': 'request',
+    'item_id': 'relief_item',
+    'relief_item_id': 'relief_item',
+    'incident_id': 'disaster_incident',
+    'disaster_incident_id': 'disaster_incident',
+}
+
+
+def id_namespace(column: str) -> str:
+    return ID_NAMESPACES.get(column, column[:-len('_id')] if column.endswith('_id') else column)
+
+
+def _categorical(values: pd.Series) -> pd.Series:
+    """문자열 사전을 가진 category Series(숫자형 사전은 문자열로 변환)"""
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype('category')
+    categories = values.cat.categories
+    if not (pd.api.types.is_string_dtype(categories) or pd.api.types.is_object_dtype(categories)):
+        values = values.cat.rename_categories(categories.astype(str))
+    return values
+
+
+def align_ids(*frames: pd.DataFrame) -> list[pd.DataFrame]:
+    """프레임들의 ID 컬럼을 네임스페이스별 공통 사전(정렬된 합집합)의 category로 맞춘 얕은 사본 목록"""
+    columns = {}
+    for i, df in enumerate(frames):
+        for c in df.columns:
+            if is_id_column(c):
+                columns.setdefault(id_namespace(c), []).append((i, c))
+    out = [df.copy(deep=False) for df in frames]
+    for cols in columns.values():
+        values = {(i, c): _categorical(frames[i][c]) for i, c in cols}
+        categories = pd.Index([])
+        for v in values.values():
+            categories = categories.union(v.cat.categories)
+        categories = categories.sort_values().astype(str)
+        for (i, c), v in values.items():
+            # astype(CategoricalDtype)는 순서만 다른 사전을 같은 타입으로 보고 코드를 그대로 두므로 set_categories 사용
+            out[i][c] = v.cat.set_categories(categories)
+    return out
+
+
+def id_codes(values: pd.Series) -> np.ndarray:
+    """ID 컬럼 → int32 대리 키(사전 내 위치, 결측 -1). align_ids로 맞춘 컬럼끼리 비교 가능"""
+    return _categorical(values).cat.codes.to_numpy().astype('int32')
+
+
+def take_ids(values: pd.Series, rows) -> pd.Categorical:
+    """rows 위치의 ID를 문자열로 풀지 않고 같은 사전의 Categorical로 반환"""
+    return _categorical(values).array.take(np.asarray(rows))
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""TensorFlow 없이 쓰는 LSTM 추론 런타임
+- StandardScaler1D / FEATURE_COLS_DEFAULT / TARGET_COL: lstm_utils와 공유(lstm_utils가 여기서 다시 내보냄)
+- read_meta: 체크포인트(.keras/.npz/.tflite) 옆 .meta.json → (scaler, meta)
+- TFLiteRollout: export_lstm.py가 만든 model.tflite로 horizon 스텝 오토리그레시브 예측
+  (LSTMRollout과 같은 호출 형태: (N, lookback, feat) 스케일된 윈도우 → (N, horizon))
+- NumpyLSTM / NumpyRollout: export_lstm.py --format npz가 만든 model.npz(LSTM/Dense 가중치)로
+  NumPy만 써서 같은 순전파/예측(추가 의존성 없음, lookback 가변, reuse_state 지원)
+
+TFLite 인터프리터는 ai_edge_litert → tflite_runtime → tensorflow.lite 순으로 찾습니다.
+앞의 두 패키지는 수 MB 크기라 TensorFlow를 설치하지 않은 컨테이너에서도 예측할 수 있습니다.
+"""
+import os
+import json
+import hashlib
+
+import numpy as np
+
+FEATURE_COLS_DEFAULT = ['y_t','cons_ma7','cons_ma14','cons_ma28']
+TARGET_COL = 'y_t'
+
+
+class StandardScaler1D:
+    def __init__(self):
+        self.mean_ = None
+        self.std_ = None
+    def fit(self, x: np.ndarray):
+        self.mean_ = float(np.mean(x))
+        self.std_ = float(np.std(x) + 1e-8)
+        return self
+    def transform(self, x: np.ndarray):
+        return (x - self.mean_) / self.std_
+    def inverse_transform(self, x: np.ndarray):
+        return x * self.std_ + self.mean_
+    def to_dict(self):
+        return {'mean': self.mean_, 'std': self.std_}
+    @staticmethod
+    def from_dict(d):
+        s = StandardScaler1D()
+        s.mean_ = float(d['mean'])
+        s.std_ = float(d['std'])
+        return s
+
+
+def read_meta(model_path: str):
+    """model_path + '.meta.json' → (scaler, meta)"""
+    with open(model_path + '.meta.json', 'r', encoding='utf-8') as f:
+        meta_all = json.load(f)
+    return StandardScaler1D.from_dict(meta_all['scaler']), meta_all.get('meta', {})
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _tflite_interpreter_class():
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            try:
+                import tensorflow as tf
+            except ImportError as e:
+                raise ImportError('TFLite 런타임이 필요합니다: pip install ai-edge-litert') from e
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLiteRollout:
+    """model.tflite(입력 (batch, lookback, feat) 고정 lookback)로 horizon 스텝 오토리그레시브 예측
+
+    스텝마다 윈도우를 한 칸 밀고 마지막 행의 y_t만 예측값으로 바꾼 새 행을 붙입니다
+    (LSTMRollout 기본 방식과 같은 계산). 입력 배치 크기가 바뀔 때만 텐서를 다시 할당합니다.
+    """
+
+    def __init__(self, path: str, y_idx: int = 0, num_threads: int | None = None):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f'TFLite 모델이 없습니다: {path} (먼저 export_lstm.py를 실행하세요)')
+        self.interpreter = _tflite_interpreter_class()(model_path=path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        inp = self.interpreter.get_input_details()[0]
+        self._in = inp['index']
+        self._out = self.interpreter.get_output_details()[0]['index']
+        self.lookback = int(inp['shape'][1])
+        self.n_features = int(inp['shape'][2])
+        self._batch = int(inp['shape'][0])
+        self.y_idx = y_idx
+
+    def predict(self, windows: np.ndarray) -> np.ndarray:
+        """(N, lookback, feat) → 다음 시점 예측 (N,)"""
+        x = np.ascontiguousarray(windows, dtype='float32')
+        if len(x) != self._batch:
+            self.interpreter.resize_tensor_input(self._in, [len(x), self.lookback, self.n_features])
+            self.interpreter.allocate_tensors()
+            self._batch = len(x)
+        self.interpreter.set_tensor(self._in, x)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self._out).reshape(-1)
+
+    def __call__(self, windows: np.ndarray, horizon: int) -> np.ndarray:
+        """(N, lookback, feat) 스케일된 윈도우 → 스케일된 예측 (N, horizon)"""
+        x = np.array(windows, dtype='float32')
+        if x.shape[1:] != (self.lookback, self.n_features):
+            raise ValueError(f'입력 윈도우 크기 {x.shape[1:]}가 TFLite 모델 입력 '
+                             f'({self.lookback}, {self.n_features})과 다릅니다.')
+        out = np.empty((len(x), horizon), dtype='float32')
+        if len(x) == 0:
+            return out
+        for h in range(horizon):
+            out[:, h] = self.predict(x)
+            new_row = x[:, -1, :].copy()
+            new_row[:, self.y_idx] = out[:, h]
+            x[:, :-1] = x[:, 1:]
+            x[:, -1] = new_row
+        return out
+
+
+def _sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+_ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0.0),
+    'tanh': np.tanh,
+    'sigmoid': _sigmoid,
+}
+
+
+class NumpyLSTM:
+    """build_lstm_model 구조(LSTM 층들 → Dense 층들)의 NumPy 순전파(float32, 추론 모드)
+
+    model.npz: 'spec'(층 목록 JSON 문자열) + 층별 가중치 '{i}_kernel', '{i}_recurrent_kernel', '{i}_bias'.
+    LSTM 게이트 순서와 활성화 함수는 Keras와 같습니다(i, f, c, o / recurrent_activation, activation).
+    """
+
+    def __init__(self, spec: list, weights: dict):
+        for layer in spec:
+            if layer['type'] == 'lstm' and ({layer['activation'], layer['recurrent_activation']} - set(_ACTIVATIONS)):
+                raise ValueError(f"지원하지 않는 LSTM 활성화 함수: {layer['activation']}, {layer['recurrent_activation']}")
+            if layer['type'] == 'dense' and layer['activation'] not in _ACTIVATIONS:
+                raise ValueError(f"지원하지 않는 Dense 활성화 함수: {layer['activation']}")
+        self.spec = spec
+        self.weights = {k: np.asarray(v, dtype='float32') for k, v in weights.items()}
+        lstm = [i for i, l in enumerate(spec) if l['type'] == 'lstm']
+        if not lstm or lstm != list(range(len(lstm))) or any(l['type'] != 'dense' for l in spec[len(lstm):]):
+            raise ValueError('NumpyLSTM은 LSTM 층들 → Dense 층들 순차 구조만 지원합니다.')
+        self._lstm, self._head = lstm, list(range(len(lstm), len(spec)))
+
+    @classmethod
+    def load(cls, path: str) -> 'NumpyLSTM':
+        if not os.path.exists(path):
+            raise FileNotFoundError(f'NumPy 가중치 파일이 없습니다: {path} (먼저 export_lstm.py --format npz를 실행하세요)')
+        with np.load(path, allow_pickle=False) as npz:
+            spec = json.loads(str(npz['spec']))
+            weights = {k: npz[k] for k in npz.files if k != 'spec'}
+        return cls(spec, weights)
+
+    def _gates(self, i: int, z: np.ndarray, c: np.ndarray):
+        """z = x·W + h·U + b (N, 4H) → (h, c)"""
+        layer = self.spec[i]
+        act, rec = _ACTIVATIONS[layer['activation']], _ACTIVATIONS[layer['recurrent_activation']]
+        zi, zf, zc, zo = np.split(z, 4, axis=-1)
+        c = rec(zf) * c + rec(zi) * act(zc)
+        return rec(zo) * act(c), c
+
+    def zero_state(self, n: int) -> list:
+        return [(np.zeros((n, self.spec[i]['units']), 'float32'), np.zeros((n, self.spec[i]['units']), 'float32'))
+                for i in self._lstm]
+
+    def step(self, row: np.ndarray, states: list):
+        """타임스텝 하나(row: (N, feat))를 이전 LSTM 상태에 이어 계산 → (예측 (N,), 새 상태)"""
+        out, new_states = row, []
+        for i, (h, c) in zip(self._lstm, states):
+            w = self.weights
+            z = out @ w[f'{i}_kernel'] + h @ w[f'{i}_recurrent_kernel'] + w[f'{i}_bias']
+            h, c = self._gates(i, z, c)
+            new_states.append((h, c))
+            out = h
+        return self._apply_head(out), new_states
+
+    def _apply_head(self, x: np.ndarray) -> np.ndarray:
+        for i in self._head:
+            x = _ACTIVATIONS[self.spec[i]['activation']](x @ self.weights[f'{i}_kernel'] + self.weights[f'{i}_bias'])
+        return x.reshape(len(x), -1)[:, 0]
+
+    def predict(self, windows: np.ndarray) -> np.ndarray:
+        """(N, T, feat) → 다음 시점 예측 (N,)"""
+        x = np.asarray(windows, dtype='float32')
+        n, t = x.shape[:2]
+        for i, (h, c) in zip(self._lstm, self.zero_state(n)):
+            w = self.weights
+            # 입력 투영은 모든 타임스텝을 한 번에, 순환 부분만 타임스텝 루프
+            xw = x @ w[f'{i}_kernel'] + w[f'{i}_bias']
+            seq = np.empty((n, t, h.shape[1]), dtype='float32') if self.spec[i]['return_sequences'] else None
+            for s in range(t):
+                h, c = self._gates(i, xw[:, s] + h @ w[f'{i}_recurrent_kernel'], c)
+                if seq is not None:
+                    seq[:, s] = h
+            x = seq if seq is not None else h
+        return self._apply_head(x)
+
+
+class NumpyRollout:
+    """NumpyLSTM으로 horizon 스텝 오토리그레시브 예측(LSTMRollout과 같은 호출 형태/계산)
+
+    기본: 스텝마다 윈도우를 한 칸 밀고 마지막 행의 y_t만 예측값으로 바꾼 새 행을 붙여 다시 계산.
+    reuse_state=True: 윈도우를 한 번 통과시킨 LSTM 상태에 새 행 하나씩 이어서 계산(근사).
+    """
+
+    def __init__(self, model: NumpyLSTM, y_idx: int = 0, reuse_state: bool = False):
+        self.model = model
+        self.y_idx = y_idx
+        self.reuse_state = reuse_state
+
+    def _next_row(self, last_row: np.ndarray, yhat: np.ndarray) -> np.ndarray:
+        row = last_row.copy()
+        row[:, self.y_idx] = yhat
+        return row
+
+    def __call__(self, windows: np.ndarray, horizon: int) -> np.ndarray:
+        """(N, lookback, feat) 스케일된 윈도우 → 스케일된 예측 (N, horizon)"""
+        x = np.array(windows, dtype='float32')
+        out = np.empty((len(x), horizon), dtype='float32')
+        if len(x) == 0 or horizon == 0:
+            return out
+        if self.reuse_state:
+            states = self.model.zero_state(len(x))
+            for t in range(x.shape[1]):
+                yhat, states = self.model.step(x[:, t], states)
+            last_row = x[:, -1]
+            for h in range(horizon):
+                out[:, h] = yhat
+                last_row = self._next_row(last_row, yhat)
+                yhat, states = self.model.step(last_row, states)
+            return out
+        for h in range(horizon):
+            out[:, h] = self.model.predict(x)
+            new_row = self._next_row(x[:, -1], out[:, h])
+            x[:, :-1] = x[:, 1:]
+            x[:, -1] = new_row
+        return out
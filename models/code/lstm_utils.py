@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 """Keras 기반 LSTM 학습/예측 유틸리티
-- window_sequences: (shelter_id, relief_item_id)별 시계열에서 lookback 윈도우 생성
+- window_sequences: (shelter_id, relief_item_id)별 시계열에서 lookback 윈도우 생성(strided view, 윈도우 인덱스 선택)
+- panel_arrays / window_starts / window_dataset: 윈도우를 미리 만들지 않고 시계열별 시작 인덱스로
+  배치마다 잘라 내는 tf.data 입력 파이프라인(메모리 ≈ 패널 크기)
 - build_lstm_model: 간단한 회귀 LSTM 모델 구성
-- StandardScaler1D: 단일 스케일러로 연속 피처 스케일링/역변환
+- save_checkpoint / load_checkpoint: model.keras(+meta). 저장 시 NumPy 런타임용 model.npz(save_numpy_weights)도 함께
+- StandardScaler1D: 단일 스케일러로 연속 피처 스케일링/역변환(lstm_runtime, TensorFlow 없이 import 가능)
+- LSTMRollout: horizon 스텝 오토리그레시브 예측 전체를 tf.function 그래프 하나로 실행
 """
 import os
 import json
@@ -14,31 +18,10 @@ import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers
 
-FEATURE_COLS_DEFAULT = ['y_t','cons_ma7','cons_ma14','cons_ma28']
+from lstm_runtime import FEATURE_COLS_DEFAULT, TARGET_COL, StandardScaler1D, NumpyLSTM, file_sha256, read_meta
+
 CATEGORICAL_PREFIXES = ['seasonality_', 'disaster_severity_', 'weather_']
 INDEX_COLS = ['shelter_id','relief_item_id','date']
-TARGET_COL = 'y_t'
-
-class StandardScaler1D:
-    def __init__(self):
-        self.mean_ = None
-        self.std_ = None
-    def fit(self, x: np.ndarray):
-        self.mean_ = float(np.mean(x))
-        self.std_ = float(np.std(x) + 1e-8)
-        return self
-    def transform(self, x: np.ndarray):
-        return (x - self.mean_) / self.std_
-    def inverse_transform(self, x: np.ndarray):
-        return x * self.std_ + self.mean_
-    def to_dict(self):
-        return {'mean': self.mean_, 'std': self.std_}
-    @staticmethod
-    def from_dict(d):
-        s = StandardScaler1D()
-        s.mean_ = float(d['mean'])
-        s.std_ = float(d['std'])
-        return s
 
 def prepare_panel(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
@@ -46,34 +29,113 @@ def prepare_panel(df: pd.DataFrame) -> pd.DataFrame:
     df = df.sort_values(INDEX_COLS)
     return df
 
-def window_sequences(df: pd.DataFrame, lookback: int = 28, feature_cols: List[str] = None):
-    feature_cols = feature_cols or FEATURE_COLS_DEFAULT
+def _scaled_panel(df: pd.DataFrame, feature_cols: List[str], scaler: StandardScaler1D = None):
+    """정렬된 패널 사본 + 연속형 컬럼(y_t, cons_ma7/14/28) 스케일링. scaler가 없으면 타깃으로 맞춤"""
     df = prepare_panel(df)
-    groups = list(df.groupby(['shelter_id','relief_item_id']))
-    scaler = StandardScaler1D().fit(df[TARGET_COL].values)
-    # 연속형 컬럼만 스케일: 기본 연속형(y_t, cons_ma7/14/28)
+    if scaler is None:
+        scaler = StandardScaler1D().fit(df[TARGET_COL].values)
     continuous_cols = [c for c in feature_cols if c in FEATURE_COLS_DEFAULT]
     for col in continuous_cols:
         df[col] = scaler.transform(df[col].values)
-    X, y = [], []
-    for (_, _), g in groups:
-        if len(g) <= lookback:
-            continue
-        vals = g[feature_cols].values.astype('float32')
-        target = g[TARGET_COL].values.astype('float32')
-        for s in range(0, len(g) - lookback):
-            X.append(vals[s:s+lookback])
-            # y_{t+1}를 선호, 없으면 마지막 시점으로 대체
-            idx = s + lookback
-            if idx < len(g):
-                y.append(target[idx])
-            else:
-                y.append(target[idx-1])
-    if not X:
-        return np.zeros((0, lookback, len(feature_cols)), dtype='float32'), np.zeros((0,), dtype='float32'), scaler
-    return np.stack(X), np.array(y), scaler
-
-def build_lstm_model(input_dim: int, hidden: int = 64, layers_n: int = 2, dropout: float = 0.1):
+    return df, scaler
+
+def _series_offsets(df: pd.DataFrame) -> np.ndarray:
+    """정렬된 패널에서 (shelter_id, relief_item_id)가 바뀌는 지점 → 시계열 경계 (P+1,)"""
+    if df.empty:
+        return np.zeros(1, dtype='int64')
+    codes = df.groupby(['shelter_id','relief_item_id'], observed=True, sort=False).ngroup().to_numpy()
+    bounds = np.flatnonzero(np.diff(codes)) + 1
+    return np.concatenate([[0], bounds, [len(df)]]).astype('int64')
+
+def window_sequences(df: pd.DataFrame, lookback: int = 28, feature_cols: List[str] = None,
+                     scaler: StandardScaler1D = None, return_index: bool = False):
+    """모든 (shelter_id, relief_item_id) 시계열의 lookback 윈도우 → (X, y, scaler[, index])
+
+    X: (N, lookback, F) float32, y: 윈도우 다음 시점 타깃 (N,). 패널 전체를 한 배열로 이어 붙인 뒤
+    sliding_window_view(복사 없는 strided view)에서 시계열 안에 있는 윈도우 시작점만 골라
+    한 번에 복사합니다. return_index=True면 윈도우별 (shelter_id, relief_item_id, date=타깃 날짜,
+    window_start) DataFrame도 반환합니다(평가/진단용, X와 같은 행 순서).
+    """
+    feature_cols = feature_cols or FEATURE_COLS_DEFAULT
+    df, scaler = _scaled_panel(df, feature_cols, scaler)
+    values = df[feature_cols].to_numpy(dtype='float32')
+    targets = df[TARGET_COL].to_numpy(dtype='float32')
+    starts = window_starts(_series_offsets(df), lookback)
+    if len(starts):
+        # (T - lookback + 1, F, lookback) view → 선택한 윈도우만 (N, lookback, F)로 복사
+        view = np.lib.stride_tricks.sliding_window_view(values, lookback, axis=0)
+        X = np.ascontiguousarray(view[starts].transpose(0, 2, 1))
+    else:
+        X = np.zeros((0, lookback, len(feature_cols)), dtype='float32')
+    y = targets[starts + lookback]
+    if not return_index:
+        return X, y, scaler
+    index = df[INDEX_COLS].iloc[starts + lookback].reset_index(drop=True)
+    index['window_start'] = df['date'].to_numpy()[starts]
+    return X, y, scaler, index
+
+def panel_arrays(df: pd.DataFrame, feature_cols: List[str] = None, scaler: StandardScaler1D = None):
+    """패널 → (피처 (T, F) float32, 타깃 (T,) float32, 시계열 경계 offsets (P+1,), scaler)
+
+    window_sequences와 같은 정렬/스케일링을 하되 윈도우는 만들지 않습니다. 시계열 p의 행은
+    values[offsets[p]:offsets[p+1]] 연속 구간입니다. scaler가 없으면 타깃으로 새로 맞춥니다.
+    """
+    feature_cols = feature_cols or FEATURE_COLS_DEFAULT
+    df, scaler = _scaled_panel(df, feature_cols, scaler)
+    values = df[feature_cols].to_numpy(dtype='float32')
+    targets = df[TARGET_COL].to_numpy(dtype='float32')
+    return values, targets, _series_offsets(df), scaler
+
+def window_starts(offsets: np.ndarray, lookback: int) -> np.ndarray:
+    """다음 시점 타깃이 있는 윈도우의 시작 행 번호(전역). 길이 L인 시계열은 L - lookback개"""
+    offsets = np.asarray(offsets, dtype='int64')
+    return segment_window_starts(offsets[:-1], np.diff(offsets), lookback)
+
+def segment_window_starts(first: np.ndarray, lengths: np.ndarray, lookback: int) -> np.ndarray:
+    """시계열 구간(시작 행 first, 길이 lengths)별 윈도우 시작 행 번호. 구간은 연속일 필요 없음"""
+    n = np.maximum(np.asarray(lengths, dtype='int64') - lookback, 0)
+    first = np.repeat(np.asarray(first, dtype='int64'), n)
+    return first + (np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n))
+
+def window_dataset(values: np.ndarray, targets: np.ndarray, starts: np.ndarray, lookback: int,
+                   batch_size: int = 256, shuffle: bool = True, seed: int | None = None,
+                   columns: np.ndarray = None, scaler: StandardScaler1D = None,
+                   scaled: np.ndarray = None) -> tf.data.Dataset:
+    """시작 인덱스 → (윈도우 (B, lookback, F), 다음 시점 타깃 (B,)) 배치 tf.data.Dataset
+
+    셔플/배치는 정수 인덱스에만 적용하고, 윈도우는 배치마다 values[starts + arange(lookback)]로
+    잘라 냅니다(병렬 map + prefetch). values는 numpy 배열(np.memmap 포함)을 그대로 참조하므로
+    그래프에 상수로 복사되지 않습니다.
+
+    원시 값 패널(panel_store.CompiledPanel)용: columns를 주면 그 열만 쓰고, scaler를 주면
+    배치마다 scaled(선택한 열 기준 bool 마스크) 열과 타깃을 스케일링합니다.
+    """
+    columns = np.arange(values.shape[1]) if columns is None else np.asarray(columns)
+    n_feat = len(columns)
+    steps = np.arange(lookback, dtype='int64')
+
+    def gather(s):
+        x = np.asarray(values[s[:, None] + steps])[..., columns]
+        y = np.asarray(targets[s + lookback], dtype='float32')
+        if scaler is not None:
+            x[..., scaled] = scaler.transform(x[..., scaled])
+            y = scaler.transform(y)
+        return x.astype('float32', copy=False), y.astype('float32', copy=False)
+
+    def load(s):
+        x, y = tf.numpy_function(gather, [s], [tf.float32, tf.float32])
+        x.set_shape([None, lookback, n_feat])
+        y.set_shape([None])
+        return x, y
+
+    ds = tf.data.Dataset.from_tensor_slices(np.asarray(starts, dtype='int64'))
+    if shuffle:
+        ds = ds.shuffle(len(starts), seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size).map(load, num_parallel_calls=tf.data.AUTOTUNE)
+    return ds.prefetch(tf.data.AUTOTUNE)
+
+def build_lstm_model(input_dim: int, hidden: int = 64, layers_n: int = 2, dropout: float = 0.1,
+                     learning_rate: float = 1e-3):
     inputs = keras.Input(shape=(None, input_dim))
     x = inputs
     for i in range(layers_n - 1):
@@ -83,21 +145,159 @@ def build_lstm_model(input_dim: int, hidden: int = 64, layers_n: int = 2, dropou
     x = layers.Dropout(dropout)(x)
     outputs = layers.Dense(1, activation='linear')(x)
     model = keras.Model(inputs, outputs)
-    model.compile(optimizer=keras.optimizers.Adam(1e-3), loss='mse')
+    model.compile(optimizer=keras.optimizers.Adam(learning_rate), loss='mse')
     return model
 
+def layer_spec(model: keras.Model):
+    """Keras 모델 → (NumpyLSTM 층 목록, 가중치 dict). Dropout은 추론 시 항등이므로 생략"""
+    spec, weights = [], {}
+    for layer in model.layers:
+        if isinstance(layer, (layers.InputLayer, layers.Dropout)):
+            continue
+        config, i = layer.get_config(), len(spec)
+        if isinstance(layer, layers.LSTM):
+            if config.get('go_backwards') or config.get('stateful') or not config.get('use_bias', True):
+                raise ValueError(f'NumPy 런타임이 지원하지 않는 LSTM 설정입니다: {layer.name}')
+            kernel, recurrent, bias = layer.get_weights()
+            spec.append({'type': 'lstm', 'units': int(config['units']), 'activation': config['activation'],
+                         'recurrent_activation': config['recurrent_activation'],
+                         'return_sequences': bool(config['return_sequences'])})
+            weights.update({f'{i}_kernel': kernel, f'{i}_recurrent_kernel': recurrent, f'{i}_bias': bias})
+        elif isinstance(layer, layers.Dense) and config.get('use_bias', True):
+            kernel, bias = layer.get_weights()
+            spec.append({'type': 'dense', 'units': int(config['units']), 'activation': config['activation']})
+            weights.update({f'{i}_kernel': kernel, f'{i}_bias': bias})
+        else:
+            raise ValueError(f'NumPy 런타임이 지원하지 않는 층입니다: {layer.name} ({type(layer).__name__})')
+    return spec, weights
+
+def save_numpy_weights(path: str, model: keras.Model, scaler: StandardScaler1D, meta: Dict, source: str = None):
+    """NumPy 런타임(lstm_runtime.NumpyLSTM)용 model.npz + .meta.json 저장
+
+    npz: 'spec'(층 구성 JSON 문자열) + 층별 float32 가중치(np.load(allow_pickle=False)로 읽힘).
+    source(.keras 경로)를 주면 meta에 sha256을 기록해 forecast_service가 최신 여부를 판단합니다.
+    """
+    spec, weights = layer_spec(model)
+    NumpyLSTM(spec, weights)  # 지원 구조인지 저장 전에 확인
+    with open(path, 'wb') as f:
+        np.savez(f, spec=np.array(json.dumps(spec)), **{k: v.astype('float32') for k, v in weights.items()})
+    if source is not None:
+        meta = {**meta, 'source': os.path.basename(source), 'source_sha256': file_sha256(source)}
+    with open(path + '.meta.json', 'w', encoding='utf-8') as f:
+        json.dump({'scaler': scaler.to_dict(), 'meta': meta}, f, ensure_ascii=False, indent=2)
+
 def save_checkpoint(path: str, model: keras.Model, scaler: StandardScaler1D, meta: Dict):
+    """model.keras(+meta) 저장. 지원 구조면 NumPy 런타임용 model.npz(+meta)도 함께 저장"""
     os.makedirs(os.path.dirname(path), exist_ok=True)
     model_path = path if path.endswith('.keras') else path + '.keras'
     model.save(model_path)
     with open(model_path + '.meta.json', 'w', encoding='utf-8') as f:
         json.dump({'scaler': scaler.to_dict(), 'meta': meta}, f, ensure_ascii=False, indent=2)
+    try:
+        save_numpy_weights(model_path[:-len('.keras')] + '.npz', model, scaler, meta, source=model_path)
+    except ValueError as e:
+        print(f'⚠️ NumPy 런타임 가중치를 저장하지 않았습니다: {e}')
 
 def load_checkpoint(path: str):
     model_path = path if path.endswith('.keras') else path + '.keras'
     model = keras.models.load_model(model_path)
-    with open(model_path + '.meta.json', 'r', encoding='utf-8') as f:
-        meta_all = json.load(f)
-    scaler = StandardScaler1D.from_dict(meta_all['scaler'])
-    meta = meta_all.get('meta', {})
+    scaler, meta = read_meta(model_path)
     return model, scaler, meta
+
+
+class LSTMRollout:
+    """horizon 스텝 오토리그레시브 예측을 컴파일된 그래프 하나로 실행
+
+    model.predict를 스텝마다 호출하고 np.concatenate로 윈도우를 다시 만드는 대신,
+    (N, lookback, feat) 윈도우를 시간 축 우선 링 버퍼(lookback, N, feat)에 한 번 담고
+    스텝마다 가장 오래된 슬롯만 새 행(y_t만 예측값으로 바꾼 마지막 행)으로 덮어씁니다.
+    전체 horizon 루프가 tf.function 안에서 돌므로 파이썬 ↔ TF 왕복은 호출당 한 번입니다.
+
+    reuse_state=True면 윈도우를 한 번 LSTM 셀로 통과시킨 뒤, 이후 스텝은 새 행 하나만
+    이전 LSTM 상태에 이어서 계산합니다(스텝당 1 타임스텝). 윈도우를 밀어내는 대신 문맥이
+    누적되므로 기본 방식과 값이 조금 다를 수 있는 근사입니다. build_lstm_model 구조
+    (LSTM 층들 → 나머지 층 순차 적용)에서만 지원합니다.
+
+    jit_compile=True면 XLA로 컴파일합니다(입력 크기(N, lookback)마다 첫 호출 시 컴파일, 이후 재사용).
+    XLA 컴파일에 실패하는 환경에서는 일반 tf.function 그래프로 자동 전환합니다.
+    """
+
+    def __init__(self, model: keras.Model, y_idx: int = 0, reuse_state: bool = False, jit_compile: bool = True):
+        self.model = model
+        self.y_idx = y_idx
+        self.reuse_state = reuse_state
+        if reuse_state:
+            self._lstm_layers, self._head_layers = self._split_layers(model)
+        self._fn = self._compile(jit_compile)
+
+    def _compile(self, jit_compile: bool):
+        signature = [tf.TensorSpec([None, None, self.model.input_shape[-1]], tf.float32), tf.TensorSpec([], tf.int32)]
+        rollout = self._stateful_rollout if self.reuse_state else self._window_rollout
+        self.jit_compile = jit_compile
+        return tf.function(rollout, input_signature=signature, reduce_retracing=True, jit_compile=jit_compile)
+
+    @staticmethod
+    def _split_layers(model):
+        """(LSTM 층 목록, 마지막 LSTM 이후 층 목록) — 단순 순차 구조만 지원"""
+        body = [l for l in model.layers if not isinstance(l, layers.InputLayer)]
+        lstm = [l for l in body if isinstance(l, layers.LSTM)]
+        if not lstm or body[:len(lstm)] != lstm:
+            raise ValueError('reuse_state는 LSTM 층으로 시작하는 순차 모델에서만 지원합니다.')
+        return lstm, body[len(lstm):]
+
+    def _next_row(self, last_row, yhat):
+        """마지막 행에서 y_t만 예측값으로 바꾼 새 행 (N, feat)"""
+        onehot = tf.one_hot(self.y_idx, tf.shape(last_row)[-1], dtype=last_row.dtype)
+        return last_row * (1.0 - onehot) + yhat[:, None] * onehot
+
+    def _window_rollout(self, x, horizon):
+        lookback = tf.shape(x)[1]
+        ring = tf.transpose(x, [1, 0, 2])  # (lookback, N, feat) 링 버퍼
+        head = tf.constant(0)               # 가장 오래된 슬롯
+        preds = tf.TensorArray(tf.float32, size=horizon)
+        for h in tf.range(horizon):
+            order = (head + tf.range(lookback)) % lookback
+            window = tf.transpose(tf.gather(ring, order), [1, 0, 2])
+            yhat = tf.reshape(self.model(window, training=False), [-1])
+            preds = preds.write(h, yhat)
+            new_row = self._next_row(window[:, -1, :], yhat)
+            ring = tf.tensor_scatter_nd_update(ring, [[head]], new_row[None])
+            head = (head + 1) % lookback
+        return tf.transpose(preds.stack())  # (N, horizon)
+
+    def _step(self, row, states):
+        """LSTM 셀 한 타임스텝 + 나머지 층 → (예측, 새 상태)"""
+        out, new_states = row, []
+        for layer, state in zip(self._lstm_layers, states):
+            out, state = layer.cell(out, state, training=False)
+            new_states.append(state)
+        y = out
+        for layer in self._head_layers:
+            y = layer(y, training=False)
+        return tf.reshape(y, [-1]), new_states
+
+    def _stateful_rollout(self, x, horizon):
+        n = tf.shape(x)[0]
+        states = [[tf.zeros([n, l.cell.units]), tf.zeros([n, l.cell.units])] for l in self._lstm_layers]
+        yhat = tf.zeros([n])
+        for t in tf.range(tf.shape(x)[1]):
+            yhat, states = self._step(x[:, t, :], states)
+        preds = tf.TensorArray(tf.float32, size=horizon)
+        last_row = x[:, -1, :]
+        for h in tf.range(horizon):
+            preds = preds.write(h, yhat)
+            last_row = self._next_row(last_row, yhat)
+            yhat, states = self._step(last_row, states)
+        return tf.transpose(preds.stack())
+
+    def __call__(self, windows: np.ndarray, horizon: int) -> np.ndarray:
+        """(N, lookback, feat) 스케일된 윈도우 → 스케일된 예측 (N, horizon)"""
+        x = tf.convert_to_tensor(np.asarray(windows, dtype='float32'))
+        h = tf.constant(horizon, tf.int32)
+        try:
+            return self._fn(x, h).numpy()
+        except tf.errors.OpError:
+            if not self.jit_compile:
+                raise
+            self._fn = self._compile(False)
+            return self._fn(x, h).numpy()
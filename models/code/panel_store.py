@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""LSTM 패널 컴파일 산출물(memmap)
+
+train_lstm.py / predict_lstm.py(forecast_service)가 매번 train.parquet을 pandas로 읽고
+(shelter_id, relief_item_id, date)로 다시 정렬하던 작업을 데이터셋 빌드 때 한 번만 합니다.
+
+- panel_values.npy: (T, F) float32 피처 행렬(원시 값, 스케일링 전). pair별 행은 날짜순 연속 구간
+- panel_dates.npy: (T,) datetime64[D]
+- panel_index.parquet: pair별 (shelter_id, relief_item_id, offset, length), 키 정렬 순
+- panel_meta.json: 컬럼 이름, 원본 train 파일 지문(크기·수정 시각·sha256)
+  (스케일러는 학습 split에서 fit하므로 패널에 두지 않음 — train_lstm.make_datasets)
+
+np.load(mmap_mode='r')로 열기 때문에 로드 시간이 패널 크기와 무관하고, pair 하나의 이력은
+values[offset:offset + length] 연속 슬라이스입니다. 원본 train 파일 내용이 산출물과 다르면
+open()은 None을 반환하므로 호출 측은 from_frame(read_dataset(...))으로 메모리에서 만듭니다.
+
+사용 예시:
+  store = CompiledPanel.open(DATA_DIR) or CompiledPanel.from_frame(read_dataset(DATA_DIR))
+  window = store.take(np.arange(end - 28, end), store.column_index(['y_t', 'cons_ma7']))
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from lstm_runtime import file_sha256
+from table_io import dataset_path
+
+VALUES_FILE = 'panel_values.npy'
+DATES_FILE = 'panel_dates.npy'
+INDEX_FILE = 'panel_index.parquet'
+META_FILE = 'panel_meta.json'
+PANEL_FILES = [VALUES_FILE, DATES_FILE, INDEX_FILE, META_FILE]
+
+SERIES_KEYS = ['shelter_id', 'relief_item_id']
+TARGET_COL = 'y_t'
+
+
+def _source_stamp(path: str | None) -> dict | None:
+    if path is None or not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    return {'file': os.path.basename(path), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': file_sha256(path)}
+
+
+def _same_source(stamp: dict | None, path: str | None) -> bool:
+    """stamp가 path와 같은 파일 내용인지(크기·수정 시각이 같으면 해시 생략, git checkout 등으로 시각만 바뀌면 해시 비교)"""
+    if not stamp or path is None or not os.path.exists(path):
+        return False
+    st = os.stat(path)
+    if stamp.get('file') != os.path.basename(path) or stamp.get('size') != st.st_size:
+        return False
+    return stamp.get('mtime_ns') == st.st_mtime_ns or stamp.get('sha256') == file_sha256(path)
+
+
+def _sorted_keys(values: pd.Series) -> pd.Series:
+    """시리즈 키 → 문자열 정렬 순 사전의 category(행마다 문자열을 만들지 않고 코드로 정렬/그룹화)"""
+    if isinstance(values.dtype, pd.CategoricalDtype) and not values.isna().any():
+        values = values.cat.rename_categories(values.cat.categories.astype(str))
+        return values.cat.reorder_categories(sorted(values.cat.categories))
+    return values.astype(str).astype('category')
+
+
+class CompiledPanel:
+    """(T, F) float32 피처 행렬 + 날짜 + pair별 연속 구간 인덱스"""
+
+    def __init__(self, values: np.ndarray, dates: np.ndarray, index: pd.DataFrame, columns):
+        self.values = values
+        self.dates = dates
+        self.index = index
+        self.columns = list(columns)
+        self.offsets = np.append(index['offset'].to_numpy(dtype='int64'), len(values))
+        self._col = {c: i for i, c in enumerate(self.columns)}
+
+    @property
+    def rows(self) -> int:
+        return len(self.values)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'CompiledPanel':
+        """패널 DataFrame → 메모리 내 CompiledPanel(숫자/불리언 컬럼만 피처로 사용)"""
+        df = df.copy()
+        df['date'] = pd.to_datetime(df['date'])
+        for k in SERIES_KEYS:
+            df[k] = _sorted_keys(df[k])
+        df = df.sort_values(SERIES_KEYS + ['date'], kind='stable')
+        columns = [c for c in df.columns if c not in SERIES_KEYS + ['date']
+                   and (pd.api.types.is_numeric_dtype(df[c]) or pd.api.types.is_bool_dtype(df[c]))]
+        values = df[columns].to_numpy(dtype='float32')
+        dates = df['date'].to_numpy().astype('datetime64[D]')
+        index = df.groupby(SERIES_KEYS, sort=False, observed=True).size().rename('length').reset_index()
+        for k in SERIES_KEYS:
+            index[k] = index[k].astype(str)
+        index['offset'] = np.cumsum(index['length'].to_numpy()) - index['length'].to_numpy()
+        index = index[SERIES_KEYS + ['offset', 'length']].astype({'offset': 'int64', 'length': 'int64'})
+        return cls(values, dates, index, columns)
+
+    def save(self, out_dir: str, source: str | None = None):
+        """산출물 저장. meta를 마지막에 원자적으로 써서 중간 실패 시 이전 meta와 섞이지 않게 함"""
+        os.makedirs(out_dir, exist_ok=True)
+        np.save(os.path.join(out_dir, VALUES_FILE), np.ascontiguousarray(self.values))
+        np.save(os.path.join(out_dir, DATES_FILE), self.dates)
+        self.index.to_parquet(os.path.join(out_dir, INDEX_FILE), index=False)
+        meta = {'columns': self.columns, 'rows': self.rows, 'pairs': len(self.index),
+                'source': _source_stamp(source)}
+        path = os.path.join(out_dir, META_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, data_dir: str, mmap_mode: str | None = 'r') -> 'CompiledPanel':
+        with open(os.path.join(data_dir, META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        values = np.load(os.path.join(data_dir, VALUES_FILE), mmap_mode=mmap_mode)
+        dates = np.load(os.path.join(data_dir, DATES_FILE), mmap_mode=mmap_mode)
+        index = pd.read_parquet(os.path.join(data_dir, INDEX_FILE))
+        for k in SERIES_KEYS:
+            index[k] = index[k].astype(str)
+        return cls(values, dates, index, meta['columns'])
+
+    @classmethod
+    def open(cls, data_dir: str) -> 'CompiledPanel | None':
+        """산출물이 있고 원본 train 파일과 같은 빌드면 memmap으로 열기, 아니면 None"""
+        if not all(os.path.exists(os.path.join(data_dir, f)) for f in PANEL_FILES):
+            return None
+        with open(os.path.join(data_dir, META_FILE), 'r', encoding='utf-8') as f:
+            source = json.load(f).get('source')
+        if not _same_source(source, dataset_path(data_dir)):
+            print('⚠️ 컴파일된 패널이 train 데이터와 맞지 않아 train 파일에서 다시 만듭니다.')
+            return None
+        return cls.load(data_dir)
+
+    def column_index(self, cols) -> np.ndarray:
+        """컬럼 이름 → 열 번호(없는 컬럼은 -1)"""
+        return np.array([self._col.get(c, -1) for c in cols], dtype='int64')
+
+    def take(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """values[rows][..., cols] (float32). cols의 -1(없는 컬럼)은 0으로 채움"""
+        cols = np.asarray(cols)
+        out = np.asarray(self.values[rows])[..., np.maximum(cols, 0)]
+        if (cols < 0).any():
+            out[..., cols < 0] = 0.0
+        return out
+
+    def pair_totals(self, col: str = TARGET_COL) -> pd.DataFrame:
+        """pair 인덱스 + col 합계(이력 전체)"""
+        out = self.index.copy()
+        v = np.asarray(self.values[:, self._col[col]], dtype='float64')
+        out[col] = np.add.reduceat(v, self.offsets[:-1]) if len(v) else np.zeros(len(out))
+        return out
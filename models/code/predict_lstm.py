@@ -1,89 +1,102 @@
 #!/usr/bin/env python3
-"""LSTM 수량 예측 예측 스크립트 (Keras)
+"""LSTM 수량 예측 예측 스크립트 (Keras / NumPy / TFLite)
 - 특정 (shelter_id, relief_item_id) 페어의 최근 lookback 구간을 읽어 horizon-step 예측
-입력: models/data/lstm_forecast/train.csv, model.keras
-출력: models/data/lstm_forecast/predictions.json
+- 배치 모드: --all(전체 pair) / --shelter_id만 지정(해당 대피소 전체 pair) / --pairs_file(pair 목록)
+  지정 pair들의 윈도우를 한 텐서로 쌓아 스텝당 모델 호출 1회로 함께 예측합니다(야간 재고 계획용).
+- 예측 로직은 forecast_service.LSTMForecastService를 사용합니다(여러 페어를 예측할 때는
+  서비스 객체를 한 번 만들어 재사용하세요).
+- --runtime numpy / tflite: export_lstm.py로 만든 model.npz(NumPy 순전파) / model.tflite(양자화)로 실행.
+  TensorFlow를 import하지 않아 시작이 빠르고 메모리를 적게 씁니다. 기본 auto는 최신 model.npz가 있으면 numpy.
+입력: models/data/lstm_forecast/train.parquet(없으면 train.csv), model.keras(또는 model.npz / model.tflite)
+출력: models/data/lstm_forecast/predictions.json (단일 pair)
+      models/data/lstm_forecast/batch_predictions.parquet, batch_recommendations.parquet (배치 모드)
 """
 import os
 import json
+import time
 import argparse
-import pandas as pd
-import numpy as np
 
-from lstm_utils import load_checkpoint, FEATURE_COLS_DEFAULT
+from forecast_service import LSTMForecastService, DEFAULT_ALPHA, DEFAULT_BATCH_SIZE, RUNTIMES
+from table_io import DEFAULT_FORMAT, read_table, write_table
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-DATA = os.path.join(ROOT, 'data', 'lstm_forecast', 'train.csv')
+DATA_DIR = os.path.join(ROOT, 'data', 'lstm_forecast')
 OUT = os.path.join(ROOT, 'data', 'lstm_forecast', 'predictions.json')
 CKPT = os.path.join(ROOT, 'data', 'lstm_forecast', 'model')
 
 
+def run_batch(service: LSTMForecastService, pairs, args):
+    """pair 목록 배치 예측 → 롱 포맷 예측 + pair별 권장 수량 테이블 저장"""
+    available = set(service.pairs)
+    keys = [(str(sid), str(iid)) for sid, iid in pairs]
+    ok = [k for k in keys if k in available]
+    if len(ok) < len(keys):
+        print(f"⚠️ lookback({service.lookback})보다 짧거나 없는 pair {len(keys) - len(ok)}개는 건너뜁니다.")
+    if not ok:
+        raise SystemExit('예측할 시계열이 없습니다.')
+    t0 = time.time()
+    preds, summary = service.forecast_table(ok, horizon=args.horizon, alpha=DEFAULT_ALPHA,
+                                            batch_size=args.batch_size)
+    elapsed = time.time() - t0
+    out_dir = args.out_dir or DATA_DIR
+    pred_path = write_table(preds, os.path.join(out_dir, 'batch_predictions'), args.format)
+    rec_path = write_table(summary, os.path.join(out_dir, 'batch_recommendations'), args.format)
+    print(f"Forecasted {len(ok)} pairs x {args.horizon} steps in {elapsed:.2f}s")
+    print(f"Saved predictions to {pred_path}")
+    print(f"Saved recommendations to {rec_path}")
+
+
 def main():
-    parser = argparse.ArgumentParser(description='LSTM 예측 (Keras)')
-    parser.add_argument('--shelter_id', type=str, default=None)
+    parser = argparse.ArgumentParser(description='LSTM 예측 (Keras / NumPy / TFLite)')
+    parser.add_argument('--shelter_id', type=str, default=None,
+                        help='relief_item_id 없이 지정하면 해당 대피소의 모든 pair를 배치 예측')
     parser.add_argument('--relief_item_id', type=str, default=None)
-    parser.add_argument('--lookback', type=int, default=28)
+    parser.add_argument('--all', action='store_true', help='예측 가능한 모든 pair를 배치 예측')
+    parser.add_argument('--pairs_file', type=str, default=None,
+                        help='shelter_id, relief_item_id 컬럼을 가진 테이블(.parquet/.csv/.ndjson/.json)')
+    parser.add_argument('--lookback', type=int, default=None, help='미지정 시 체크포인트 메타의 lookback')
     parser.add_argument('--horizon', type=int, default=7, help='며칠 예측할지 (오토리그레시브)')
+    parser.add_argument('--batch_size', type=int, default=DEFAULT_BATCH_SIZE, help='배치 모드 모델 호출당 최대 시계열 수')
+    parser.add_argument('--format', type=str, default=DEFAULT_FORMAT, choices=['parquet', 'csv'],
+                        help='배치 모드 결과 저장 형식')
+    parser.add_argument('--reuse_state', action='store_true',
+                        help='LSTM 상태를 이어 써서 스텝당 1 타임스텝만 계산(빠른 근사, 기본은 윈도우 전체 재계산)')
+    parser.add_argument('--out_dir', type=str, default=None, help='배치 모드 결과 폴더(기본: models/data/lstm_forecast)')
+    parser.add_argument('--runtime', type=str, default='auto', choices=RUNTIMES,
+                        help='numpy/tflite: export_lstm.py로 만든 model.npz/model.tflite 사용(TensorFlow 불필요). '
+                             'auto: 최신 model.npz가 있으면 numpy, 없으면 keras')
+    parser.add_argument('--num_threads', type=int, default=None, help='tflite 런타임 스레드 수')
     # feature_cols는 모델이 학습 시 사용한 메타 정보로 강제 일치시킵니다(옵션 제거)
     args = parser.parse_args()
+    if args.horizon < 1:
+        raise SystemExit(f'--horizon은 1 이상이어야 합니다: {args.horizon}')
 
-    df = pd.read_csv(DATA, encoding='utf-8-sig')
-
-    # 체크포인트 로드(메타에서 feature_cols/continuous_cols 확보)
-    model, scaler, meta = load_checkpoint(CKPT)
-    feature_cols = meta.get('feature_cols', FEATURE_COLS_DEFAULT)
-    # 혹시 데이터에 없는 컬럼이 있다면 0으로 채워 추가(주로 one-hot 안전장치)
-    for c in feature_cols:
-        if c not in df.columns:
-            df[c] = 0.0
-
-    # 대상 pair 자동 선택(미지정 시 가장 데이터가 많은 페어)
-    if not args.shelter_id or not args.relief_item_id:
-        cnt = df.groupby(['shelter_id','relief_item_id']).size().reset_index(name='n').sort_values('n', ascending=False)
-        if cnt.empty:
-            raise SystemExit('예측할 시계열이 없습니다.')
-        args.shelter_id = str(cnt.iloc[0]['shelter_id'])
-        args.relief_item_id = str(cnt.iloc[0]['relief_item_id'])
-
-    sub = df[(df['shelter_id']==args.shelter_id) & (df['relief_item_id']==args.relief_item_id)].copy()
-    sub['date'] = pd.to_datetime(sub['date'])
-    sub = sub.sort_values('date')
-    if len(sub) < args.lookback:
-        raise SystemExit('해당 pair의 데이터가 lookback보다 적습니다.')
-
-    # 마지막 lookback 윈도우 준비 (스케일러 적용)
-    window = sub.iloc[-args.lookback:]
-    # 연속/범주 분리: 메타에 continuous_cols 있으면 사용
-    continuous_cols = meta.get('continuous_cols', [c for c in feature_cols if c in FEATURE_COLS_DEFAULT])
-    x_df = window[feature_cols].copy()
-    for c in continuous_cols:
-        if c in x_df.columns:
-            x_df[c] = scaler.transform(x_df[c].values.astype('float32'))
-    x = x_df.values.astype('float32')
-    x = x[np.newaxis, :, :]  # (1, lookback, feat)
+    # 체크포인트/패널 로드(메타에서 feature_cols/continuous_cols 확보)
+    try:
+        service = LSTMForecastService(DATA_DIR, CKPT, lookback=args.lookback, reuse_state=args.reuse_state,
+                                      runtime=args.runtime, num_threads=args.num_threads)
+    except (ValueError, FileNotFoundError, ImportError) as e:
+        raise SystemExit(str(e))
 
-    preds = []
-    last_known_date = window['date'].max()
-    # y_t 컬럼 인덱스(없다면 0으로 폴백)
-    y_idx = feature_cols.index('y_t') if 'y_t' in feature_cols else 0
-    for h in range(args.horizon):
-        yhat_scaled = model.predict(x, verbose=0).ravel()[0]
-        yhat = float(scaler.inverse_transform(yhat_scaled))
-        next_date = (last_known_date + pd.Timedelta(days=1)).date()
-        preds.append({'date': str(next_date), 'yhat': yhat})
+    # 배치 모드
+    if args.all:
+        return run_batch(service, service.select_pairs(), args)
+    if args.pairs_file:
+        pairs_df = read_table(args.pairs_file)
+        return run_batch(service, zip(pairs_df['shelter_id'], pairs_df['relief_item_id']), args)
+    if args.shelter_id and not args.relief_item_id:
+        return run_batch(service, service.select_pairs(args.shelter_id), args)
 
-        # 간단한 오토리그레시브 업데이트: y_t만 새 예측으로 대체
-        new_row = x[:, -1, :].copy()
-        # y_t 위치를 메타 기반 인덱스로 업데이트
-        new_row[0, y_idx] = yhat_scaled
-        x = np.concatenate([x[:, 1:, :], new_row[:, np.newaxis, :]], axis=1)
-        last_known_date = pd.Timestamp(next_date)
+    try:
+        # 대상 pair 자동 선택(미지정 시 가장 데이터가 많은 페어)
+        if not args.shelter_id or not args.relief_item_id:
+            args.shelter_id, args.relief_item_id = service.default_pair()
+        result = service.forecast(args.shelter_id, args.relief_item_id, horizon=args.horizon, alpha=DEFAULT_ALPHA)
+    except ValueError as e:
+        raise SystemExit(str(e))
 
-    # 권장 수량 예시: 예측 합계 * (1+alpha)
-    alpha = 0.2
-    recommended_quantity = int(np.ceil(sum(p['yhat'] for p in preds) * (1+alpha)))
     with open(OUT, 'w', encoding='utf-8') as f:
-        json.dump({'shelter_id': args.shelter_id, 'relief_item_id': args.relief_item_id, 'horizon': args.horizon, 'preds': preds, 'recommended_quantity': recommended_quantity}, f, ensure_ascii=False, indent=2)
+        json.dump(result, f, ensure_ascii=False, indent=2)
     print(f"Saved predictions to {OUT}")
 
 
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""LSTM 하이퍼파라미터 탐색(그리드/랜덤) — 프로세스 풀 병렬 실행
+입력: models/data/lstm_forecast 컴파일된 패널(train_lstm.py와 동일)
+출력: models/data/lstm_forecast/sweep/
+        trial_000/model.keras(+meta), ...
+        leaderboard.json  # 최저 val_loss 순
+      최고 trial은 lstm_forecast/model.keras/.npz(+meta), quick_stats.json으로 복사(--no_promote로 끔)
+
+- 워커 프로세스(spawn)마다 TensorFlow 스레드 수를 --threads_per_worker로 제한합니다
+  (기본: CPU 코어 / 워커 수).
+- 워커는 컴파일된 패널(memmap)을 한 번 열고 (lookback, batch_size)별 tf.data 데이터셋을
+  trial 간에 재사용합니다.
+- 가지치기(median pruning): --prune_warmup 에폭 이후, 완료된 trial이 --prune_min_trials개
+  이상이면 같은 에폭의 val_loss 중앙값보다 나쁜 trial을 중단합니다.
+- 각 trial은 val_loss가 가장 낮았던 에폭의 가중치로 저장합니다.
+- 서로 다른 lookback은 검증 윈도우 수가 조금 다르므로 val_loss 비교는 근사입니다.
+
+사용 예시:
+  python models/code/sweep_lstm.py --hidden 32,64 --layers 1,2 --dropout 0.0,0.1 --lookback 14,28 --workers 4
+  python models/code/sweep_lstm.py --search random --n_trials 12 --hidden 16,32,64,128 --epochs 20
+"""
+import os
+import json
+import time
+import random
+import shutil
+import argparse
+import itertools
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from lstm_utils import FEATURE_COLS_DEFAULT
+from train_lstm import OUT_DIR, CKPT, load_panel, select_features, checkpoint_meta, write_quick_stats
+
+SWEEP_DIR = os.path.join(OUT_DIR, 'sweep')
+# 탐색 축: CLI 이름 → 값 변환
+SPACE = {'hidden': int, 'layers': int, 'dropout': float, 'lookback': int, 'batch_size': int}
+
+# 워커 프로세스 상태(초기화 후 trial 간 재사용)
+_STORE = None
+_FEATURES = None
+_DATASETS = {}
+
+
+def _init_worker(data_dir: str, feature_cols_arg: str, threads: int):
+    global _STORE, _FEATURES
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(max(1, min(2, threads)))
+    _STORE = load_panel(data_dir)
+    _FEATURES = select_features(_STORE, feature_cols_arg)
+
+
+def _datasets(lookback: int, batch_size: int, seed: int):
+    from train_lstm import make_datasets
+    key = (lookback, batch_size)
+    if key not in _DATASETS:
+        _DATASETS[key] = make_datasets(_STORE, _FEATURES, lookback, batch_size, seed)
+    return _DATASETS[key]
+
+
+def _run_trial(trial_id: int, params: dict, epochs: int, seed: int, out_dir: str,
+               completed_curves: list, warmup: int, min_trials: int) -> dict:
+    """trial 하나 학습 → 요약 dict(상태, 에폭별 val_loss, 최저 val_loss, 체크포인트 경로)"""
+    from tensorflow import keras
+    from lstm_utils import build_lstm_model, save_checkpoint
+
+    class MedianPruner(keras.callbacks.Callback):
+        """완료된 trial의 같은 에폭 val_loss 중앙값보다 나쁘면 중단 + 최저 val_loss 가중치 보관"""
+
+        def __init__(self):
+            super().__init__()
+            self.curve, self.pruned = [], False
+            self.best, self.best_weights = float('inf'), None
+
+        def on_epoch_end(self, epoch, logs=None):
+            val = float((logs or {}).get('val_loss', np.inf))
+            self.curve.append(val)
+            if val < self.best:
+                self.best, self.best_weights = val, self.model.get_weights()
+            peers = [c[epoch] for c in completed_curves if len(c) > epoch]
+            if epoch + 1 >= warmup and len(peers) >= min_trials and val > float(np.median(peers)):
+                self.pruned = True
+                self.model.stop_training = True
+
+    t0 = time.perf_counter()
+    keras.utils.set_random_seed(seed + trial_id)
+    ds_tr, ds_va, scaler, n_tr, n_va = _datasets(params['lookback'], params['batch_size'], seed)
+    model = build_lstm_model(input_dim=len(_FEATURES), hidden=params['hidden'], layers_n=params['layers'],
+                             dropout=params['dropout'])
+    pruner = MedianPruner()
+    model.fit(ds_tr, validation_data=ds_va, epochs=epochs, shuffle=False, verbose=0, callbacks=[pruner])
+    if pruner.best_weights is not None:
+        model.set_weights(pruner.best_weights)
+    best = pruner.best if np.isfinite(pruner.best) else None
+    ckpt = os.path.join(out_dir, f'trial_{trial_id:03d}', 'model')
+    save_checkpoint(ckpt, model, scaler, meta=checkpoint_meta(
+        _FEATURES, params['lookback'], params['hidden'], params['layers'], params['dropout'], best))
+    return {
+        'trial': trial_id,
+        'params': params,
+        'status': 'pruned' if pruner.pruned else 'complete',
+        'epochs': len(pruner.curve),
+        'best_val_loss': best,
+        'val_curve': pruner.curve,
+        'train_windows': n_tr,
+        'val_windows': n_va,
+        'seconds': round(time.perf_counter() - t0, 2),
+        'checkpoint': ckpt + '.keras',
+    }
+
+
+def build_trials(args) -> list:
+    """탐색 공간(쉼표 구분 값 목록) → trial 파라미터 목록(grid: 전체 조합, random: n_trials개 표본)"""
+    axes = {k: [conv(v) for v in str(getattr(args, k)).split(',') if v != ''] for k, conv in SPACE.items()}
+    grid = [dict(zip(axes, combo)) for combo in itertools.product(*axes.values())]
+    if args.search == 'grid':
+        return grid
+    rng = random.Random(args.seed)
+    if args.n_trials <= len(grid):
+        return rng.sample(grid, args.n_trials)
+    return [rng.choice(grid) for _ in range(args.n_trials)]
+
+
+def promote(best: dict, store, feature_cols: list):
+    """최고 trial 체크포인트를 기본 모델 경로(model.keras/.npz/.tflite + meta)로 복사하고 quick_stats 갱신"""
+    src = best['checkpoint']
+    dst = CKPT + '.keras'
+    shutil.copy2(src, dst)
+    shutil.copy2(src + '.meta.json', dst + '.meta.json')
+    # 내보낸 런타임 모델(model.npz / model.tflite)도 함께 교체. 없으면 이전 파일이 새 model.keras와 어긋나므로 삭제
+    for ext in ['.npz', '.tflite']:
+        src_export = src[:-len('.keras')] + ext
+        for suffix in ['', '.meta.json']:
+            if os.path.exists(src_export + suffix):
+                shutil.copy2(src_export + suffix, CKPT + ext + suffix)
+            elif os.path.exists(CKPT + ext + suffix):
+                os.remove(CKPT + ext + suffix)
+    write_quick_stats(store, best['best_val_loss'], best['params']['lookback'], feature_cols,
+                      sweep_trial=best['trial'], params=best['params'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LSTM 하이퍼파라미터 탐색(프로세스 풀)')
+    parser.add_argument('--search', type=str, default='grid', choices=['grid', 'random'])
+    parser.add_argument('--n_trials', type=int, default=8, help='random 탐색 trial 수')
+    parser.add_argument('--hidden', type=str, default='32,64')
+    parser.add_argument('--layers', type=str, default='1,2')
+    parser.add_argument('--dropout', type=str, default='0.1')
+    parser.add_argument('--lookback', type=str, default='28')
+    parser.add_argument('--batch_size', type=str, default='256')
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--feature_cols', type=str, default=','.join(FEATURE_COLS_DEFAULT))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=max(1, min(4, (os.cpu_count() or 1) // 2)))
+    parser.add_argument('--threads_per_worker', type=int, default=None,
+                        help='워커별 TensorFlow 스레드 수(기본: CPU 코어 / 워커 수)')
+    parser.add_argument('--prune_warmup', type=int, default=3, help='가지치기를 시작할 에폭')
+    parser.add_argument('--prune_min_trials', type=int, default=3, help='가지치기 비교에 필요한 완료 trial 수')
+    parser.add_argument('--out_dir', type=str, default=SWEEP_DIR)
+    parser.add_argument('--no_promote', action='store_true', help='최고 trial을 기본 모델 경로로 복사하지 않음')
+    args = parser.parse_args()
+
+    trials = build_trials(args)
+    if not trials:
+        raise SystemExit('탐색할 trial이 없습니다.')
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // args.workers)
+    os.makedirs(args.out_dir, exist_ok=True)
+    print(f'🔎 LSTM sweep: trial {len(trials)}개, 워커 {args.workers}개 × TF 스레드 {threads}')
+
+    # 데이터가 충분한지(피처/윈도우) 부모에서 먼저 확인
+    store = load_panel()
+    feature_cols = select_features(store, args.feature_cols)
+
+    results, completed_curves = [], []
+    pending = list(enumerate(trials))
+    ctx = mp.get_context('spawn')  # fork는 TensorFlow 런타임과 충돌
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=ctx, initializer=_init_worker,
+                             initargs=(OUT_DIR, args.feature_cols, threads)) as pool:
+        running = {}
+        while pending or running:
+            # 완료 trial 곡선이 늘어날수록 가지치기 기준이 갱신되도록 워커 수만큼만 제출
+            while pending and len(running) < args.workers:
+                tid, params = pending.pop(0)
+                fut = pool.submit(_run_trial, tid, params, args.epochs, args.seed, args.out_dir,
+                                  list(completed_curves), args.prune_warmup, args.prune_min_trials)
+                running[fut] = (tid, params)
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                tid, params = running.pop(fut)
+                try:
+                    r = fut.result()
+                except Exception as e:
+                    r = {'trial': tid, 'params': params, 'status': 'failed', 'error': str(e), 'best_val_loss': None}
+                if r['status'] == 'complete':
+                    completed_curves.append(r['val_curve'])
+                results.append(r)
+                print(f"  trial {tid:03d} {r['status']:8s} val_loss={r['best_val_loss']} {params}")
+
+    ranked = sorted(results, key=lambda r: (r['best_val_loss'] is None, r['best_val_loss'] or 0.0))
+    for rank, r in enumerate(ranked, 1):
+        r['rank'] = rank
+    with open(os.path.join(args.out_dir, 'leaderboard.json'), 'w', encoding='utf-8') as f:
+        json.dump(ranked, f, ensure_ascii=False, indent=2)
+
+    best = ranked[0]
+    if best['best_val_loss'] is None:
+        raise SystemExit('성공한 trial이 없습니다. leaderboard.json의 error를 확인하세요.')
+    print(f"🏆 best trial {best['trial']:03d}: val_loss={best['best_val_loss']:.5f} {best['params']}")
+    if not args.no_promote:
+        promote(best, store, feature_cols)
+        print(f'✅ 최고 모델을 {CKPT}.keras로 복사했습니다.')
+
+
+if __name__ == '__main__':
+    main()
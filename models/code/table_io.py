@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""테이블 저장/로드 유틸리티 (Parquet 기본, CSV 내보내기 선택)
+
+생성기(tools) → 데이터셋 빌더(models/data) → 학습/예측(models/code)이 같은 규칙으로
+테이블을 읽고 씁니다.
+
+- 기본 형식은 Parquet(pyarrow, zstd 압축)이며 CSV(UTF-8-sig)는 내보내기 옵션입니다.
+- ID 컬럼(`*_id`)과 값 종류가 적은 텍스트 컬럼(CATEGORY_COLUMNS: status/category/urgency_level 등)은
+  dictionary 인코딩(pandas category)으로 저장/로드합니다. 테이블 간 ID 사전 맞추기는 id_codec 참고.
+- 데이터셋 폴더의 schema.json `dtypes`가 있으면 로드 시 그 타입으로 맞춥니다
+  (CSV로 읽어도 Parquet과 같은 타입을 얻기 위함).
+- read_table은 같은 이름의 .parquet → .csv → .ndjson → .json 순으로 존재하는 파일을 읽습니다.
+
+사용 예시:
+  df = read_dataset(os.path.join(DATA_ROOT, 'recs01_matching'))
+  write_dataset(df, out_dir, schema, export_csv=True)
+"""
+import json
+import os
+
+import pandas as pd
+
+DEFAULT_FORMAT = 'parquet'
+# 읽기 우선순위(같은 이름의 파일이 여러 형식으로 있으면 앞쪽 우선)
+READ_ORDER = ['.parquet', '.csv', '.ndjson', '.json']
+CSV_ENCODING = 'utf-8-sig'
+# 값 종류가 적은(수~수십 개) 텍스트 컬럼 → category
+CATEGORY_COLUMNS = {
+    'status', 'category', 'subcategory', 'unit', 'user_type', 'urgency_level', 'disaster_type',
+    'seasonality', 'disaster_severity', 'weather_conditions', 'adequacy_level', 'delivery_company',
+}
+
+
+def is_id_column(name: str) -> bool:
+    return name.endswith('_id')
+
+
+def is_category_column(name: str) -> bool:
+    return is_id_column(name) or name in CATEGORY_COLUMNS
+
+
+def infer_dtypes(df: pd.DataFrame) -> dict:
+    """schema.json에 기록할 컬럼 타입(ID/CATEGORY_COLUMNS는 category)"""
+    dtypes = {}
+    for c in df.columns:
+        if is_category_column(c):
+            dtypes[c] = 'category'
+        elif pd.api.types.is_bool_dtype(df[c]):
+            dtypes[c] = 'bool'
+        elif pd.api.types.is_integer_dtype(df[c]):
+            dtypes[c] = 'int64'
+        elif pd.api.types.is_float_dtype(df[c]):
+            dtypes[c] = 'float64'
+        else:
+            dtypes[c] = 'string'
+    return dtypes
+
+
+def apply_dtypes(df: pd.DataFrame, dtypes: dict | None = None) -> pd.DataFrame:
+    """dtypes(컬럼 → 타입)에 맞춰 변환. dtypes가 없으면 ID/CATEGORY_COLUMNS만 category로 변환
+
+    'string'은 문자열 컬럼을 그대로 두고(날짜 문자열 등), 결측이 있는 정수 컬럼은 float로 둡니다.
+    """
+    if dtypes is None:
+        dtypes = {c: 'category' for c in df.columns if is_category_column(c)}
+    for c, t in dtypes.items():
+        if c not in df.columns or t == 'string' or str(df[c].dtype) == t:
+            continue
+        if t.startswith('int') and df[c].isna().any():
+            continue
+        df[c] = df[c].astype(t)
+    return df
+
+
+def load_schema(data_dir: str) -> dict:
+    path = os.path.join(data_dir, 'schema.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_schema(schema: dict, data_dir: str):
+    os.makedirs(data_dir, exist_ok=True)
+    with open(os.path.join(data_dir, 'schema.json'), 'w', encoding='utf-8') as f:
+        json.dump(schema, f, ensure_ascii=False, indent=2)
+
+
+def find_table(base_path: str, formats=None):
+    """확장자 없는 경로(base_path)에 대해 존재하는 파일 경로(없으면 None)"""
+    ext = os.path.splitext(base_path)[1]
+    if ext in READ_ORDER:
+        return base_path if os.path.exists(base_path) else None
+    for e in formats or READ_ORDER:
+        if os.path.exists(base_path + e):
+            return base_path + e
+    return None
+
+
+def read_table(path: str, dtypes: dict | None = None, columns=None) -> pd.DataFrame:
+    """.parquet/.csv/.ndjson/.json 테이블 로드 후 dtypes 적용(ID/CATEGORY_COLUMNS는 category)"""
+    found = find_table(path)
+    if found is None:
+        raise FileNotFoundError(f'테이블을 찾을 수 없습니다: {path}(.parquet/.csv/.ndjson/.json)')
+    ext = os.path.splitext(found)[1]
+    if ext == '.parquet':
+        df = pd.read_parquet(found, columns=columns)
+    elif ext == '.csv':
+        df = pd.read_csv(found, encoding=CSV_ENCODING, usecols=columns)
+    else:
+        df = pd.read_json(found, lines=(ext == '.ndjson'), dtype=False)
+        if columns is not None:
+            df = df[columns]
+    return apply_dtypes(df, dtypes)
+
+
+def write_table(df: pd.DataFrame, path: str, fmt: str = DEFAULT_FORMAT, dtypes: dict | None = None) -> str:
+    """확장자 없는 경로에 fmt 형식으로 저장하고 실제 파일 경로를 반환"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if fmt == 'parquet':
+        out = path + '.parquet'
+        df = apply_dtypes(df.copy(), dtypes)
+        # 문자열/숫자가 섞인 object 컬럼(예: fillna(0)된 문자열 컬럼)은 CSV와 같게 문자열로 저장
+        for c in df.columns[df.dtypes == object]:
+            if pd.api.types.infer_dtype(df[c], skipna=True).startswith('mixed'):
+                df[c] = df[c].astype(str)
+        df.to_parquet(out, index=False, compression='zstd')
+    elif fmt == 'csv':
+        out = path + '.csv'
+        df.to_csv(out, index=False, encoding=CSV_ENCODING)
+    else:
+        raise ValueError(f'지원하지 않는 저장 형식: {fmt} (parquet/csv)')
+    return out
+
+
+def read_dataset(data_dir: str, name: str = 'train', columns=None) -> pd.DataFrame:
+    """데이터셋 폴더의 name 테이블을 schema.json dtypes에 맞춰 로드"""
+    dtypes = load_schema(data_dir).get('dtypes')
+    return read_table(os.path.join(data_dir, name), dtypes=dtypes, columns=columns)
+
+
+def dataset_path(data_dir: str, name: str = 'train') -> str | None:
+    return find_table(os.path.join(data_dir, name))
+
+
+def write_dataset(df: pd.DataFrame, data_dir: str, schema: dict, name: str = 'train',
+                  fmt: str = DEFAULT_FORMAT, export_csv: bool = False) -> dict:
+    """데이터셋 저장 + schema.json(dtypes 포함) 기록
+
+    다른 형식의 같은 이름 파일은 지워 오래된 산출물이 먼저 읽히지 않도록 합니다.
+    """
+    dtypes = infer_dtypes(df)
+    formats = [fmt] + (['csv'] if export_csv and fmt != 'csv' else [])
+    base = os.path.join(data_dir, name)
+    written = [write_table(df, base, f, dtypes) for f in formats]
+    for ext in READ_ORDER:
+        if base + ext not in written and os.path.exists(base + ext):
+            os.remove(base + ext)
+    schema = dict(schema, dtypes=dtypes)
+    save_schema(schema, data_dir)
+    return schema
@@ -1,44 +1,59 @@
 #!/usr/bin/env python3
 """LSTM 수량 예측 학습 스크립트 (Keras)
-입력: models/data/lstm_forecast/train.csv
+입력: models/data/lstm_forecast/panel_*.npy(컴파일된 패널, 없거나 오래되면 train.parquet/train.csv)
 출력: models/data/lstm_forecast/model.keras(+meta), quick_stats.json
+
+윈도우는 미리 쌓지 않고 tf.data 파이프라인(lstm_utils.window_dataset)으로 배치마다 만듭니다.
+컴파일된 패널은 memmap으로 열고, 스케일링은 배치마다 학습 split에서 fit한 스케일러로 합니다.
+
+이어 학습/조기 종료:
+- --ckpt_every 에폭마다 lstm_forecast/train_state/에 모델(옵티마이저 상태 포함, last.keras)과
+  state.json(완료 에폭, 최고 val_loss, 조기 종료/학습률 대기 카운터, 설정, 스케일러)을 저장합니다.
+- 중단(Ctrl+C 등) 후 --resume으로 마지막 저장 에폭부터 이어서 학습합니다(설정/스케일러가 같아야 함).
+  최고 가중치는 train_state/best-e<에폭>.weights.h5로 두고, state.json의 best_epoch가 가리키는 파일만 씁니다.
+- --patience 에폭 동안 val_loss가 개선되지 않으면 중단하고, 최종 모델은 최저 val_loss 에폭의
+  가중치로 저장합니다(--no_restore_best로 마지막 가중치).
+- --lr_schedule plateau(개선 없으면 학습률 × --lr_factor) / cosine / none
 """
 import os
 import json
+import math
 import argparse
-import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
+from tensorflow import keras
 
-from lstm_utils import window_sequences, build_lstm_model, save_checkpoint, FEATURE_COLS_DEFAULT, CATEGORICAL_PREFIXES
+from lstm_utils import (segment_window_starts, window_dataset, build_lstm_model, save_checkpoint, StandardScaler1D,
+                        FEATURE_COLS_DEFAULT, CATEGORICAL_PREFIXES, TARGET_COL)
+from panel_store import CompiledPanel
+from table_io import read_dataset
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-DATA = os.path.join(ROOT, 'data', 'lstm_forecast', 'train.csv')
 OUT_DIR = os.path.join(ROOT, 'data', 'lstm_forecast')
 CKPT = os.path.join(OUT_DIR, 'model')
 STATS = os.path.join(OUT_DIR, 'quick_stats.json')
+STATE_DIR = os.path.join(OUT_DIR, 'train_state')
+LAST_MODEL = 'last.keras'
+# 최고 가중치는 에폭 번호를 이름에 넣어 저장하고, state.json의 best_epoch가 가리키는 파일만 유효
+BEST_WEIGHTS = 'best-e{epoch}.weights.h5'
+STATE_FILE = 'state.json'
 
 
-def main():
-    parser = argparse.ArgumentParser(description='LSTM 수량 예측 학습 (Keras)')
-    parser.add_argument('--lookback', type=int, default=28)
-    parser.add_argument('--batch_size', type=int, default=256)
-    parser.add_argument('--epochs', type=int, default=10)
-    parser.add_argument('--hidden', type=int, default=64)
-    parser.add_argument('--layers', type=int, default=2)
-    parser.add_argument('--dropout', type=float, default=0.1)
-    parser.add_argument('--feature_cols', type=str, default=','.join(FEATURE_COLS_DEFAULT))
-    args = parser.parse_args()
+def load_panel(data_dir: str = OUT_DIR) -> CompiledPanel:
+    """컴파일된 패널(memmap), 없거나 오래되면 train 파일에서 메모리로"""
+    store = CompiledPanel.open(data_dir) or CompiledPanel.from_frame(read_dataset(data_dir))
+    if store.rows == 0:
+        raise SystemExit('lstm_forecast 학습 데이터가 비어있습니다.')
+    return store
 
-    df = pd.read_csv(DATA, encoding='utf-8-sig')
-    if df.empty:
-        raise SystemExit('lstm_forecast/train.csv 이 비어있습니다.')
 
-    feature_cols = [c for c in args.feature_cols.split(',') if c in df.columns]
+def select_features(store: CompiledPanel, feature_cols_arg: str) -> list:
+    """--feature_cols 중 패널에 있는 컬럼 + 범주 접두어(seasonality_ 등) 컬럼 자동 포함"""
+    feature_cols = [c for c in feature_cols_arg.split(',') if c in store.columns]
     if not feature_cols:
         feature_cols = FEATURE_COLS_DEFAULT
     # 자동 포함: seasonality_/disaster_severity_/weather_ 접두어 컬럼
-    auto_cat = [c for c in df.columns if any(c.startswith(p) for p in CATEGORICAL_PREFIXES)]
+    auto_cat = [c for c in store.columns if any(c.startswith(p) for p in CATEGORICAL_PREFIXES)]
     # 중복 제거, 순서 유지
     seen = set()
     all_features = []
@@ -46,53 +61,244 @@ def main():
         if c not in seen:
             all_features.append(c)
             seen.add(c)
-    feature_cols = all_features
+    missing = [c for c, i in zip(all_features, store.column_index(all_features)) if i < 0]
+    if missing:
+        raise SystemExit(f'패널에 없는 피처 컬럼: {missing}')
+    return all_features
+
 
-    # pair 기준 스플릿
-    pairs = df[['shelter_id','relief_item_id']].drop_duplicates()
-    train_pairs, val_pairs = train_test_split(pairs, test_size=0.2, random_state=42)
-    df_train = df.merge(train_pairs, on=['shelter_id','relief_item_id'])
-    df_val = df.merge(val_pairs, on=['shelter_id','relief_item_id'])
+def split_pairs(store: CompiledPanel, test_size: float = 0.2, random_state: int = 42):
+    """pair 기준 스플릿(pair 하나 = 패널의 연속 구간) → (train_pairs, val_pairs)"""
+    return train_test_split(store.index, test_size=test_size, random_state=random_state)
 
-    X_tr, y_tr, scaler_tr = window_sequences(df_train, lookback=args.lookback, feature_cols=feature_cols)
-    X_va, y_va, _ = window_sequences(df_val, lookback=args.lookback, feature_cols=feature_cols)
 
-    if len(X_tr) == 0 or len(X_va) == 0:
+def make_datasets(store: CompiledPanel, feature_cols: list, lookback: int, batch_size: int, seed: int = 42,
+                  split=None):
+    """(학습 tf.data, 검증 tf.data, scaler, 학습 윈도우 수, 검증 윈도우 수)
+
+    패널은 원시 값이므로 연속형 열과 타깃은 배치마다 스케일합니다. 스케일러는 학습 pair의
+    타깃 값으로만 fit합니다(검증 통계가 정규화에 섞이지 않도록).
+    """
+    train_pairs, val_pairs = split if split is not None else split_pairs(store)
+    s_tr = segment_window_starts(train_pairs['offset'], train_pairs['length'], lookback)
+    s_va = segment_window_starts(val_pairs['offset'], val_pairs['length'], lookback)
+    if len(s_tr) == 0 or len(s_va) == 0:
         raise SystemExit('학습/검증 시퀀스가 부족합니다. 데이터 수를 늘리거나 lookback을 줄여보세요.')
 
-    model = build_lstm_model(input_dim=X_tr.shape[-1], hidden=args.hidden, layers_n=args.layers, dropout=args.dropout)
+    targets = store.values[:, store.column_index([TARGET_COL])[0]]
+    scaler = StandardScaler1D().fit(np.concatenate(
+        [targets[o:o + n] for o, n in zip(train_pairs['offset'], train_pairs['length'])]).astype('float64'))
+    data = dict(columns=store.column_index(feature_cols), scaler=scaler,
+                scaled=np.isin(feature_cols, FEATURE_COLS_DEFAULT), batch_size=batch_size)
+    ds_tr = window_dataset(store.values, targets, s_tr, lookback, shuffle=True, seed=seed, **data)
+    ds_va = window_dataset(store.values, targets, s_va, lookback, shuffle=False, **data)
+    return ds_tr, ds_va, scaler, len(s_tr), len(s_va)
 
-    os.makedirs(OUT_DIR, exist_ok=True)
-    history = model.fit(
-        X_tr, y_tr,
-        validation_data=(X_va, y_va),
-        epochs=args.epochs,
-        batch_size=args.batch_size,
-        verbose=1
-    )
-
-    # 최종 모델 저장(+스케일러/메타)
-    val_loss = float(history.history['val_loss'][-1]) if 'val_loss' in history.history else None
-    save_checkpoint(CKPT, model, scaler_tr, meta={
+
+def checkpoint_meta(feature_cols: list, lookback: int, hidden: int, layers_n: int, dropout: float,
+                    val_loss: float | None) -> dict:
+    return {
         'feature_cols': feature_cols,
         'continuous_cols': [c for c in feature_cols if c in FEATURE_COLS_DEFAULT],
-        'lookback': args.lookback,
-        'hidden': args.hidden,
-        'layers': args.layers,
-        'dropout': args.dropout,
+        'lookback': lookback,
+        'hidden': hidden,
+        'layers': layers_n,
+        'dropout': dropout,
         'val_loss': val_loss
-    })
+    }
+
 
+def write_quick_stats(store: CompiledPanel, val_loss: float | None, lookback: int, feature_cols: list, **extra):
     info = {
-        'rows': int(len(df)),
-        'pairs': int(pairs.shape[0]),
+        'rows': int(store.rows),
+        'pairs': int(len(store.index)),
         'val_mse': val_loss,
-        'lookback': args.lookback,
-        'features': feature_cols
+        'lookback': lookback,
+        'features': feature_cols,
+        **extra
     }
     with open(STATS, 'w', encoding='utf-8') as f:
         json.dump(info, f, ensure_ascii=False, indent=2)
     print('LSTM train quick stats:', info)
+    return info
+
+
+def load_state(state_dir: str = STATE_DIR) -> dict | None:
+    path = os.path.join(state_dir, STATE_FILE)
+    if not (os.path.exists(path) and os.path.exists(os.path.join(state_dir, LAST_MODEL))):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class TrainingControl(keras.callbacks.Callback):
+    """에폭마다 이어 학습 상태 저장 + val_loss 조기 종료/최고 가중치 보관 + plateau 학습률 감소"""
+
+    def __init__(self, state_dir: str, config: dict, epochs: int, patience: int, ckpt_every: int = 1,
+                 lr_schedule: str = 'plateau', lr_patience: int = 2, lr_factor: float = 0.5, min_lr: float = 1e-5,
+                 state: dict | None = None):
+        super().__init__()
+        self.state_dir, self.config, self.epochs = state_dir, config, epochs
+        self.patience, self.ckpt_every = patience, max(1, ckpt_every)
+        self.lr_schedule, self.lr_patience, self.lr_factor, self.min_lr = lr_schedule, lr_patience, lr_factor, min_lr
+        state = state or {}
+        self.best = state.get('best_val_loss') if state.get('best_val_loss') is not None else math.inf
+        self.best_epoch = state.get('best_epoch')
+        self.wait = state.get('wait', 0)
+        self.lr_wait = state.get('lr_wait', 0)
+        self.history = list(state.get('val_history', []))
+        self.stopped_early = bool(state.get('stopped_early', False))
+        self.epoch = self.saved_epoch = state.get('epoch', 0)
+        os.makedirs(state_dir, exist_ok=True)
+
+    @property
+    def best_weights_path(self) -> str | None:
+        if self.best_epoch is None:
+            return None
+        return os.path.join(self.state_dir, BEST_WEIGHTS.format(epoch=self.best_epoch))
+
+    def on_epoch_end(self, epoch, logs=None):
+        val = (logs or {}).get('val_loss')
+        self.epoch = epoch + 1
+        if val is not None:
+            val = float(val)
+            self.history.append(val)
+            if val < self.best:
+                self.best, self.best_epoch, self.wait, self.lr_wait = val, epoch + 1, 0, 0
+                # state.json은 ckpt_every마다 저장되므로 에폭별 파일로 기록(저장된 state와 어긋난 파일은 쓰지 않음)
+                self.model.save_weights(self.best_weights_path)
+            else:
+                self.wait += 1
+                self.lr_wait += 1
+        if self.lr_schedule == 'plateau' and self.lr_wait >= self.lr_patience:
+            lr = float(self.model.optimizer.learning_rate.numpy())
+            new_lr = max(self.min_lr, lr * self.lr_factor)
+            if new_lr < lr:
+                self.model.optimizer.learning_rate.assign(new_lr)
+                print(f'\n📉 epoch {epoch + 1}: learning rate {lr:.2e} → {new_lr:.2e}')
+            self.lr_wait = 0
+        if self.patience and self.wait >= self.patience:
+            print(f'\n⏹️ epoch {epoch + 1}: val_loss가 {self.patience} 에폭 동안 개선되지 않아 조기 종료')
+            self.stopped_early = True
+            self.model.stop_training = True
+        if self.epoch % self.ckpt_every == 0 or self.model.stop_training or self.epoch >= self.epochs:
+            self.save()
+
+    def save(self):
+        """모델(옵티마이저 상태 포함) → state.json 순으로 원자적 저장"""
+        model_path = os.path.join(self.state_dir, LAST_MODEL)
+        tmp = os.path.join(self.state_dir, 'last.tmp.keras')
+        self.model.save(tmp)
+        os.replace(tmp, model_path)
+        state = {'epoch': self.epoch, 'best_val_loss': None if math.isinf(self.best) else self.best,
+                 'best_epoch': self.best_epoch, 'wait': self.wait, 'lr_wait': self.lr_wait,
+                 'learning_rate': float(self.model.optimizer.learning_rate.numpy()),
+                 'stopped_early': self.stopped_early, 'val_history': self.history, 'config': self.config}
+        path = os.path.join(self.state_dir, STATE_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(path + '.tmp', path)
+        self.saved_epoch = self.epoch
+        # state.json이 가리키지 않는 최고 가중치(중단된 실행의 이후 에폭 등) 정리
+        keep = os.path.basename(self.best_weights_path or '')
+        for name in os.listdir(self.state_dir):
+            if _is_best_weights(name) and name != keep:
+                os.remove(os.path.join(self.state_dir, name))
+
+
+def _is_best_weights(name: str) -> bool:
+    prefix, suffix = BEST_WEIGHTS.split('{epoch}')
+    return name.startswith(prefix) and name.endswith(suffix)
+
+
+def cosine_schedule(lr: float, epochs: int, min_lr: float):
+    """에폭 번호만으로 정해지는 코사인 감쇠(이어 학습 시 initial_epoch부터 그대로 이어짐)"""
+    return lambda epoch, _lr=None: min_lr + 0.5 * (lr - min_lr) * (1 + math.cos(math.pi * epoch / max(1, epochs)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LSTM 수량 예측 학습 (Keras)')
+    parser.add_argument('--lookback', type=int, default=28)
+    parser.add_argument('--batch_size', type=int, default=256)
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--hidden', type=int, default=64)
+    parser.add_argument('--layers', type=int, default=2)
+    parser.add_argument('--dropout', type=float, default=0.1)
+    parser.add_argument('--feature_cols', type=str, default=','.join(FEATURE_COLS_DEFAULT))
+    parser.add_argument('--seed', type=int, default=42, help='학습 윈도우 셔플 시드')
+    parser.add_argument('--lr', type=float, default=1e-3, help='초기 학습률')
+    parser.add_argument('--lr_schedule', type=str, default='plateau', choices=['plateau', 'cosine', 'none'])
+    parser.add_argument('--lr_patience', type=int, default=2, help='plateau: 개선 없는 에폭 수 → 학습률 감소')
+    parser.add_argument('--lr_factor', type=float, default=0.5, help='plateau: 학습률 감소 배율')
+    parser.add_argument('--min_lr', type=float, default=1e-5)
+    parser.add_argument('--patience', type=int, default=5, help='조기 종료 대기 에폭(0이면 끔)')
+    parser.add_argument('--no_restore_best', action='store_true', help='최저 val_loss 대신 마지막 가중치로 저장')
+    parser.add_argument('--ckpt_every', type=int, default=1, help='이어 학습 상태 저장 주기(에폭)')
+    parser.add_argument('--resume', action='store_true', help='train_state/의 마지막 저장 에폭부터 이어서 학습')
+    args = parser.parse_args()
+
+    store = load_panel()
+    feature_cols = select_features(store, args.feature_cols)
+    ds_tr, ds_va, scaler_tr, n_tr, n_va = make_datasets(store, feature_cols, args.lookback, args.batch_size, args.seed)
+    print(f'windows: train={n_tr:,}, val={n_va:,} (panel rows {store.rows:,})')
+
+    # 이어 학습 시 같아야 하는 설정(다르면 저장된 옵티마이저/가중치를 쓸 수 없음)
+    config = {'feature_cols': feature_cols, 'lookback': args.lookback, 'hidden': args.hidden,
+              'layers': args.layers, 'dropout': args.dropout, 'scaler': scaler_tr.to_dict()}
+    state = load_state() if args.resume else None
+    if args.resume and state is None:
+        print('⚠️ 이어 학습할 상태가 없어 처음부터 학습합니다.')
+    if state is not None and state.get('config') != config:
+        raise SystemExit('저장된 학습 상태와 설정(피처/lookback/모델 크기/스케일러)이 다릅니다. --resume 없이 다시 학습하세요.')
+
+    if state is not None:
+        model = keras.models.load_model(os.path.join(STATE_DIR, LAST_MODEL))
+        initial_epoch = int(state['epoch'])
+        print(f"▶️ epoch {initial_epoch}부터 이어서 학습 (best val_loss={state.get('best_val_loss')})")
+    else:
+        model = build_lstm_model(input_dim=len(feature_cols), hidden=args.hidden, layers_n=args.layers,
+                                 dropout=args.dropout, learning_rate=args.lr)
+        initial_epoch = 0
+        # 이전 학습의 최고 가중치가 섞이지 않도록 정리
+        if os.path.isdir(STATE_DIR):
+            for name in os.listdir(STATE_DIR):
+                if name in (STATE_FILE, LAST_MODEL) or _is_best_weights(name):
+                    os.remove(os.path.join(STATE_DIR, name))
+
+    control = TrainingControl(STATE_DIR, config, args.epochs, args.patience, args.ckpt_every,
+                              lr_schedule=args.lr_schedule, lr_patience=args.lr_patience, lr_factor=args.lr_factor,
+                              min_lr=args.min_lr, state=state)
+    callbacks = [control]
+    if args.lr_schedule == 'cosine':
+        callbacks.append(keras.callbacks.LearningRateScheduler(cosine_schedule(args.lr, args.epochs, args.min_lr)))
+
+    os.makedirs(OUT_DIR, exist_ok=True)
+    if initial_epoch < args.epochs and not control.stopped_early:
+        try:
+            model.fit(
+                ds_tr,
+                validation_data=ds_va,
+                epochs=args.epochs,
+                initial_epoch=initial_epoch,
+                shuffle=False,  # 셔플은 ds_tr에서 처리
+                callbacks=callbacks,
+                verbose=1
+            )
+        except KeyboardInterrupt:
+            raise SystemExit(f'⏸️ 학습 중단: epoch {control.saved_epoch}까지 저장됨 — --resume으로 이어서 학습하세요.')
+    else:
+        print('이미 학습이 끝난 상태입니다(에폭 수를 늘리면 이어서 학습합니다).')
+
+    # 최종 모델 저장(+스케일러/메타): 기본은 최저 val_loss 에폭의 가중치
+    if not args.no_restore_best and control.best_weights_path and os.path.exists(control.best_weights_path):
+        model.load_weights(control.best_weights_path)
+        val_loss = None if math.isinf(control.best) else control.best
+    else:
+        val_loss = control.history[-1] if control.history else None
+    save_checkpoint(CKPT, model, scaler_tr,
+                    meta=checkpoint_meta(feature_cols, args.lookback, args.hidden, args.layers, args.dropout, val_loss))
+    write_quick_stats(store, val_loss, args.lookback, feature_cols, epochs_trained=control.epoch,
+                      best_epoch=control.best_epoch, stopped_early=control.stopped_early)
 
 if __name__ == '__main__':
     main()
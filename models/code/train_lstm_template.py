@@ -1,18 +1,20 @@
 #!/usr/bin/env python3
 """LSTM 수량 예측 템플릿(간단) - 학습 스크립트
-입력: models/data/lstm_forecast/train.csv
+입력: models/data/lstm_forecast/train.parquet(없으면 train.csv)
 출력: models/data/lstm_forecast/quick_stats.json (간단 지표)
 """
 import os, json
 import pandas as pd
 
+from table_io import read_dataset
+
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-DATA = os.path.join(ROOT, 'data', 'lstm_forecast', 'train.csv')
+DATA_DIR = os.path.join(ROOT, 'data', 'lstm_forecast')
 OUT = os.path.join(ROOT, 'data', 'lstm_forecast', 'quick_stats.json')
 
 
 def main():
-    df = pd.read_csv(DATA, encoding='utf-8-sig')
+    df = read_dataset(DATA_DIR)
     info = {
         'rows': int(len(df)),
         'pairs': int(df[['shelter_id','relief_item_id']].drop_duplicates().shape[0]) if {'shelter_id','relief_item_id'}.issubset(df.columns) else 0,
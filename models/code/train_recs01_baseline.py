@@ -1,59 +1,28 @@
 #!/usr/bin/env python3
-"""RECS01 매칭 베이스라인: 간단 GBDT(Classifier)
-입력: models/data/recs01_matching/train.csv
-출력: models/data/recs01_matching/model_metrics.json
+"""RECS01 매칭 베이스라인: GBDT(Classifier, 기본 HistGradientBoosting)
+입력: models/data/recs01_matching/train.parquet(없으면 train.csv)
+출력: models/data/recs01_matching/model_metrics.json(학습 시간, rows/sec 포함)
+학습/평가 공통 로직과 옵션(--backend, --n_jobs, --early_stopping)은 gbdt_baseline.py에 있습니다.
 """
-import os, json
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import roc_auc_score, average_precision_score
-from sklearn.ensemble import GradientBoostingClassifier
+import os
+import argparse
+
+from gbdt_baseline import add_gbdt_args, train_and_evaluate
+from table_io import read_dataset
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-DATA = os.path.join(ROOT, 'data', 'recs01_matching', 'train.csv')
+DATA_DIR = os.path.join(ROOT, 'data', 'recs01_matching')
 OUT = os.path.join(ROOT, 'data', 'recs01_matching', 'model_metrics.json')
 
 
 def main():
-    df = pd.read_csv(DATA, encoding='utf-8-sig')
-    y = df['label']
-    feature_cols = [c for c in ['requested_quantity','current_stock','wish_remaining_quantity','remaining_need','urgency_score','need_ratio','distance_km'] if c in df.columns]
-    X = df[feature_cols].fillna(0)
-    classes = y.unique()
-    if len(classes) < 2:
-        metrics = {
-            'note': 'single-class labels; skipped ROC/PR',
-            'positive_rate': float(y.mean()),
-            'features': feature_cols,
-            'samples': int(len(df))
-        }
-        os.makedirs(os.path.dirname(OUT), exist_ok=True)
-        with open(OUT, 'w', encoding='utf-8') as f:
-            json.dump(metrics, f, ensure_ascii=False, indent=2)
-        print('RECS01 baseline metrics:', metrics)
-        return
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    parser = argparse.ArgumentParser(description='RECS01 GBDT 베이스라인')
+    add_gbdt_args(parser)
+    args = parser.parse_args()
 
-    clf = GradientBoostingClassifier(random_state=42)
-    clf.fit(X_train, y_train)
-    proba = clf.predict_proba(X_test)[:,1]
-
-    metrics = {}
-    try:
-        metrics['roc_auc'] = float(roc_auc_score(y_test, proba))
-    except Exception as e:
-        metrics['roc_auc'] = None
-        metrics['roc_auc_error'] = str(e)
-    try:
-        metrics['pr_auc'] = float(average_precision_score(y_test, proba))
-    except Exception as e:
-        metrics['pr_auc'] = None
-        metrics['pr_auc_error'] = str(e)
-    metrics['features'] = feature_cols
-    metrics['samples'] = int(len(df))
-    with open(OUT, 'w', encoding='utf-8') as f:
-        json.dump(metrics, f, ensure_ascii=False, indent=2)
-    print('RECS01 baseline metrics:', metrics)
+    df = read_dataset(DATA_DIR)
+    feature_cols = [c for c in ['requested_quantity','current_stock','wish_remaining_quantity','remaining_need','urgency_score','need_ratio','distance_km'] if c in df.columns]
+    train_and_evaluate('RECS01', df, feature_cols, OUT, args)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""데이터셋 증분 빌드 캐시
+
+build_datasets.py가 매 실행마다 원천 테이블을 모두 읽고 RECS01/RECS00/LSTM을 처음부터 다시
+만드는 대신, 입력이 바뀐 산출물만 다시 만들도록 돕습니다.
+
+- 원천 테이블은 파일 내용(sha256)으로 지문을 만듭니다. 크기·수정 시각이 manifest와 같으면
+  저장된 해시를 재사용해 큰 파일을 매번 다시 읽지 않습니다.
+- 빌드 대상(데이터셋, raw 스냅샷)은 (입력 테이블 지문, 파라미터, 빌더 코드)로 키를 만들고,
+  키가 manifest와 같고 산출물 파일이 모두 있으면 건너뜁니다.
+- 중간 산출물(RECS01 후보 테이블, LSTM 일 단위 패널)은 같은 방식의 키로 parquet에 저장해
+  다른 입력(라벨, min_rows 등)만 바뀐 재빌드에서 재사용합니다.
+- force=True면 캐시를 읽지 않고 모두 다시 만든 뒤 manifest를 갱신합니다.
+
+models/code/lstm_runtime.py(file_sha256)를 사용하므로 models/code 폴더가 sys.path에 있어야 합니다(build_datasets.py가 추가).
+
+사용 예시:
+  cache = BuildCache(os.path.join(DATA_DIR, '.build_cache'), force=args.force)
+  cache.add_source('wishes', '/path/user_donation_wishes.parquet')
+  key = cache.key('recs01_matching', ['wishes'], {'min_rows': 30000}, build_recs01_matching)
+  if not cache.is_fresh('recs01_matching', key, outputs):
+      ...
+      cache.mark('recs01_matching', key)
+"""
+import glob
+import hashlib
+import inspect
+import json
+import os
+
+import pandas as pd
+
+from lstm_runtime import file_sha256
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def fingerprint(*parts) -> str:
+    """JSON 직렬화 가능한 값들로 만든 짧은 지문"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def code_fingerprint(*funcs) -> str:
+    """함수/모듈 소스 코드 지문(피처 로직을 고치면 해당 산출물만 다시 빌드)"""
+    return fingerprint(*[inspect.getsource(f) for f in funcs])
+
+
+class BuildCache:
+    """원천 지문/빌드 키 manifest와 중간 산출물(parquet) 저장소"""
+
+    def __init__(self, cache_dir: str, force: bool = False):
+        self.cache_dir = cache_dir
+        self.force = force
+        self.sources = {}
+        path = os.path.join(cache_dir, MANIFEST_NAME)
+        self.manifest = {'sources': {}, 'targets': {}}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.manifest.update(json.load(f))
+
+    def add_source(self, name: str, path: str) -> str:
+        """원천 테이블 지문 등록(크기·수정 시각이 같으면 이전 해시 재사용)"""
+        st = os.stat(path)
+        prev = self.manifest['sources'].get(name, {})
+        same_file = (prev.get('path') == os.path.abspath(path) and prev.get('size') == st.st_size
+                     and prev.get('mtime_ns') == st.st_mtime_ns)
+        digest = prev['sha256'] if same_file and not self.force else file_sha256(path)
+        self.manifest['sources'][name] = {'path': os.path.abspath(path), 'size': st.st_size,
+                                          'mtime_ns': st.st_mtime_ns, 'sha256': digest}
+        self.sources[name] = digest
+        return digest
+
+    def key(self, target: str, tables, params: dict | None = None, *funcs) -> str:
+        """빌드 키: 대상 이름 + 입력 테이블 지문 + 파라미터 + 코드 지문"""
+        return fingerprint(target, {t: self.sources[t] for t in tables}, params or {},
+                           code_fingerprint(*funcs) if funcs else '')
+
+    def is_fresh(self, target: str, key: str, outputs) -> bool:
+        """키가 이전 빌드와 같고 산출물이 모두 있으면 True(force면 항상 False)"""
+        if self.force:
+            return False
+        return self.manifest['targets'].get(target) == key and all(os.path.exists(p) for p in outputs)
+
+    def mark(self, target: str, key: str):
+        """대상 빌드 완료 기록(중간에 실패해도 앞선 대상은 캐시되도록 즉시 저장)"""
+        self.manifest['targets'][target] = key
+        self.save()
+
+    def save(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, MANIFEST_NAME)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+
+    def materialize(self, name: str, tables, func, dfs, params: dict | None = None, *funcs) -> pd.DataFrame:
+        """중간 산출물 func(*[dfs[t] for t in tables], **params)을 캐시에서 읽거나 계산 후 저장
+
+        키는 입력 테이블 지문, params, func(및 funcs) 소스로 정해집니다. dfs가 지연 로딩
+        dict면 캐시 적중 시 입력 테이블을 읽지 않습니다.
+        """
+        key = self.key(name, tables, params, func, *funcs)
+        path = os.path.join(self.cache_dir, f'{name}-{key[:16]}.parquet')
+        if not self.force and os.path.exists(path):
+            print(f'   └─ 중간 산출물 재사용: {name}')
+            return pd.read_parquet(path)
+        df = func(*[dfs[t] for t in tables], **(params or {}))
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for old in glob.glob(os.path.join(self.cache_dir, f'{name}-*.parquet')):
+            os.remove(old)
+        try:
+            df.to_parquet(path)
+        except Exception as e:  # 캐시 저장 실패는 빌드 실패가 아님(다음 실행에서 다시 계산)
+            print(f'⚠️ 중간 산출물 캐시 저장 실패({name}): {e}')
+            if os.path.exists(path):
+                os.remove(path)
+        return df
+
+
+def materialize(cache: BuildCache | None, name: str, tables, func, dfs, params: dict | None = None,
+                *funcs) -> pd.DataFrame:
+    """cache가 없으면 바로 계산(빌더 함수를 단독으로 호출할 때)"""
+    if cache is None:
+        return func(*[dfs[t] for t in tables], **(params or {}))
+    return cache.materialize(name, tables, func, dfs, params, *funcs)
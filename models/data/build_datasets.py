@@ -1,24 +1,29 @@
 #!/usr/bin/env python3
 """
 이어드림 모델 학습용 데이터셋 빌더
-- 입력: tools/generate_fake_data(_csv).py 로 생성되는 원천 테이블(JSON/CSV)
+- 입력: tools/generate_fake_data(_csv).py 로 생성되는 원천 테이블(Parquet/CSV/NDJSON/JSON)
 - 실제 전국 대피소 CSV(우선) + 합성 데이터 결합
 - 출력: models/data/ 아래 3개 모델(RECS01/RECS00/LSTM)용 학습 데이터 산출물
 
 사용 예시(Windows PowerShell):
   python models/data/build_datasets.py --real_shelter_csv "tools/대피소추가_API/shelter_schema_전국.csv" --seed 42
 
-출력 폴더 구조:
+출력 폴더 구조(--export_csv 지정 시 같은 이름의 .csv도 함께 저장):
   models/data/
-    raw/  # 원천 스냅샷(copy)
+    raw/  # 원천 스냅샷(--format 형식, git 추적 안 함)
     recs01_matching/
-            train.csv, schema.json
+            train.parquet, schema.json
     recs00_item_rec/
-            train.csv, schema.json
+            train.parquet, schema.json
     lstm_forecast/
-            train.csv, stats.json, schema.json
+            train.parquet, stats.json, schema.json
+            panel_values.npy, panel_dates.npy, panel_index.parquet, panel_meta.json  # 컴파일된 패널(memmap)
+    .build_cache/  # 증분 빌드 manifest + 중간 산출물(후보 조인, 일 단위 패널)
+
+입력 테이블·파라미터·빌더 코드가 이전 빌드와 같은 데이터셋은 건너뜁니다(--force로 전체 재빌드).
 """
 import os
+import sys
 import json
 import argparse
 import pandas as pd
@@ -27,45 +32,91 @@ from datetime import datetime, timedelta
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 TOOLS_DIR = os.path.join(ROOT, 'tools')
+CODE_DIR = os.path.join(ROOT, 'models', 'code')
+sys.path.append(TOOLS_DIR)
+sys.path.append(CODE_DIR)
+
+from geo_index import haversine_km
+from table_io import DEFAULT_FORMAT, dataset_path, find_table, read_table, write_dataset, write_table
+import id_codec
+from id_codec import align_ids, id_codes, take_ids
+import panel_store
+from panel_store import PANEL_FILES, CompiledPanel
+from build_cache import BuildCache, materialize
+import recs01_candidates
+from recs01_candidates import (DEFAULT_CHUNK_ROWS, DEFAULT_TOP_K, DEFAULT_URGENCY, URGENCY_SCORES,
+                               iter_candidate_pairs)
 OUTPUT_CSV_DIR = os.path.join(TOOLS_DIR, 'output_csv')  # 기본값(옵션으로 덮어씀)
-RAW_DIR = os.path.join(os.path.dirname(__file__), 'raw')
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+RAW_DIR = os.path.join(DATA_DIR, 'raw')
+CACHE_DIR = os.path.join(DATA_DIR, '.build_cache')
+
+# 원천 테이블 키 → 파일 이름(확장자 제외)
+SOURCE_TABLES = {
+    'users': 'users',
+    'shelters': 'shelters',
+    'relief_items': 'relief_items',
+    'wishes': 'user_donation_wishes',
+    'requests': 'shelter_relief_requests',
+    'matches': 'donation_matches',
+    'incidents': 'disaster_incidents',
+    'consumptions': 'consumption_info',
+}
 
 # 안전한 디렉토리 생성
 os.makedirs(RAW_DIR, exist_ok=True)
 
 
-def _read_csv(path):
-    return pd.read_csv(path, encoding='utf-8-sig') if os.path.exists(path) else None
+class _LazyTables(dict):
+    """처음 접근할 때 read_table로 로드하는 원천 테이블 dict(캐시 적중 시 읽지 않기 위함)"""
 
+    def __init__(self, paths: dict):
+        super().__init__()
+        self.paths = paths
 
-def load_or_generate_sources(sources_dir: str, real_shelter_csv: str | None, seed: int | None):
-    """지정된 sources_dir에서 원천 CSV를 로드합니다. 없으면 생성 안내를 제공합니다."""
-    # 1) 지정 경로에서 사용
-    files = {
-        'users': os.path.join(sources_dir, 'users.csv'),
-        'shelters': os.path.join(sources_dir, 'shelters.csv'),
-        'relief_items': os.path.join(sources_dir, 'relief_items.csv'),
-        'wishes': os.path.join(sources_dir, 'user_donation_wishes.csv'),
-        'requests': os.path.join(sources_dir, 'shelter_relief_requests.csv'),
-        'matches': os.path.join(sources_dir, 'donation_matches.csv'),
-        'incidents': os.path.join(sources_dir, 'disaster_incidents.csv'),
-        'consumptions': os.path.join(sources_dir, 'consumption_info.csv'),
-    }
-    have_all = all(os.path.exists(p) for p in files.values())
+    def __missing__(self, key):
+        df = read_table(self.paths[key])
+        self[key] = df
+        return df
+
+
+def load_or_generate_sources(sources_dir: str, real_shelter_csv: str | None, seed: int | None,
+                             export_csv: bool = False, cache: BuildCache | None = None, fmt: str = DEFAULT_FORMAT):
+    """지정된 sources_dir에서 원천 테이블을 로드합니다. 없으면 생성 안내를 제공합니다.
+
+    테이블별로 .parquet → .csv → .ndjson → .json 순으로 찾으며, ID/상태·분류 컬럼은 category로 로드합니다.
+    반환값은 지연 로딩 dict입니다. cache가 있으면 테이블 지문을 등록하고, 내용이 바뀐 테이블만
+    raw 스냅샷(fmt 형식)을 다시 씁니다.
+    """
+    # 1) 지정 경로에서 사용(확장자 없는 기본 경로)
+    files = {k: find_table(os.path.join(sources_dir, name)) for k, name in SOURCE_TABLES.items()}
+    have_all = all(files.values())
 
     # 2) 없으면 사용자에게 생성 안내 (자동 실행은 argparse 구조상 안전하지 않음)
     if not have_all:
         raise RuntimeError(
-            '원천 CSV가 없습니다. 먼저 tools/generate_fake_data_csv.py를 실행해 주세요. '
+            '원천 테이블이 없습니다. 먼저 tools/generate_fake_data_csv.py를 실행해 주세요. '
             '예: python tools/generate_fake_data_csv.py --real_shelter_csv "tools/대피소추가_API/shelter_schema_전국.csv" --out tools/output_csv')
 
-    # 3) 로드
-    dfs = {k: _read_csv(v) for k, v in files.items()}
-
-    # 4) raw 백업
-    for k, df in dfs.items():
-        if df is not None:
-            df.to_csv(os.path.join(RAW_DIR, f'{k}.csv'), index=False, encoding='utf-8-sig')
+    # 3) 로드(지연) + 캐시 키용 테이블 지문 등록
+    dfs = _LazyTables(files)
+    if cache is not None:
+        for k, path in files.items():
+            cache.add_source(k, path)
+
+    # 4) raw 백업(fmt 형식, parquet이면 옵션으로 CSV도) — 캐시가 있으면 바뀐 테이블만
+    formats = [fmt] + (['csv'] if export_csv and fmt != 'csv' else [])
+    for k in files:
+        base = os.path.join(RAW_DIR, k)
+        outputs = [f'{base}.{f}' for f in formats]
+        if cache is not None:
+            key = cache.key(f'raw/{k}', [k], {'formats': formats})
+            if cache.is_fresh(f'raw/{k}', key, outputs):
+                continue
+        for f in formats:
+            write_table(dfs[k], base, f)
+        if cache is not None:
+            cache.mark(f'raw/{k}', key)
 
     return dfs
 
@@ -86,113 +137,131 @@ def _ensure_min_rows(df: pd.DataFrame, min_rows: int, jitter_cols: list[str] | N
     return aug
 
 
-def build_recs01_matching(dfs: dict, out_dir: str, min_rows: int = 30000):
-    os.makedirs(out_dir, exist_ok=True)
-    users = dfs['users']
-    wishes = dfs['wishes']
-    requests = dfs['requests']
-    shelters = dfs['shelters']
-    items = dfs['relief_items']
-    matches = dfs['matches']
+def _in_sorted(values: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """np.isin(values, keys)와 같음(keys는 정렬·중복 제거된 배열, 청크마다 다시 정렬하지 않음)"""
+    if len(keys) == 0:
+        return np.zeros(len(values), dtype=bool)
+    return keys[np.minimum(np.searchsorted(keys, values), len(keys) - 1)] == values
 
-    # 학습용 샘플 스키마: (user_id, wish_id, request_id, label, features...)
+
+def _recs01_candidates(wishes: pd.DataFrame, requests: pd.DataFrame, shelters: pd.DataFrame, matches: pd.DataFrame,
+                       top_k: int = DEFAULT_TOP_K, neg_ratio: float | None = None, seed: int | None = None,
+                       chunk_rows: int = DEFAULT_CHUNK_ROWS) -> pd.DataFrame:
+    """RECS01 후보-라벨-피처 테이블(기부 의사별 긴급도·거리 상위 top_k 요청 + 모든 양성)
+
+    후보 쌍은 recs01_candidates.iter_candidate_pairs가 chunk_rows 단위로 내보내고, 청크마다
+    피처를 계산해 필요한 컬럼만 남깁니다(wish × request 전체 조인을 만들지 않음).
+    ID는 테이블 간 공통 사전(id_codec)의 int32 코드로 조인하고, 출력 ID 컬럼도 category로 유지합니다.
+    """
+    rng = np.random.default_rng(seed)
+    wishes, requests, shelters, matches = align_ids(wishes, requests, shelters, matches)
     req_need = requests.copy()
     req_need['remaining_need'] = (req_need['requested_quantity']
                                   - req_need['current_stock']
                                   - req_need.get('total_matched_quantity', 0)).clip(lower=0)
 
-    # 후보 조인: 동일 item 기반
-    cand = wishes.merge(req_need, left_on='relief_item_id', right_on='relief_item_id', how='inner', suffixes=('_wish','_req'))
-
     # 거리 계산: 사용자 좌표가 없으므로 간단한 근사 - 한국 범위 난수 좌표 부여 후 계산
+    # 사용자별 난수 좌표 부여(세션 수준 근사). 실제 서비스에서는 지오코딩/최근 위치 사용 권장
     KO_LAT_MIN, KO_LAT_MAX = 33.0, 38.6
     KO_LON_MIN, KO_LON_MAX = 124.6, 131.9
-    def _rand_latlon(n):
-        lat = np.random.uniform(KO_LAT_MIN, KO_LAT_MAX, size=n)
-        lon = np.random.uniform(KO_LON_MIN, KO_LON_MAX, size=n)
-        return lat, lon
-    def _haversine(lat1, lon1, lat2, lon2):
-        R = 6371.0
-        lat1 = np.radians(lat1); lon1 = np.radians(lon1)
-        lat2 = np.radians(lat2); lon2 = np.radians(lon2)
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = np.sin(dlat/2)**2 + np.cos(lat1)*np.cos(lat2)*np.sin(dlon/2)**2
-        c = 2*np.arcsin(np.sqrt(a))
-        return R * c
-    # 사용자별 난수 좌표 부여(세션 수준 근사). 실제 서비스에서는 지오코딩/최근 위치 사용 권장
-    user_coords = {}
-    for uid in cand['user_id'].unique():
-        lat, lon = _rand_latlon(1)
-        user_coords[uid] = (float(lat[0]), float(lon[0]))
-    cand['user_lat'] = cand['user_id'].map(lambda u: user_coords.get(u, (np.nan, np.nan))[0])
-    cand['user_lon'] = cand['user_id'].map(lambda u: user_coords.get(u, (np.nan, np.nan))[1])
-    cand['distance_km'] = _haversine(cand['user_lat'], cand['user_lon'], cand['latitude'], cand['longitude']) if {'latitude','longitude'}.issubset(cand.columns) else np.nan
-
-    # 라벨: 실제 매칭 존재 여부
-    pos = matches[['donation_wish_id','relief_request_id']].drop_duplicates()
-    pos['label'] = 1
-    cand = cand.merge(pos, left_on=['wish_id','request_id'], right_on=['donation_wish_id','relief_request_id'], how='left')
-    cand['label'] = cand['label'].fillna(0).astype(int)
-
-    # 피처 예시
-    # merge 후 공통 컬럼은 접미사가 붙음: remaining_quantity_wish / remaining_quantity_req
-    wish_rem_col = 'remaining_quantity_wish' if 'remaining_quantity_wish' in cand.columns else (
-        'remaining_quantity' if 'remaining_quantity' in cand.columns else None
-    )
-    if wish_rem_col is None:
-        cand['wish_remaining_quantity'] = 0
-    else:
-        cand['wish_remaining_quantity'] = cand[wish_rem_col]
-
-    # need_ratio = min(기부자 잔량, 요청 잔여 필요)/요청 잔여 필요
-    denom = cand['remaining_need'].replace(0, np.nan)
-    cand['need_ratio'] = np.minimum(cand['wish_remaining_quantity'], cand['remaining_need']) / denom
-    cand['need_ratio'] = cand['need_ratio'].fillna(0).clip(0,1)
+    user_codes, uids = pd.factorize(wishes['user_id'])
+    lat = rng.uniform(KO_LAT_MIN, KO_LAT_MAX, size=len(uids))
+    lon = rng.uniform(KO_LON_MIN, KO_LON_MAX, size=len(uids))
+    wish_lat = np.where(user_codes >= 0, lat[user_codes], np.nan)
+    wish_lon = np.where(user_codes >= 0, lon[user_codes], np.nan)
+    # 요청 테이블에는 좌표가 없으므로 대피소 좌표를 shelter_id로 붙여 거리 계산
+    coords = shelters[['shelter_id','latitude','longitude']].drop_duplicates('shelter_id').set_index('shelter_id')
+    req_lat = req_need['shelter_id'].map(coords['latitude']).astype(float).to_numpy()
+    req_lon = req_need['shelter_id'].map(coords['longitude']).astype(float).to_numpy()
 
     # urgency_level: 범주 → 수치
-    urgency_map = {'높음': 1.0, '중간': 0.6, '낮음': 0.3}
-    cand['urgency_score'] = cand['urgency_level'].map(urgency_map).fillna(0.5)
-
-    # 선택 컬럼 정리
-    cols = [
-        'user_id','wish_id','request_id','relief_item_id',
-        'shelter_id','requested_quantity','current_stock','wish_remaining_quantity','remaining_need',
-        'urgency_score','need_ratio','distance_km','label'
-    ]
-    # 누락 컬럼 방어
-    cand_out = cand.reindex(columns=[c for c in cols if c in cand.columns]).copy()
+    urgency = req_need['urgency_level'].map(URGENCY_SCORES).astype(float).fillna(DEFAULT_URGENCY).to_numpy()
+
+    # 품목 코드(wish/request 공통 사전), 결측은 -1
+    wish_item, req_item = id_codes(wishes['relief_item_id']), id_codes(req_need['relief_item_id'])
+
+    # 라벨: 실제 매칭 (wish_id, request_id) 중 같은 품목인 쌍(행 번호)
+    pos = matches[['donation_wish_id','relief_request_id']].drop_duplicates()
+    pos_wish_code, pos_req_code = id_codes(pos['donation_wish_id']), id_codes(pos['relief_request_id'])
+    pos_wish = pd.Index(id_codes(wishes['wish_id'])).get_indexer(pos_wish_code)
+    pos_req = pd.Index(id_codes(req_need['request_id'])).get_indexer(pos_req_code)
+    ok = (pos_wish >= 0) & (pos_req >= 0) & (pos_wish_code >= 0) & (pos_req_code >= 0)
+    ok[ok] = (wish_item[pos_wish[ok]] == req_item[pos_req[ok]]) & (wish_item[pos_wish[ok]] >= 0)
+    pos_wish, pos_req = pos_wish[ok], pos_req[ok]
+    pos_keys = np.unique(pos_wish.astype('int64') * len(req_need) + pos_req)
+
+    wish_rem = wishes['remaining_quantity'] if 'remaining_quantity' in wishes.columns else pd.Series(0, index=wishes.index)
+    parts = []
+    for w, r in iter_candidate_pairs(wish_item, wish_lat, wish_lon, req_item, req_lat, req_lon, urgency,
+                                     pos_wish, pos_req, top_k=top_k, neg_ratio=neg_ratio,
+                                     seed=int(rng.integers(2**32)), chunk_rows=chunk_rows):
+        chunk = pd.DataFrame({
+            'user_id': take_ids(wishes['user_id'], w),
+            'wish_id': take_ids(wishes['wish_id'], w),
+            'request_id': take_ids(req_need['request_id'], r),
+            'relief_item_id': take_ids(wishes['relief_item_id'], w),
+            'shelter_id': take_ids(req_need['shelter_id'], r),
+            'requested_quantity': req_need['requested_quantity'].take(r).to_numpy(),
+            'current_stock': req_need['current_stock'].take(r).to_numpy(),
+            'wish_remaining_quantity': wish_rem.take(w).to_numpy(),
+            'remaining_need': req_need['remaining_need'].take(r).to_numpy(),
+            'urgency_score': urgency[r],
+        })
+        # need_ratio = min(기부자 잔량, 요청 잔여 필요)/요청 잔여 필요
+        denom = chunk['remaining_need'].replace(0, np.nan)
+        chunk['need_ratio'] = (np.minimum(chunk['wish_remaining_quantity'], chunk['remaining_need']) / denom).fillna(0).clip(0,1)
+        chunk['distance_km'] = haversine_km(wish_lat[w], wish_lon[w], req_lat[r], req_lon[r])
+        chunk['label'] = _in_sorted(w.astype('int64') * len(req_need) + r, pos_keys).astype(int)
+        parts.append(chunk)
+    if not parts:
+        return pd.DataFrame(columns=['user_id','wish_id','request_id','relief_item_id','shelter_id','requested_quantity',
+                                     'current_stock','wish_remaining_quantity','remaining_need','urgency_score',
+                                     'need_ratio','distance_km','label'])
+    return pd.concat(parts, ignore_index=True)
+
+
+def build_recs01_matching(dfs: dict, out_dir: str, min_rows: int = 30000,
+                          fmt: str = DEFAULT_FORMAT, export_csv: bool = False, cache: BuildCache | None = None,
+                          top_k: int = DEFAULT_TOP_K, neg_ratio: float | None = None,
+                          chunk_rows: int = DEFAULT_CHUNK_ROWS):
+    os.makedirs(out_dir, exist_ok=True)
+
+    # 학습용 샘플 스키마: (user_id, wish_id, request_id, label, features...)
+    # 후보: 기부 의사별 상위 top_k 요청 + 양성(입력/파라미터가 그대로면 캐시에서 재사용)
+    params = dict(top_k=top_k, neg_ratio=neg_ratio, seed=int(np.random.randint(2**31)), chunk_rows=chunk_rows)
+    cand_out = materialize(cache, 'recs01_candidates', ['wishes', 'requests', 'shelters', 'matches'],
+                           _recs01_candidates, dfs, params, _in_sorted, recs01_candidates, id_codec)
     # 최소 행수 보장(증강)
     cand_out = _ensure_min_rows(cand_out, min_rows, jitter_cols=['requested_quantity','current_stock','wish_remaining_quantity','remaining_need','urgency_score','need_ratio','distance_km'])
-    # 저장: CSV 고정
-    cand_out.to_csv(os.path.join(out_dir, 'train.csv'), index=False, encoding='utf-8-sig')
-
-    # 스키마/피처 정의 저장
+    # 저장 + 스키마/피처 정의(dtypes 포함)
     schema = {
         'primary_key': ['user_id','wish_id','request_id'],
         'label': 'label',
-        'features': ['requested_quantity','current_stock','wish_remaining_quantity','remaining_need','urgency_score','need_ratio','distance_km']
+        'features': ['requested_quantity','current_stock','wish_remaining_quantity','remaining_need','urgency_score','need_ratio','distance_km'],
+        'candidates': {'top_k': top_k, 'neg_ratio': neg_ratio},
     }
-    with open(os.path.join(out_dir, 'schema.json'),'w',encoding='utf-8') as f:
-        json.dump(schema, f, ensure_ascii=False, indent=2)
+    write_dataset(cand_out, out_dir, schema, fmt=fmt, export_csv=export_csv)
 
 
-def build_recs00_item_rec(dfs: dict, out_dir: str, min_rows: int = 30000):
+def build_recs00_item_rec(dfs: dict, out_dir: str, min_rows: int = 30000,
+                          fmt: str = DEFAULT_FORMAT, export_csv: bool = False, cache: BuildCache | None = None):
     os.makedirs(out_dir, exist_ok=True)
-    shelters = dfs['shelters']
-    items = dfs['relief_items']
-    consumptions = dfs['consumptions']
-    requests = dfs['requests']
+    # 두 테이블의 shelter_id/relief_item_id 사전을 맞춰 groupby/merge가 코드 기반으로 처리되게 함
+    consumptions, requests = align_ids(dfs['consumptions'], dfs['requests'])
 
     # 대피소-품목 pair 생성: 과거 소비 또는 현재 요청 존재
-    cons_item = consumptions.groupby(['shelter_id','relief_item_id']).agg(
+    cons_item = consumptions.groupby(['shelter_id','relief_item_id'], observed=True).agg(
         consumed_days=('duration_days','sum'),
         consumed_qty=('consumed_quantity','sum'),
         daily_rate=('daily_consumption_rate','mean'),
-        seasons=('seasonality', lambda x: ','.join(sorted(set(x.astype(str)))))
     ).reset_index()
+    # pair별 계절 목록(정렬된 고유값을 ','로 연결) — 그룹별 lambda 대신 고유 조합만 문자열로 변환
+    seasons = consumptions[['shelter_id','relief_item_id','seasonality']].drop_duplicates()
+    seasons = seasons.assign(seasonality=seasons['seasonality'].astype(str)).sort_values('seasonality')
+    seasons = seasons.groupby(['shelter_id','relief_item_id'], observed=True)['seasonality'].agg(','.join)
+    cons_item = cons_item.merge(seasons.rename('seasons').reset_index(), on=['shelter_id','relief_item_id'], how='left')
 
-    req_item = requests.groupby(['shelter_id','relief_item_id']).agg(
+    req_item = requests.groupby(['shelter_id','relief_item_id'], observed=True).agg(
         total_requested=('requested_quantity','sum'),
         total_remaining=('remaining_quantity','sum'),
         urgent=('urgent_quantity','sum')
@@ -209,64 +278,114 @@ def build_recs00_item_rec(dfs: dict, out_dir: str, min_rows: int = 30000):
     # 출력 저장
     # 최소 행수 보장(증강)
     pair = _ensure_min_rows(pair, min_rows, jitter_cols=['consumed_days','consumed_qty','daily_rate','total_requested','total_remaining','urgent','popularity'])
-    pair.to_csv(os.path.join(out_dir, 'train.csv'), index=False, encoding='utf-8-sig')
     schema = {
         'primary_key': ['shelter_id','relief_item_id'],
         'label': 'label',
         'features': ['consumed_days','consumed_qty','daily_rate','total_requested','total_remaining','urgent','popularity']
     }
-    with open(os.path.join(out_dir, 'schema.json'),'w',encoding='utf-8') as f:
-        json.dump(schema, f, ensure_ascii=False, indent=2)
-
-
-def build_lstm_forecast(dfs: dict, out_dir: str, lookback: int = 28, min_rows: int = 30000):
-    os.makedirs(out_dir, exist_ok=True)
-    consumptions = dfs['consumptions']
-    shelters = dfs['shelters']
-
-    # 일단위 패널 생성: consumption 기간을 일 단위로 펼치기
-    rows = []
-    for _, r in consumptions.iterrows():
-        start = pd.to_datetime(r['start_date'])
-        end = pd.to_datetime(r['end_date'])
-        days = (end - start).days
-        if days <= 0:
-            continue
-        base = r['daily_consumption_rate'] if 'daily_consumption_rate' in r else r['consumed_quantity']/max(1,days)
-        for d in range(days):
-            date = (start + pd.Timedelta(days=d)).date()
-            rows.append({
-                'shelter_id': r['shelter_id'],
-                'relief_item_id': r['relief_item_id'],
-                'date': date,
-                'y_t': base,
-                'seasonality': r.get('seasonality',''),
-                'disaster_severity': r.get('disaster_severity','중간'),
-                'weather': r.get('weather_conditions','일반')
-            })
-    panel = pd.DataFrame(rows)
+    write_dataset(pair, out_dir, schema, fmt=fmt, export_csv=export_csv)
+
+
+def _expand_daily_panel(consumptions: pd.DataFrame) -> pd.DataFrame:
+    """consumption 행을 기간(start_date~end_date 전날)의 일 단위 행으로 펼친 패널
+
+    행마다 duration 일수만큼 np.repeat로 복제하고 날짜 오프셋을 NumPy로 더합니다.
+    기간이 0일 이하이거나 날짜가 비어 있는 행은 제외합니다.
+    ID/범주 컬럼은 문자열로 풀지 않고 Categorical 그대로 복제합니다.
+    """
+    start = pd.to_datetime(consumptions['start_date'])
+    end = pd.to_datetime(consumptions['end_date'])
+    days = (end - start).dt.days
+    keep = (days > 0).to_numpy()
+    src = consumptions[keep]
+    start = start[keep].to_numpy()
+    days = days[keep].to_numpy(dtype='int64')
+
+    rep = np.repeat(np.arange(len(src)), days)
+    # 원본 행 안에서의 일차(0, 1, ..., days-1)
+    offset = np.arange(len(rep)) - np.repeat(np.cumsum(days) - days, days)
+    if 'daily_consumption_rate' in src.columns:
+        base = src['daily_consumption_rate'].to_numpy()
+    else:
+        base = (src['consumed_quantity'] / np.maximum(1, days)).to_numpy()
+
+    def expand(col, default):
+        return src[col].array.take(rep) if col in src.columns else default
+
+    return pd.DataFrame({
+        'shelter_id': take_ids(src['shelter_id'], rep),
+        'relief_item_id': take_ids(src['relief_item_id'], rep),
+        'date': pd.Series(start[rep] + offset.astype('timedelta64[D]')).dt.date,
+        'y_t': base[rep],
+        'seasonality': expand('seasonality', ''),
+        'disaster_severity': expand('disaster_severity', '중간'),
+        'weather': expand('weather_conditions', '일반'),
+    })
+
+
+def _daily_panel(consumptions: pd.DataFrame) -> pd.DataFrame:
+    """일 단위 패널 + 그룹별 이동통계(cons_ma7/14/28), (shelter_id, relief_item_id, date) 순"""
+    # 정렬된 ID 사전 → 코드 순 정렬이 문자열 정렬과 같음
+    consumptions, = align_ids(consumptions)
+    panel = _expand_daily_panel(consumptions)
     if panel.empty:
         # 패널이 비면 더미 방어
         panel = pd.DataFrame(columns=['shelter_id','relief_item_id','date','y_t'])
 
-    # 이동통계 피처 생성
+    # 이동통계 피처 생성(그룹별 rolling — 그룹 경계에서 창이 새로 시작)
     panel = panel.sort_values(['shelter_id','relief_item_id','date'])
-    def add_roll(df):
-        df['cons_ma7'] = df['y_t'].rolling(window=7, min_periods=1).mean()
-        df['cons_ma14'] = df['y_t'].rolling(window=14, min_periods=1).mean()
-        df['cons_ma28'] = df['y_t'].rolling(window=28, min_periods=1).mean()
-        return df
-    panel = panel.groupby(['shelter_id','relief_item_id'], group_keys=False).apply(add_roll)
+    panel = panel.dropna(subset=['shelter_id','relief_item_id']).reset_index(drop=True)
+    if not panel.empty:
+        # 정렬된 패널에서 (shelter_id, relief_item_id)가 바뀌는 위치 = 그룹 경계
+        shelter, item = id_codes(panel['shelter_id']), id_codes(panel['relief_item_id'])
+        new_group = np.ones(len(panel), dtype=bool)
+        new_group[1:] = (shelter[1:] != shelter[:-1]) | (item[1:] != item[:-1])
+        starts = np.flatnonzero(new_group)
+        lengths = np.diff(np.append(starts, len(panel)))
+        y = panel['y_t'].to_numpy(dtype='float64')
+        for w in (7, 14, 28):
+            panel[f'cons_ma{w}'] = _segment_rolling_mean(y, starts, lengths, w)
+    return panel
+
+
+def _segment_rolling_mean(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray, window: int) -> np.ndarray:
+    """연속 구간(그룹)별 rolling(window, min_periods=1).mean() — 그룹마다 Series.rolling을 따로 돌린 값과 같음
+
+    groupby().rolling()은 이동합을 그룹 경계 너머로 이어 가 그룹별 계산과 반올림 오차만큼 다를 수 있습니다.
+    길이가 같은 그룹을 (길이 × 그룹 수) DataFrame의 열로 모아 열마다 새로 계산합니다.
+    """
+    out = np.empty(len(values))
+    order = np.argsort(lengths, kind='stable')
+    cuts = np.flatnonzero(np.diff(lengths[order])) + 1
+    for groups in np.split(order, cuts):
+        rows = starts[groups][None, :] + np.arange(lengths[groups[0]])[:, None]
+        out[rows] = pd.DataFrame(values[rows]).rolling(window=window, min_periods=1).mean().to_numpy()
+    return out
+
+
+def build_lstm_forecast(dfs: dict, out_dir: str, lookback: int = 28, min_rows: int = 30000,
+                        fmt: str = DEFAULT_FORMAT, export_csv: bool = False, cache: BuildCache | None = None):
+    os.makedirs(out_dir, exist_ok=True)
+
+    # 일단위 패널 생성: consumption 기간을 일 단위로 펼치기(consumptions가 그대로면 캐시에서 재사용)
+    panel = materialize(cache, 'daily_panel', ['consumptions'], _daily_panel, dfs, None, _expand_daily_panel,
+                        _segment_rolling_mean, id_codec)
 
-    # 원-핫: 간단 인코딩
+    # 원-핫: 간단 인코딩(category는 등장한 값만, 문자열 정렬 순 컬럼)
     for col in ['seasonality','disaster_severity','weather']:
         if col in panel.columns:
-            dummies = pd.get_dummies(panel[col].astype(str), prefix=col)
+            values = panel[col]
+            if isinstance(values.dtype, pd.CategoricalDtype) and not values.isna().any():
+                values = values.cat.remove_unused_categories()
+                values = values.cat.rename_categories(values.cat.categories.astype(str))
+                values = values.cat.reorder_categories(sorted(values.cat.categories))
+            else:
+                values = values.astype(str)
+            dummies = pd.get_dummies(values, prefix=col)
             panel = pd.concat([panel.drop(columns=[col]), dummies], axis=1)
 
     # 최소 행수 보장(증강)
     panel = _ensure_min_rows(panel, min_rows, jitter_cols=['y_t','cons_ma7','cons_ma14','cons_ma28'])
-    panel.to_csv(os.path.join(out_dir, 'train.csv'), index=False, encoding='utf-8-sig')
 
     # 통계치 저장(정규화용 예시)
     stats = panel.describe(include='all').to_dict()
@@ -295,8 +414,10 @@ def build_lstm_forecast(dfs: dict, out_dir: str, lookback: int = 28, min_rows: i
         'target': 'y_t',
         'features_example': ['cons_ma7','cons_ma14','cons_ma28']
     }
-    with open(os.path.join(out_dir, 'schema.json'),'w',encoding='utf-8') as f:
-        json.dump(schema, f, ensure_ascii=False, indent=2)
+    write_dataset(panel, out_dir, schema, fmt=fmt, export_csv=export_csv)
+
+    # 학습/예측이 memmap으로 바로 여는 컴파일된 패널(정렬·float32 변환을 여기서 한 번만)
+    CompiledPanel.from_frame(panel).save(out_dir, source=dataset_path(out_dir))
 
 
 def main():
@@ -304,17 +425,48 @@ def main():
     parser.add_argument('--real_shelter_csv', type=str, default=os.path.join('tools','대피소추가_API','shelter_schema_전국.csv'))
     parser.add_argument('--seed', type=int, default=42)
     parser.add_argument('--min_rows', type=int, default=30000, help='각 데이터셋 최소 행수(부족 시 부트스트랩 증강)')
-    parser.add_argument('--sources_dir', type=str, default=OUTPUT_CSV_DIR, help='원천 CSV 폴더 경로(기본: tools/output_csv)')
+    parser.add_argument('--sources_dir', type=str, default=OUTPUT_CSV_DIR, help='원천 테이블 폴더 경로(기본: tools/output_csv, parquet/csv/ndjson/json)')
+    parser.add_argument('--format', type=str, default=DEFAULT_FORMAT, choices=['parquet', 'csv'],
+                        help='학습 데이터 저장 형식(기본: parquet)')
+    parser.add_argument('--export_csv', action='store_true', help='parquet과 함께 CSV(UTF-8-sig)도 저장')
+    parser.add_argument('--top_k', type=int, default=DEFAULT_TOP_K, help='RECS01 기부 의사별 후보 요청 수(긴급도·거리 상위)')
+    parser.add_argument('--neg_ratio', type=float, default=None,
+                        help='RECS01 기부 의사별 네거티브 수 = ceil(비율 × max(1, 양성 수)), 미지정 시 top_k 후보 전체')
+    parser.add_argument('--chunk_rows', type=int, default=DEFAULT_CHUNK_ROWS, help='RECS01 후보 생성 청크 크기(행)')
+    parser.add_argument('--force', action='store_true', help='빌드 캐시를 무시하고 모든 데이터셋을 다시 생성')
     args = parser.parse_args()
 
-    dfs = load_or_generate_sources(args.sources_dir, args.real_shelter_csv, args.seed)
-
-    # RECS01
-    build_recs01_matching(dfs, os.path.join(os.path.dirname(__file__), 'recs01_matching'), min_rows=args.min_rows)
-    # RECS00
-    build_recs00_item_rec(dfs, os.path.join(os.path.dirname(__file__), 'recs00_item_rec'), min_rows=args.min_rows)
-    # LSTM
-    build_lstm_forecast(dfs, os.path.join(os.path.dirname(__file__), 'lstm_forecast'), min_rows=args.min_rows)
+    cache = BuildCache(CACHE_DIR, force=args.force)
+    dfs = load_or_generate_sources(args.sources_dir, args.real_shelter_csv, args.seed,
+                                   export_csv=args.export_csv, cache=cache, fmt=args.format)
+    opts = dict(min_rows=args.min_rows, fmt=args.format, export_csv=args.export_csv)
+    ext = '.csv' if args.format == 'csv' else '.parquet'
+
+    # (이름, 빌더, 입력 테이블, 추가 파라미터, 빌더가 쓰는 보조 함수, 추가 산출물)
+    targets = [
+        ('recs01_matching', build_recs01_matching, ['wishes', 'requests', 'shelters', 'matches'],
+         {'top_k': args.top_k, 'neg_ratio': args.neg_ratio, 'chunk_rows': args.chunk_rows},
+         [_recs01_candidates, _in_sorted, recs01_candidates, _ensure_min_rows, id_codec], []),
+        ('recs00_item_rec', build_recs00_item_rec, ['consumptions', 'requests'], {},
+         [_ensure_min_rows, id_codec], []),
+        ('lstm_forecast', build_lstm_forecast, ['consumptions'], {},
+         [_daily_panel, _expand_daily_panel, _segment_rolling_mean, _ensure_min_rows, panel_store, id_codec], ['stats.json'] + PANEL_FILES),
+    ]
+    for name, builder, tables, extra, helpers, extra_outputs in targets:
+        out_dir = os.path.join(DATA_DIR, name)
+        params = dict(opts, seed=args.seed, **extra)
+        key = cache.key(name, tables, params, builder, *helpers)
+        outputs = [os.path.join(out_dir, f) for f in ['train' + ext, 'schema.json'] + extra_outputs]
+        if args.export_csv:
+            outputs.append(os.path.join(out_dir, 'train.csv'))
+        if cache.is_fresh(name, key, outputs):
+            print(f'⏭️ {name}: 입력/파라미터/코드 변경 없음 — 건너뜀')
+            continue
+        print(f'🔨 {name} 빌드 중...')
+        # 빌더마다 같은 시드로 초기화(다른 빌더를 건너뛰어도 같은 결과)
+        np.random.seed(args.seed)
+        builder(dfs, out_dir, cache=cache, **opts, **extra)
+        cache.mark(name, key)
 
     print('✅ 학습 데이터셋 생성 완료: models/data 아래 하위 폴더를 확인하세요.')
 
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""RECS01 후보 생성(블록 단위 top-K)
+
+기존 후보는 relief_item_id 기준 wish × request 내부 조인이라 인기 품목에서 행 수가
+(기부 의사 수 × 요청 수)로 폭증했습니다. 여기서는 품목별로 기부 의사마다 점수 상위 K개
+요청만 후보로 남깁니다.
+
+- 점수: 긴급도(높음 1.0 / 중간 0.6 / 낮음 0.3) − 거리(km) / distance_scale_km
+- 공간 사전 필터: 요청이 top_k × PREFILTER_FACTOR개보다 많은 품목은 요청 대피소 좌표로
+  ShelterGeoIndex(k-최근접)를 만들어 가까운 요청만 점수를 계산합니다. 필터 밖 요청이 이길 수
+  있는 기부 의사(점수 상한 비교)만 전수 비교하므로 결과는 전수 비교와 같습니다.
+  좌표가 없는 기부 의사도 전수 비교로 처리합니다.
+- 블록 처리: 기부 의사를 (블록 행 수 × 후보 수) ≤ BLOCK_CELLS 단위로 나눠 계산하므로
+  메모리가 품목 인기도와 무관하게 제한됩니다.
+- 네거티브 샘플링: neg_ratio를 주면 기부 의사별 네거티브를 ceil(neg_ratio × max(1, 양성 수))개로
+  top-K 후보 안에서 무작위 추출합니다(None이면 top-K 후보 전체).
+- 양성(donation_matches의 (wish, request) 쌍, 같은 품목)은 순위와 무관하게 항상 포함합니다.
+
+tools/geo_index.py를 사용하므로 tools 폴더가 sys.path에 있어야 합니다(build_datasets.py가 추가).
+
+사용 예시:
+  for w, r in iter_candidate_pairs(wish_item, wish_lat, wish_lon, req_item, req_lat, req_lon,
+                                   urgency, pos_wish, pos_req, top_k=20):
+      chunk = make_chunk(w, r)
+"""
+import numpy as np
+
+from geo_index import ShelterGeoIndex, haversine_km
+
+DEFAULT_TOP_K = 20
+DEFAULT_CHUNK_ROWS = 200_000
+# 공간 사전 필터: 가까운 요청 top_k × PREFILTER_FACTOR개만 점수 계산
+PREFILTER_FACTOR = 4
+# 점수에서 거리 100km ≈ 긴급도 1.0
+DISTANCE_SCALE_KM = 100.0
+# 블록당 (기부 의사 × 후보) 거리/점수 계산 셀 수 상한
+BLOCK_CELLS = 1_000_000
+
+URGENCY_SCORES = {'높음': 1.0, '중간': 0.6, '낮음': 0.3}
+DEFAULT_URGENCY = 0.5
+
+
+def candidate_score(urgency, distance_km, distance_scale_km: float = DISTANCE_SCALE_KM):
+    """후보 순위 점수(클수록 우선). 거리를 모르면 같은 긴급도 안에서 최하위"""
+    return urgency - np.nan_to_num(distance_km, nan=np.inf) / distance_scale_km
+
+
+class _ItemRequests:
+    """품목 하나의 요청 후보(좌표/긴급도) + 요청이 많으면 공간 인덱스"""
+
+    def __init__(self, lat, lon, urgency, top_k):
+        self.lat, self.lon, self.urgency = lat, lon, urgency
+        self.top_k = top_k
+        prefilter_k = top_k * PREFILTER_FACTOR
+        valid = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+        self.geo = None
+        if len(lat) > prefilter_k and len(valid) >= prefilter_k:
+            # 좌표가 있는 요청이 충분하면 가까운 prefilter_k개만 비교(좌표 없는 요청은 어차피 최하위)
+            self.geo_idx = valid
+            self.geo = ShelterGeoIndex(lat[valid], lon[valid])
+            self.width = prefilter_k
+        else:
+            self.width = len(lat)
+
+    def _scores(self, w_lat, w_lon, distance_scale_km):
+        """전체 요청 대상 (후보 인덱스, 점수) — 각각 (b, n)"""
+        cand = np.broadcast_to(np.arange(len(self.lat)), (len(w_lat), len(self.lat)))
+        dist = haversine_km(w_lat[:, None], w_lon[:, None], self.lat[None, :], self.lon[None, :])
+        return cand, candidate_score(self.urgency[cand], dist, distance_scale_km)
+
+    def shortlist(self, w_lat, w_lon, distance_scale_km):
+        """기부 의사별 상위 top_k 요청의 로컬 인덱스 (b, k) — 사전 필터를 써도 전수 비교와 같은 결과"""
+        k = min(self.top_k, len(self.lat))
+        if self.geo is None:
+            cand, score = self._scores(w_lat, w_lon, distance_scale_km)
+            return _top(cand, score, k)
+        top = np.empty((len(w_lat), k), dtype='int64')
+        # 좌표가 없는(NaN) 기부 의사는 공간 인덱스로 조회할 수 없으므로 전수 비교
+        known = np.isfinite(w_lat) & np.isfinite(w_lon)
+        redo = np.flatnonzero(~known)
+        if known.any():
+            dist, ind = self.geo.query_knn(w_lat[known], w_lon[known], k=self.width)
+            cand = self.geo_idx[ind]
+            score = candidate_score(self.urgency[cand], dist, distance_scale_km)
+            top[known] = _top(cand, score, k)
+            # 필터 밖 요청의 점수 상한(최대 긴급도 − 필터 내 최대 거리)보다 k번째 점수가 낮으면 전수 비교
+            kth = np.sort(score, axis=1)[:, -k]
+            bound = self.urgency.max() - dist[:, -1] / distance_scale_km
+            redo = np.concatenate([np.flatnonzero(known)[kth < bound], redo])
+        if len(redo):
+            full_cand, full_score = self._scores(w_lat[redo], w_lon[redo], distance_scale_km)
+            top[redo] = _top(full_cand, full_score, k)
+        return top
+
+
+def _top(cand, score, k):
+    """행별 점수 내림차순(동점은 후보 순서) 상위 k개 후보"""
+    order = np.argsort(-score, axis=1, kind='stable')[:, :k]
+    return np.take_along_axis(cand, order, axis=1)
+
+
+def iter_candidate_pairs(wish_item, wish_lat, wish_lon, req_item, req_lat, req_lon, req_urgency,
+                         pos_wish, pos_req, top_k: int = DEFAULT_TOP_K, neg_ratio: float | None = None,
+                         seed: int | None = None, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                         distance_scale_km: float = DISTANCE_SCALE_KM):
+    """(기부 의사 행 번호, 요청 행 번호) 배열 쌍을 약 chunk_rows 행 단위로 생성
+
+    wish_item / req_item: 품목 코드(정수, 결측은 -1), *_lat / *_lon: 좌표(결측은 NaN)
+    pos_wish / pos_req: 양성 쌍의 행 번호(같은 품목만). 블록 구성과 난수 사용은 chunk_rows와
+    무관하므로 chunk_rows를 바꿔도 결과는 같습니다.
+    """
+    rng = np.random.default_rng(seed)
+    n_req = len(req_item)
+    pos_keys = np.unique(pos_wish.astype('int64') * n_req + pos_req)
+    pos_count = np.bincount(pos_wish, minlength=len(wish_item))
+    pos_order = np.argsort(pos_wish, kind='stable')
+    pos_wish, pos_req = pos_wish[pos_order], pos_req[pos_order]
+
+    # 품목별 행 번호(품목 코드 순, 품목 안에서는 원래 행 순서)
+    w_sorted = np.argsort(wish_item, kind='stable')
+    r_sorted = np.argsort(req_item, kind='stable')
+    items = np.intersect1d(wish_item[wish_item >= 0], req_item[req_item >= 0])
+    w_lo, w_hi = np.searchsorted(wish_item[w_sorted], [items, items + 1])
+    r_lo, r_hi = np.searchsorted(req_item[r_sorted], [items, items + 1])
+
+    buf_w, buf_r, buffered = [], [], 0
+    for i in range(len(items)):
+        W, R = w_sorted[w_lo[i]:w_hi[i]], r_sorted[r_lo[i]:r_hi[i]]
+        reqs = _ItemRequests(req_lat[R], req_lon[R], req_urgency[R], top_k)
+        block = max(1, BLOCK_CELLS // max(1, reqs.width))
+        for b0 in range(0, len(W), block):
+            Wb = W[b0:b0 + block]
+            picked = R[reqs.shortlist(wish_lat[Wb], wish_lon[Wb], distance_scale_km)]
+            rows = np.broadcast_to(Wb[:, None], picked.shape)
+            keep = ~np.isin(rows.astype('int64') * n_req + picked, pos_keys)
+            if neg_ratio is not None:
+                # 네거티브 무작위 추출: 행별 난수 순위 < 허용 개수
+                n_keep = np.ceil(neg_ratio * np.maximum(1, pos_count[Wb])).astype('int64')
+                prio = np.where(keep, rng.random(picked.shape), np.inf)
+                rank = np.argsort(np.argsort(prio, axis=1, kind='stable'), axis=1, kind='stable')
+                keep &= rank < n_keep[:, None]
+            # 블록 내 기부 의사의 양성 쌍(Wb는 오름차순)
+            p0, p1 = np.searchsorted(pos_wish, [Wb[0], Wb[-1] + 1])
+            in_block = np.isin(pos_wish[p0:p1], Wb)
+            bw = np.concatenate([rows[keep], pos_wish[p0:p1][in_block]])
+            br = np.concatenate([picked[keep], pos_req[p0:p1][in_block]])
+            order = np.argsort(bw, kind='stable')
+            buf_w.append(bw[order])
+            buf_r.append(br[order])
+            buffered += len(bw)
+            if buffered >= chunk_rows:
+                yield np.concatenate(buf_w), np.concatenate(buf_r)
+                buf_w, buf_r, buffered = [], [], 0
+    if buffered:
+        yield np.concatenate(buf_w), np.concatenate(buf_r)
@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""NumPy 기반 컬럼형 가상 데이터 생성 엔진
+
+`generate_fake_data.py`의 generate_* 함수는 행마다 dict를 만들고 random/Faker를
+필드별로 호출합니다. 이 모듈은 같은 분포를 유지하면서 테이블 전체의 각 컬럼을
+`numpy.random.Generator`로 한 번에 추출합니다.
+
+- 카테고리 가중치: 행별 가중치 행렬(기본 × 계절/재난유형/편의시설 보정)을 누적합 후 한 번에 추출
+- 인기도 가중 아이템/상태: samplers.AliasTable 일괄 추출(행당 O(1))
+- 수량 범위: 행별 (lo, hi) 배열을 만든 뒤 정수 균등 추출
+- 타임스탬프: Faker와 동일한 기간 문자열('-2y', '-6m', 'now')을 해석해 초 단위 균등 추출
+- Faker 문자열(이름/주소/전화번호/이메일/회사명): faker_pools의 디스크 캐시 값 풀에서 행 번호로 인덱스 샘플링
+
+반환값은 pandas DataFrame이며 as_arrow=True면 pyarrow.Table을 반환합니다.
+
+사용 예시:
+  rng = np.random.default_rng(42)
+  users = generate_users(rng, fake, 10000)
+"""
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from faker.providers.date_time import Provider as DateTimeProvider
+
+import faker_pools
+from generation_index import GenerationIndex
+from samplers import AliasTable
+from generate_fake_data import (
+    BASE_CATEGORIES, WISH_CATEGORY_WEIGHTS, WISH_SEASON_MULTIPLIERS,
+    REQUEST_CATEGORY_WEIGHTS, REQUEST_SEASON_MULTIPLIERS, DISASTER_CATEGORY_PREF,
+    WISH_STATUS_SAMPLER, REQUEST_STATUS_SAMPLER,
+    KO_LAT_MIN, KO_LAT_MAX, KO_LON_MIN, KO_LON_MAX,
+    wish_quantity_range,
+)
+
+CATEGORIES = [c for c, _ in BASE_CATEGORIES]
+SEASONS = ['겨울', '봄', '여름', '가을']
+# 월(1~12) → SEASONS 인덱스
+_MONTH_TO_SEASON = np.array([0, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0])
+
+
+def _finish(df: pd.DataFrame, as_arrow: bool):
+    if not as_arrow:
+        return df
+    import pyarrow as pa
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def make_ids(prefix: str, start: int, n: int) -> np.ndarray:
+    """make_id와 동일한 형식(prefix_000001)의 ID 배열"""
+    nums = np.char.zfill(np.arange(start, start + n).astype(str), 6)
+    return np.char.add(prefix + '_', nums).astype(object)
+
+
+def random_datetimes(rng: np.random.Generator, n: int, start_date='-30y', end_date='now') -> np.ndarray:
+    """fake.date_time_between과 동일한 구간에서 균등 추출한 datetime64[us] 배열"""
+    lo = DateTimeProvider._parse_date_time(start_date)
+    hi = DateTimeProvider._parse_date_time(end_date)
+    secs = rng.uniform(lo, hi, size=n)
+    return (secs * 1e6).astype('int64').astype('datetime64[us]')
+
+
+def random_dates(rng: np.random.Generator, n: int, start_date='-30y', end_date='today') -> np.ndarray:
+    """fake.date_between과 동일한 구간에서 균등 추출한 datetime64[D] 배열"""
+    lo = DateTimeProvider._parse_date(start_date).toordinal()
+    hi = DateTimeProvider._parse_date(end_date).toordinal()
+    epoch = date(1970, 1, 1).toordinal()
+    return (rng.integers(lo, hi + 1, size=n) - epoch).astype('datetime64[D]')
+
+
+def iso(values: np.ndarray) -> np.ndarray:
+    """datetime64 배열 → isoformat 문자열 배열"""
+    unit = 'D' if values.dtype == np.dtype('datetime64[D]') else 'us'
+    return np.datetime_as_string(values, unit=unit).astype(object)
+
+
+def add_days(values: np.ndarray, days: np.ndarray) -> np.ndarray:
+    return values + days.astype('timedelta64[D]')
+
+
+def season_index(values: np.ndarray) -> np.ndarray:
+    """datetime64 배열 → SEASONS 인덱스 배열"""
+    months = values.astype('datetime64[M]').astype('int64') % 12 + 1
+    return _MONTH_TO_SEASON[months]
+
+
+def weighted_choice(rng: np.random.Generator, weights: np.ndarray) -> np.ndarray:
+    """행별 가중치 행렬 (n, k)에서 각 행마다 하나의 열 인덱스를 추출
+
+    pick_category와 같이 누적합에서 r <= acc를 만족하는 첫 인덱스를 선택합니다.
+    """
+    cum = np.cumsum(weights, axis=1)
+    r = rng.random(len(weights)) * cum[:, -1]
+    idx = (cum < r[:, None]).sum(axis=1)
+    return np.minimum(idx, weights.shape[1] - 1)
+
+
+def ordered_sample_labels(rng: np.random.Generator, options: list, k) -> np.ndarray:
+    """random.sample(options, k)를 ','로 이어붙인 문자열을 행별로 추출
+
+    k는 정수 또는 행별 정수 배열이며, 길이는 k 배열(또는 정수 k일 때 1행)을 따릅니다.
+    """
+    k = np.atleast_1d(np.asarray(k))
+    n, m = len(k), len(options)
+    order = np.argsort(rng.random((n, m)), axis=1)
+    opts = np.array(options, dtype=object)
+    out = np.empty(n, dtype=object)
+    for kk in np.unique(k):
+        mask = k == kk
+        picked = opts[order[mask, :kk]]
+        out[mask] = [','.join(row) for row in picked]
+    return out
+
+
+def sample_pool(rng: np.random.Generator, pool: np.ndarray, n: int) -> np.ndarray:
+    return pool[rng.integers(0, len(pool), size=n)]
+
+
+def _category_matrix(n: int, base: dict) -> np.ndarray:
+    return np.tile(np.array([base.get(c, 0.0) for c in CATEGORIES], dtype='float64'), (n, 1))
+
+
+def _season_multiplier_table(multipliers: dict) -> np.ndarray:
+    table = np.ones((len(SEASONS), len(CATEGORIES)))
+    for season, mult in multipliers.items():
+        for cat, v in mult.items():
+            table[SEASONS.index(season), CATEGORIES.index(cat)] = v
+    return table
+
+
+def _item_arrays(relief_items):
+    items = pd.DataFrame(relief_items)
+    cat_idx = items['category'].map({c: i for i, c in enumerate(CATEGORIES)}).fillna(-1).astype(int).to_numpy()
+    return items, cat_idx
+
+
+def _pick_items_in_category(rng, chosen_cat, item_cat_idx, item_weights=None):
+    """카테고리별 아이템 풀 안에서 (가중)균등 추출. 빈 카테고리는 전체 풀 사용"""
+    n_items = len(item_cat_idx)
+    out = np.empty(len(chosen_cat), dtype='int64')
+    all_idx = np.arange(n_items)
+    for c in np.unique(chosen_cat):
+        mask = chosen_cat == c
+        pool = np.flatnonzero(item_cat_idx == c)
+        if len(pool) == 0:
+            pool = all_idx
+        if item_weights is None:
+            out[mask] = pool[rng.integers(0, len(pool), size=mask.sum())]
+        else:
+            out[mask] = pool[AliasTable(pool, item_weights[pool]).sample_indices(rng, mask.sum())]
+    return out
+
+
+def generate_users(rng: np.random.Generator, fake, count: int, start: int = 1,
+                   total: int | None = None, as_arrow: bool = False):
+    """generate_users의 컬럼형 버전
+
+    total은 전체 사용자 수로, public_officer 비율(0.1%) 계산에 사용됩니다(기본: count).
+    """
+    total = total or count
+    officer_count = max(1, int(total * 0.001))
+    uid_num = np.arange(start, start + count)
+    created = random_datetimes(rng, count, '-2y', 'now')
+    last_login = created + (rng.integers(0, 366, size=count) * 86400 * 10**6).astype('timedelta64[us]')
+    created_iso = iso(created)
+    pools = faker_pools.active()
+    df = pd.DataFrame({
+        'user_id': make_ids('user', start, count),
+        'email': pools.pick('safe_email', uid_num, 'users', suffix=True),
+        'user_type': np.where(uid_num <= officer_count, 'public_officer', 'general_user').astype(object),
+        'name': pools.pick('name', uid_num, 'users'),
+        'phone_number': pools.pick('phone_number', uid_num, 'users'),
+        'zipcode': pools.pick('postcode', uid_num, 'users'),
+        'road_address': pools.pick('address', uid_num, 'users'),
+        'address_detail': pools.pick('street_address', uid_num, 'users'),
+        'preferred_categories': '',
+        'created_at': created_iso,
+        'updated_at': created_iso,
+        'last_login_at': iso(last_login),
+    })
+    return _finish(df, as_arrow)
+
+
+def _manager_pool(users) -> np.ndarray:
+    """public_officer user_id 배열(없으면 첫 사용자, 사용자도 없으면 user_000001)"""
+    users_df = users if isinstance(users, pd.DataFrame) else pd.DataFrame(users)
+    if len(users_df) == 0:
+        return np.array(['user_000001'], dtype=object)
+    officers = users_df.loc[users_df['user_type'] == 'public_officer', 'user_id'].to_numpy(dtype=object)
+    return officers if len(officers) else users_df['user_id'].to_numpy(dtype=object)[:1]
+
+
+def generate_shelters(rng: np.random.Generator, fake, count: int, users, real_shelter_csv_path=None,
+                      as_arrow: bool = False):
+    """generate_shelters의 컬럼형 버전 - 실제 API 데이터가 있으면 그것만 사용"""
+    if real_shelter_csv_path and os.path.exists(real_shelter_csv_path):
+        try:
+            real_df = pd.read_csv(real_shelter_csv_path, encoding='utf-8-sig')
+            print(f"✅ 실제 대피소 데이터 {len(real_df)}개를 사용합니다 (가상 데이터 생성 안함)")
+            n = len(real_df)
+            df = pd.DataFrame({
+                'shelter_id': real_df['shelter_id'].to_numpy(dtype=object),
+                'manager_id': sample_pool(rng, _manager_pool(users), n),
+                'shelter_name': real_df['shelter_name'].to_numpy(dtype=object),
+                'disaster_type': real_df['disaster_type'].to_numpy(dtype=object),
+                'status': real_df['status'].to_numpy(dtype=object),
+                'address': real_df['address'].to_numpy(dtype=object),
+                'latitude': real_df['latitude'].astype(float).to_numpy(),
+                'longitude': real_df['longitude'].astype(float).to_numpy(),
+                'total_capacity': real_df['total_capacity'].astype(int).to_numpy(),
+                'current_occupancy': 0,
+                'occupancy_rate': 0.0,
+                'has_disabled_facility': real_df['has_disabled_facility'].astype(bool).to_numpy(),
+                'has_pet_zone': real_df['has_pet_zone'].astype(bool).to_numpy(),
+                'amenities': real_df['amenities'].astype(str).to_numpy(dtype=object),
+                'contact_person': real_df['contact_person'].astype(str).to_numpy(dtype=object),
+                'contact_phone': real_df['contact_phone'].astype(str).to_numpy(dtype=object),
+                'contact_email': real_df['contact_email'].astype(str).to_numpy(dtype=object),
+                'total_requests': 0,
+                'fulfilled_requests': 0,
+                'pending_requests': 0,
+                'created_at': real_df['created_at'].to_numpy(dtype=object),
+                'updated_at': real_df['updated_at'].to_numpy(dtype=object),
+            })
+        except Exception as e:
+            print(f"❌ 실제 대피소 데이터 로드 실패: {e}")
+            print(f"가상 데이터 {count}개로 대체 생성합니다")
+            df = generate_fake_shelters(rng, fake, count, users)
+    else:
+        print(f"실제 대피소 데이터가 없어 가상 데이터 {count}개를 생성합니다")
+        df = generate_fake_shelters(rng, fake, count, users)
+    print(f"총 대피소 데이터: {len(df)}개")
+    return _finish(df, as_arrow)
+
+
+def generate_fake_shelters(rng: np.random.Generator, fake, count: int, users, start: int = 1,
+                           as_arrow: bool = False):
+    """generate_fake_shelters의 컬럼형 버전"""
+    officers = _manager_pool(users)
+    created_iso = iso(random_datetimes(rng, count, '-2y', 'now'))
+    pools = faker_pools.active()
+    rows = np.arange(start, start + count)
+    df = pd.DataFrame({
+        'shelter_id': make_ids('shelter', start, count),
+        'manager_id': sample_pool(rng, officers, count),
+        'shelter_name': pools.pick('company', rows, 'shelters') + ' 대피소',
+        'disaster_type': rng.choice(np.array(['지진', '홍수', '태풍', '화재', '한파', '폭염'], dtype=object), size=count),
+        'status': rng.choice(np.array(['운영중', '포화', '폐쇄'], dtype=object), size=count),
+        'address': pools.pick('address', rows, 'shelters'),
+        'latitude': np.round(rng.uniform(KO_LAT_MIN, KO_LAT_MAX, size=count), 6),
+        'longitude': np.round(rng.uniform(KO_LON_MIN, KO_LON_MAX, size=count), 6),
+        'total_capacity': rng.integers(50, 1001, size=count),
+        'current_occupancy': 0,
+        'occupancy_rate': 0.0,
+        'has_disabled_facility': rng.random(count) < 0.5,
+        'has_pet_zone': rng.random(count) < 0.5,
+        'amenities': ordered_sample_labels(rng, ['의료실', '급식실', '샤워실', '휴게실'], np.full(count, 2)),
+        'contact_person': pools.pick('name', rows, 'shelters'),
+        'contact_phone': pools.pick('phone_number', rows, 'shelters'),
+        'contact_email': pools.pick('safe_email', rows, 'shelters'),
+        'total_requests': 0,
+        'fulfilled_requests': 0,
+        'pending_requests': 0,
+        'created_at': created_iso,
+        'updated_at': created_iso,
+    })
+    return _finish(df, as_arrow)
+
+
+def generate_user_donation_wishes(rng: np.random.Generator, count: int, users, relief_items,
+                                  start: int = 1, update_users: bool = True, as_arrow: bool = False):
+    """generate_user_donation_wishes의 컬럼형 버전
+
+    users가 DataFrame이고 update_users=True면 general_user의 preferred_categories 컬럼을 제자리 갱신합니다.
+    """
+    users_df = users if isinstance(users, pd.DataFrame) else pd.DataFrame(users)
+    general = np.flatnonzero(users_df['user_type'] == 'general_user') if len(users_df) else []
+    if len(general) == 0:
+        print("⚠️ general_user가 없어 기부 의사 데이터를 생성할 수 없습니다.")
+        return _finish(pd.DataFrame(), as_arrow)
+
+    items, item_cat = _item_arrays(relief_items)
+    ranges = np.array([wish_quantity_range(it) for it in relief_items], dtype='int64')
+
+    user_rows = general[rng.integers(0, len(general), size=count)]
+    created = random_datetimes(rng, count, '-6m', 'now')
+
+    # 가중치: 기본 × 계절 보정 × 기존 선호 카테고리(1.25배)
+    weights = _category_matrix(count, WISH_CATEGORY_WEIGHTS)
+    weights *= _season_multiplier_table(WISH_SEASON_MULTIPLIERS)[season_index(created)]
+    prefs = users_df['preferred_categories'].fillna('').astype(str).to_numpy()[user_rows]
+    if any(prefs):
+        for j, cat in enumerate(CATEGORIES):
+            has = np.array([cat in p.split(',') for p in prefs])
+            weights[has, j] *= 1.25
+
+    chosen_cat = weighted_choice(rng, weights)
+    item_rows = _pick_items_in_category(rng, chosen_cat, item_cat)
+
+    lo, hi = ranges[item_rows, 0], ranges[item_rows, 1]
+    qty = rng.integers(lo, hi + 1)
+    remaining = qty - rng.integers(0, qty + 1)
+    created_iso = iso(created)
+
+    df = pd.DataFrame({
+        'wish_id': make_ids('wish', start, count),
+        'user_id': users_df['user_id'].to_numpy(dtype=object)[user_rows],
+        'relief_item_id': items['item_id'].to_numpy(dtype=object)[item_rows],
+        'quantity': qty,
+        'status': WISH_STATUS_SAMPLER.sample(rng, count),
+        'matched_request_ids': '',
+        'total_matched_quantity': qty - remaining,
+        'remaining_quantity': remaining,
+        'created_at': created_iso,
+        'updated_at': created_iso,
+        'expires_at': iso(add_days(created, rng.integers(15, 121, size=count))),
+    })
+
+    # 사용자의 preferred_categories 업데이트
+    # (카테고리 집합을 비트마스크로 누적한 뒤 마스크별 문자열로 변환)
+    if update_users and isinstance(users, pd.DataFrame):
+        bits = np.zeros(len(users_df), dtype='int64')
+        np.bitwise_or.at(bits, user_rows, np.left_shift(1, item_cat[item_rows].clip(min=0)))
+        touched = np.flatnonzero(bits)
+        codes, inverse = np.unique(bits[touched], return_inverse=True)
+        labels = np.array([','.join(sorted(c for j, c in enumerate(CATEGORIES) if code >> j & 1)) for code in codes],
+                          dtype=object)
+        users.iloc[touched, users.columns.get_loc('preferred_categories')] = labels[inverse]
+    return _finish(df, as_arrow)
+
+
+def generate_shelter_relief_requests(rng: np.random.Generator, count: int, shelters, relief_items,
+                                     wishes=None, start: int = 1, item_popularity: dict | None = None,
+                                     as_arrow: bool = False):
+    """generate_shelter_relief_requests의 컬럼형 버전
+
+    item_popularity(relief_item_id → 기부 의사 수)가 있으면 wishes 대신 사용합니다.
+    """
+    sh = shelters if isinstance(shelters, pd.DataFrame) else pd.DataFrame(shelters)
+    items, item_cat = _item_arrays(relief_items)
+
+    # 기부 인기 아이템 가중치(아이템별 등장 횟수)
+    item_weights = None
+    pop = None
+    if item_popularity:
+        pop = pd.Series(item_popularity, dtype='float64')
+    elif wishes is not None and len(wishes):
+        wish_items = wishes['relief_item_id'] if isinstance(wishes, pd.DataFrame) else pd.Series([w.get('relief_item_id') for w in wishes])
+        pop = wish_items.value_counts()
+    if pop is not None:
+        item_weights = 1 + items['item_id'].map(pop).fillna(0).to_numpy(dtype='float64')
+
+    s_rows = rng.integers(0, len(sh), size=count)
+    capacity = sh['total_capacity'].to_numpy(dtype='int64')[s_rows]
+    disaster = sh['disaster_type'].to_numpy(dtype=object)[s_rows]
+    created = random_datetimes(rng, count, '-3m', 'now')
+
+    # 가중치 구성: 기본 + 재난유형 + 편의시설 + 계절
+    weights = _category_matrix(count, REQUEST_CATEGORY_WEIGHTS)
+    for dtype_name, pref in DISASTER_CATEGORY_PREF.items():
+        mask = disaster == dtype_name
+        for cat, v in pref.items():
+            weights[mask, CATEGORIES.index(cat)] *= v
+    pet = sh['has_pet_zone'].fillna(False).astype(bool).to_numpy()[s_rows]
+    disabled = sh['has_disabled_facility'].fillna(False).astype(bool).to_numpy()[s_rows]
+    weights[pet, CATEGORIES.index('반려동물')] *= 2.0
+    weights[disabled, CATEGORIES.index('의약품')] *= 1.3
+    weights *= _season_multiplier_table(REQUEST_SEASON_MULTIPLIERS)[season_index(created)]
+
+    chosen_cat = weighted_choice(rng, weights)
+    item_rows = _pick_items_in_category(rng, chosen_cat, item_cat, item_weights)
+
+    # request_quantity_range의 벡터화
+    base_need = np.maximum(10, (capacity * 0.1).astype('int64'))
+    cat_name = np.array(CATEGORIES, dtype=object)[chosen_cat]
+    conds = [
+        np.isin(cat_name, ['식량', '생활용품']),
+        np.isin(cat_name, ['의류', '침구류']),
+        np.isin(cat_name, ['의약품', '개인위생']),
+        np.isin(cat_name, ['주방용품', '전자용품']),
+    ]
+    lo = np.select(conds, [base_need, base_need // 2, base_need // 2, np.maximum(5, base_need // 3)],
+                   np.maximum(5, base_need // 3))
+    hi = np.select(conds, [base_need * 5, base_need * 2, (base_need * 2.5).astype('int64'),
+                           np.maximum(20, (base_need * 1.2).astype('int64'))], base_need)
+    requested = rng.integers(lo, hi + 1)
+    current_stock = rng.integers(0, np.maximum(0, requested // 3) + 1)
+    urgent_gap = requested - current_stock
+    urgent = np.maximum(0, urgent_gap - rng.integers(0, urgent_gap + 1))
+
+    # 긴급도 계산(잔여 비율 기반)
+    remain = np.maximum(0, requested - current_stock)
+    remain_ratio = remain / np.maximum(1, requested)
+    urgency_level = np.where(remain_ratio >= 0.7, '높음', np.where(remain_ratio >= 0.4, '중간', '낮음')).astype(object)
+    created_iso = iso(created)
+
+    df = pd.DataFrame({
+        'request_id': make_ids('request', start, count),
+        'shelter_id': sh['shelter_id'].to_numpy(dtype=object)[s_rows],
+        'relief_item_id': items['item_id'].to_numpy(dtype=object)[item_rows],
+        'requested_quantity': requested,
+        'current_stock': current_stock,
+        'urgent_quantity': urgent,
+        'urgency_level': urgency_level,
+        'needed_by': iso(add_days(created, rng.integers(1, 31, size=count))),
+        'status': REQUEST_STATUS_SAMPLER.sample(rng, count),
+        'notes': pd.Series(disaster).astype(str).to_numpy(dtype=object) + ' 상황 대비 요청',
+        'matched_wish_ids': '',
+        'total_matched_quantity': 0,
+        'remaining_quantity': remain,
+        'created_at': created_iso,
+        'updated_at': created_iso,
+    })
+    return _finish(df, as_arrow)
+
+
+def generate_consumption_info(rng: np.random.Generator, count: int, shelters, incidents, relief_items,
+                              matches, start: int = 1, index: GenerationIndex | None = None, as_arrow: bool = False):
+    """generate_consumption_info의 컬럼형 버전"""
+    sh = shelters if isinstance(shelters, pd.DataFrame) else pd.DataFrame(shelters)
+    m = matches if isinstance(matches, pd.DataFrame) else pd.DataFrame(matches)
+
+    # 매칭 완료된 데이터만 소비 정보 생성
+    completed = m[m['status'].isin(['배송완료', '검수완료'])] if len(m) else m
+    if len(completed):
+        rows = rng.integers(0, len(completed), size=count)
+        shelter_id = completed['shelter_id'].to_numpy(dtype=object)[rows]
+        item_id = completed['relief_item_id'].to_numpy(dtype=object)[rows]
+        base_quantity = completed['matched_quantity'].to_numpy(dtype='int64')[rows]
+    else:
+        # fallback: 랜덤 생성
+        item_ids = np.array([it['item_id'] for it in relief_items], dtype=object)
+        shelter_id = sh['shelter_id'].to_numpy(dtype=object)[rng.integers(0, len(sh), size=count)]
+        item_id = item_ids[rng.integers(0, len(item_ids), size=count)]
+        base_quantity = rng.integers(10, 101, size=count)
+
+    # 관련 재난 사건: 대피소가 포함된 첫 번째 사건
+    if index is None:
+        index = GenerationIndex(incidents=incidents)
+    first_incident = {sid: ids[0] for sid, ids in index.incident_ids_by_shelter.items()}
+    related = pd.Series(shelter_id).map(first_incident).fillna('').to_numpy(dtype=object)
+
+    start_date = random_dates(rng, count, '-10y', '-1d')
+    duration = rng.integers(1, 31, size=count)
+    end_date = add_days(start_date, duration)
+
+    consumed = rng.integers((base_quantity * 0.8).astype('int64'), (base_quantity * 1.2).astype('int64') + 1)
+    daily_rate = np.round(consumed / np.maximum(1, duration), 2)
+
+    # 대피소 정보(없으면 첫 번째 대피소)
+    sh_pos = pd.Series(np.arange(len(sh)), index=sh['shelter_id'])
+    sh_pos = sh_pos[~sh_pos.index.duplicated()]
+    s_rows = pd.Series(shelter_id).map(sh_pos).fillna(0).astype(int).to_numpy()
+    capacity = sh['total_capacity'].fillna(0).astype('int64').to_numpy()[s_rows]
+    upper = np.maximum(0, capacity)
+    lower = np.minimum(np.where(capacity < 10, 0, 10), upper)
+    occupancy = rng.integers(lower, upper + 1)
+    end_iso = iso(end_date)
+
+    df = pd.DataFrame({
+        'consumption_id': make_ids('consumption', start, count),
+        'shelter_id': shelter_id,
+        'disaster_incident_id': related,
+        'relief_item_id': item_id,
+        'consumed_quantity': consumed,
+        'start_date': iso(start_date),
+        'end_date': end_iso,
+        'duration_days': duration,
+        'daily_consumption_rate': daily_rate,
+        'peak_consumption_day': rng.integers(1, duration + 1),
+        'peak_consumption_quantity': rng.integers(daily_rate.astype('int64'), (daily_rate * 2).astype('int64') + 1),
+        'remain_item': rng.integers(0, (base_quantity * 0.2).astype('int64') + 1),
+        'shelter_occupancy': occupancy,
+        'occupancy_rate': np.round(occupancy / np.maximum(1, capacity), 2),
+        'disaster_severity': rng.choice(np.array(['낮음', '중간', '높음'], dtype=object), size=count),
+        'weather_conditions': rng.choice(np.array(['더위', '추위', '비', '눈', '일반'], dtype=object), size=count),
+        'special_circumstances': ordered_sample_labels(rng, ['어린이 다수', '고령자 포함', '장애인 포함', '반려동물 포함'],
+                                                       rng.integers(1, 4, size=count)),
+        'waste_rate': np.round(rng.uniform(0, 0.15, size=count), 3),
+        'satisfaction_score': np.round(rng.uniform(2.0, 5.0, size=count), 1),
+        'adequacy_level': rng.choice(np.array(['부족', '적정', '충분', '과다'], dtype=object), size=count),
+        'restock_frequency': rng.integers(0, 6, size=count),
+        'seasonality': np.array(SEASONS, dtype=object)[season_index(start_date)],
+        'children_ratio': np.round(rng.uniform(0, 0.4, size=count), 2),
+        'elderly_ratio': np.round(rng.uniform(0, 0.3, size=count), 2),
+        'disabled_ratio': np.round(rng.uniform(0, 0.15, size=count), 2),
+        'accessibility_score': np.round(rng.uniform(2.0, 5.0, size=count), 1),
+        'distribution_efficiency': np.round(rng.uniform(0.6, 1.0, size=count), 2),
+        'recorded_by': sh['manager_id'].to_numpy(dtype=object)[s_rows],
+        'created_at': end_iso,
+        'updated_at': end_iso,
+    })
+    return _finish(df, as_arrow)
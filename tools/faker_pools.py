@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Faker 값 풀(이름/주소/전화번호/이메일/회사명) — 디스크 캐시 + 벡터화 인덱스 샘플링
+
+Faker(ko_KR) 호출은 행 단위 생성에서 가장 느린 부분입니다(사용자 1행당 약 250µs).
+필드마다 size개 값을 한 번만 만들어 디스크에 캐시하고, 행은 인덱스로 값을 가져옵니다.
+
+- 캐시: tools/.faker_cache/faker-<버전>/<locale>_s<seed>_n<size>_<field>.npy
+  (Faker 버전/로케일/시드/크기가 같으면 재사용. np.load(mmap_mode='r')로 열어 여러 프로세스가
+  같은 페이지 캐시를 공유하며, 쓰기는 임시 파일 → os.replace로 원자적)
+- 샘플링: 인덱스 = hash(샘플링 시드, 필드, salt, 행 번호) % size (splitmix64, NumPy 벡터화).
+  행 번호만으로 정해지므로 배치/샤드 분할과 전역 random 흐름에 영향을 주지 않고 받지도 않습니다.
+- suffix=True: 행 번호를 값에 섞어 고유하게 만듭니다(이메일은 '@' 앞, 그 외는 뒤에 붙임).
+
+generate_* 함수는 active()로 현재 설정된 풀을 사용합니다. main/샤드 워커는 configure로
+--seed / --faker_pool_size를 반영합니다(seed가 없으면 풀 내용은 시드 0 캐시, 샘플링 시드만 무작위).
+
+사용 예시:
+  pools = configure(locale='ko_KR', seed=42, size=10000)
+  names = pools.pick('name', np.arange(1, 1001), salt='users')
+"""
+import os
+import random
+import hashlib
+
+import numpy as np
+
+DEFAULT_POOL_SIZE = 10_000
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.faker_cache')
+# 풀 필드 → (Faker 메서드, 후처리)
+FIELDS = {
+    'name': ('name', None),
+    'safe_email': ('safe_email', None),
+    'phone_number': ('phone_number', None),
+    'postcode': ('postcode', None),
+    'street_address': ('street_address', None),
+    'address': ('address', lambda v: v.split('\n')[0]),
+    'company': ('company', None),
+}
+
+_ACTIVE = None
+
+
+def _seed64(*parts) -> int:
+    digest = hashlib.sha256(':'.join(str(p) for p in parts).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'little')
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """uint64 배열 해시(오버플로는 2^64 모듈러로 감김)"""
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def with_suffix(values: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """값에 행 번호를 섞어 고유하게(이메일은 로컬 파트 끝, 그 외는 값 끝)"""
+    return np.array([f'{v[:v.index("@")]}{r}{v[v.index("@"):]}' if '@' in v else f'{v}{r}'
+                     for v, r in zip(values, rows.tolist())], dtype=object)
+
+
+class FakerPools:
+    def __init__(self, locale: str = 'ko_KR', seed: int | None = None, size: int = DEFAULT_POOL_SIZE,
+                 cache_dir: str | None = DEFAULT_CACHE_DIR, sample_seed: int | None = None):
+        if size <= 0:
+            raise ValueError(f'풀 크기는 1 이상이어야 합니다: {size}')
+        self.locale = locale
+        self.seed = seed
+        self.size = int(size)
+        self.cache_dir = cache_dir
+        # 풀 내용은 seed(없으면 0)로 고정, 샘플링은 seed가 없으면 실행마다 무작위
+        self.pool_seed = seed if seed is not None else 0
+        if sample_seed is None:
+            sample_seed = seed if seed is not None else random.getrandbits(63)
+        self.sample_seed = sample_seed
+        self._pools = {}
+
+    def config(self) -> dict:
+        """샤드 워커에 넘길 설정(같은 풀/샘플링 재현)"""
+        return {'locale': self.locale, 'seed': self.seed, 'size': self.size, 'cache_dir': self.cache_dir,
+                'sample_seed': self.sample_seed}
+
+    def _cache_path(self, field: str) -> str:
+        import faker
+        return os.path.join(self.cache_dir, f'faker-{faker.VERSION}',
+                            f'{self.locale}_s{self.pool_seed}_n{self.size}_{field}.npy')
+
+    def _build(self, field: str) -> np.ndarray:
+        from faker import Faker
+        method, transform = FIELDS[field]
+        fake = Faker(self.locale)
+        # 필드별 독립 시드 → 필드를 만드는 순서와 무관하게 같은 풀
+        fake.seed_instance(_seed64(self.locale, self.pool_seed, field))
+        fn = getattr(fake, method)
+        values = [fn() for _ in range(self.size)]
+        if transform is not None:
+            values = [transform(v) for v in values]
+        return np.array(values, dtype=str)
+
+    def get(self, field: str) -> np.ndarray:
+        """필드 풀(size개 문자열 배열). 메모리 → 디스크 캐시 → 생성 순"""
+        if field not in FIELDS:
+            raise ValueError(f"지원하지 않는 Faker 풀 필드: {field} (지원: {', '.join(FIELDS)})")
+        if field in self._pools:
+            return self._pools[field]
+        pool = None
+        path = self._cache_path(field) if self.cache_dir else None
+        if path and os.path.exists(path):
+            try:
+                pool = np.load(path, mmap_mode='r', allow_pickle=False)
+            except (OSError, ValueError):
+                pool = None  # 손상된 캐시는 다시 생성
+            if pool is not None and len(pool) != self.size:
+                pool = None
+        if pool is None:
+            pool = self._build(field)
+            if path:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f'{path}.{os.getpid()}.tmp'
+                with open(tmp, 'wb') as f:
+                    np.save(f, pool, allow_pickle=False)
+                os.replace(tmp, path)
+        self._pools[field] = pool
+        return pool
+
+    def warm(self, fields=None) -> 'FakerPools':
+        """필드 풀을 미리 로드/생성(워커 생성 전에 호출하면 캐시 생성이 한 번만 일어남)"""
+        for field in fields or FIELDS:
+            self.get(field)
+        return self
+
+    def indices(self, field: str, rows, salt: str = '') -> np.ndarray:
+        rows = np.asarray(rows, dtype='int64').astype('uint64')
+        key = np.uint64(_seed64(self.sample_seed, field, salt))
+        return (_splitmix64(rows ^ key) % np.uint64(self.size)).astype('int64')
+
+    def pick(self, field: str, rows, salt: str = '', suffix: bool = False) -> np.ndarray:
+        """행 번호 배열 → 필드 값(object 배열). salt로 테이블/컬럼마다 다른 값을 고름"""
+        rows = np.asarray(rows, dtype='int64')
+        values = self.get(field)[self.indices(field, rows, salt)].astype(object)
+        return with_suffix(values, rows) if suffix else values
+
+
+def configure(locale: str = 'ko_KR', seed: int | None = None, size: int = DEFAULT_POOL_SIZE,
+              cache_dir: str | None = DEFAULT_CACHE_DIR, config: dict | None = None) -> FakerPools:
+    """이후 generate_* 함수가 사용할 풀 설정(config가 있으면 FakerPools.config() 결과를 그대로 사용)"""
+    global _ACTIVE
+    _ACTIVE = FakerPools(**config) if config else FakerPools(locale, seed, size, cache_dir)
+    return _ACTIVE
+
+
+def active() -> FakerPools:
+    """현재 풀(설정 전이면 기본값으로 설정)"""
+    return _ACTIVE if _ACTIVE is not None else configure()
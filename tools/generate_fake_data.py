@@ -10,13 +10,19 @@ JSON 파일로 출력합니다. 실제 대피소 데이터와 연계하여 유
 출력: 프로젝트 루트의 output/ 폴더에 각 테이블별 json 파일 생성
 """
 import argparse
-import json
 import os
 import random
 import math
 from datetime import datetime, timedelta, timezone
 from faker import Faker
 
+import faker_pools
+from generation_index import GenerationIndex
+from geo_index import ShelterGeoIndex
+from matching import MatchingEngine, urgency_rank
+from samplers import AliasTable, SamplerCache
+from sinks import FORMAT_EXTENSIONS, write_table
+
 
 KO_LAT_MIN, KO_LAT_MAX = 33.0, 38.6
 KO_LON_MIN, KO_LON_MAX = 124.6, 131.9
@@ -35,6 +41,122 @@ def make_id(prefix, i):
     return f"{prefix}_{i:06d}"
 
 
+# 구호품 카테고리 트리(카테고리 → 하위 카테고리)
+BASE_CATEGORIES = [
+    ('식량', ['즉석식품', '통조림', '가공식품', '음료수', '이유식', '건조식품', '비상식량']),
+    ('생활용품', ['화장지', '위생용품', '세제', '샴푸', '칫솔', '수건', '비누', '기저귀']),
+    ('의류', ['아우터', '내의', '양말', '신발', '모자', '장갑', '우의', '담요']),
+    ('의약품', ['기본구급', '상처치료', '해열제', '소화제', '감기약', '연고', '붕대', '소독약']),
+    ('침구류', ['이불', '베개', '매트리스', '수면용품', '침낭', '요', '텐트', '방수포']),
+    ('전자용품', ['휴대폰충전기', '손전등', '라디오', '배터리', '보조배터리', '선풍기', '전열기구']),
+    ('주방용품', ['일회용식기', '컵', '물통', '보온병', '가스버너', '라이터', '냄비', '젓가락']),
+    ('개인위생', ['마스크', '손소독제', '생리용품', '면도기', '휴지', '물티슈', '샤워용품']),
+    ('교육/오락', ['학용품', '도서', '장난감', '색연필', '공책', '게임', '퍼즐', '체육용품']),
+    ('반려동물', ['사료', '간식', '목줄', '배변패드', '장난감', '이동장', '의료용품', '급수대'])
+]
+
+# 기부 의사 카테고리별 기본 가중치(현실 비율 가정)
+WISH_CATEGORY_WEIGHTS = {
+    '식량': 0.32,
+    '생활용품': 0.18,
+    '의류': 0.08,
+    '의약품': 0.15,
+    '침구류': 0.06,
+    '전자용품': 0.04,
+    '주방용품': 0.05,
+    '개인위생': 0.07,
+    '교육/오락': 0.03,
+    '반려동물': 0.02,
+}
+
+# 기부 의사 계절 보정치(겨울엔 침구/의류/의약품↑, 여름엔 생활용품/개인위생/음료↑)
+WISH_SEASON_MULTIPLIERS = {
+    '겨울': {'침구류': 1.8, '의류': 1.4, '의약품': 1.2},
+    '여름': {'개인위생': 1.5, '생활용품': 1.2, '식량': 1.1},
+}
+
+# 대피소 요청 카테고리별 기본 가중치
+REQUEST_CATEGORY_WEIGHTS = {
+    '식량': 0.30,
+    '생활용품': 0.17,
+    '의류': 0.08,
+    '의약품': 0.15,
+    '침구류': 0.06,
+    '전자용품': 0.05,
+    '주방용품': 0.06,
+    '개인위생': 0.08,
+    '교육/오락': 0.03,
+    '반려동물': 0.02,
+}
+
+# 재난유형→선호 카테고리 맵
+DISASTER_CATEGORY_PREF = {
+    '지진': {'의약품': 1.5, '침구류': 1.3, '식량': 1.2},
+    '홍수': {'개인위생': 1.6, '생활용품': 1.3, '식량': 1.2},
+    '태풍': {'식량': 1.3, '주방용품': 1.2, '전자용품': 1.1},
+    '화재': {'의약품': 1.6, '의류': 1.3, '침구류': 1.2},
+    '한파': {'침구류': 1.8, '의류': 1.4, '의약품': 1.2},
+    '폭염': {'개인위생': 1.6, '식량': 1.2, '전자용품': 1.1},
+}
+
+# 대피소 요청 계절 보정치
+REQUEST_SEASON_MULTIPLIERS = {
+    '겨울': {'침구류': 1.7, '의류': 1.3},
+    '여름': {'개인위생': 1.5, '생활용품': 1.2},
+}
+
+STATUS_CHOICES = ['대기중', '매칭완료', '배송중', '완료', '취소']
+WISH_STATUS_WEIGHTS = [0.45, 0.2, 0.15, 0.15, 0.05]
+REQUEST_STATUS_WEIGHTS = [0.5, 0.2, 0.15, 0.1, 0.05]
+WISH_STATUS_SAMPLER = AliasTable(STATUS_CHOICES, WISH_STATUS_WEIGHTS)
+REQUEST_STATUS_SAMPLER = AliasTable(STATUS_CHOICES, REQUEST_STATUS_WEIGHTS)
+
+
+def get_season(dt):
+    """월 기준 계절 판단"""
+    m = dt.month
+    if m in (12, 1, 2):
+        return '겨울'
+    if m in (3, 4, 5):
+        return '봄'
+    if m in (6, 7, 8):
+        return '여름'
+    return '가을'
+
+
+def wish_quantity_range(item):
+    """아이템 단위/카테고리에 따른 기부 수량 범위"""
+    cat = item['category']
+    unit = item.get('unit', '')
+    if cat in ['식량', '생활용품']:
+        return (10, 120) if unit in ['개', '팩'] else (2, 20)
+    if cat in ['의류', '침구류']:
+        return (2, 40)
+    if cat in ['전자용품', '주방용품']:
+        return (1, 15)
+    if cat in ['의약품']:
+        return (5, 60)
+    if cat in ['개인위생']:
+        return (10, 100)
+    if cat in ['교육/오락', '반려동물']:
+        return (1, 20)
+    return (1, 30)
+
+
+def request_quantity_range(cat, capacity):
+    """대피소 수용규모/카테고리에 따른 요청 수량 범위"""
+    base_need = max(10, int(capacity * 0.1))
+    if cat in ['식량', '생활용품']:
+        return (base_need, base_need * 5)
+    if cat in ['의류', '침구류']:
+        return (base_need // 2, base_need * 2)
+    if cat in ['의약품', '개인위생']:
+        return (base_need // 2, int(base_need * 2.5))
+    if cat in ['주방용품', '전자용품']:
+        return (max(5, base_need // 3), max(20, int(base_need * 1.2)))
+    return (max(5, base_need // 3), base_need)
+
+
 def calculate_distance(lat1, lon1, lat2, lon2):
     """두 지점 간의 거리를 계산 (단위: km)"""
     R = 6371  # 지구 반지름 (km)
@@ -53,20 +175,31 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     return R * c
 
 
-def generate_users(fake, count):
-    """사용자 데이터 생성 - public_officer와 general_user 비율 조정"""
+def generate_users(fake, count, start=1, total=None):
+    """사용자 데이터 생성 - public_officer와 general_user 비율 조정
+    - start: 첫 user_id 번호(샤드 생성 시 오프셋), total: 관리자 비율 계산 기준 전체 사용자 수
+    - 이름/이메일/전화번호/주소는 faker_pools 값 풀에서 user 번호로 선택(이메일은 번호를 섞어 고유)
+    """
     users = []
     # public_officer는 0.1%, general_user는 99.9%
-    officer_count = max(1, int(count * 0.001))
+    officer_count = max(1, int((total or count) * 0.001))
+    pools = faker_pools.active()
+    rows = range(start, start + count)
+    names = pools.pick('name', rows, 'users')
+    emails = pools.pick('safe_email', rows, 'users', suffix=True)
+    phones = pools.pick('phone_number', rows, 'users')
+    zipcodes = pools.pick('postcode', rows, 'users')
+    addrs = pools.pick('street_address', rows, 'users')
+    road_addrs = pools.pick('address', rows, 'users')
     
-    for i in range(1, count + 1):
+    for j, i in enumerate(rows):
         uid = make_id('user', i)
-        name = fake.name()
-        email = fake.safe_email()
-        phone = fake.phone_number()
-        zipcode = fake.postcode()
-        addr = fake.street_address()
-        road_addr = fake.address().split('\n')[0]
+        name = names[j]
+        email = emails[j]
+        phone = phones[j]
+        zipcode = zipcodes[j]
+        addr = addrs[j]
+        road_addr = road_addrs[j]
         created = fake.date_time_between(start_date='-2y', end_date='now')
         
         # 관리자/일반 사용자 비율 조정
@@ -91,19 +224,8 @@ def generate_users(fake, count):
 
 def generate_relief_items(fake, count):
     """구호품 데이터 생성 - 재난 상황에 맞춘 다양한 카테고리"""
-    base_categories = [
-        ('식량', ['즉석식품', '통조림', '가공식품', '음료수', '이유식', '건조식품', '비상식량']),
-        ('생활용품', ['화장지', '위생용품', '세제', '샴푸', '칫솔', '수건', '비누', '기저귀']),
-        ('의류', ['아우터', '내의', '양말', '신발', '모자', '장갑', '우의', '담요']),
-        ('의약품', ['기본구급', '상처치료', '해열제', '소화제', '감기약', '연고', '붕대', '소독약']),
-        ('침구류', ['이불', '베개', '매트리스', '수면용품', '침낭', '요', '텐트', '방수포']),
-        ('전자용품', ['휴대폰충전기', '손전등', '라디오', '배터리', '보조배터리', '선풍기', '전열기구']),
-        ('주방용품', ['일회용식기', '컵', '물통', '보온병', '가스버너', '라이터', '냄비', '젓가락']),
-        ('개인위생', ['마스크', '손소독제', '생리용품', '면도기', '휴지', '물티슈', '샤워용품']),
-        ('교육/오락', ['학용품', '도서', '장난감', '색연필', '공책', '게임', '퍼즐', '체육용품']),
-        ('반려동물', ['사료', '간식', '목줄', '배변패드', '장난감', '이동장', '의료용품', '급수대'])
-    ]
-    
+    base_categories = BASE_CATEGORIES
+
     items = []
     i = 1
     
@@ -215,13 +337,22 @@ def generate_shelters(fake, count, users, real_shelter_csv_path=None):
 
 
 def generate_fake_shelters(fake, count, users):
-    """가상 대피소 데이터만 생성하는 함수"""
+    """가상 대피소 데이터만 생성하는 함수
+    - 대피소명/주소/담당자 연락처는 faker_pools 값 풀에서 shelter 번호로 선택
+    """
     shelters = []
     public_officers = [u for u in users if u['user_type'] == 'public_officer']
     if not public_officers:
         public_officers = [users[0]] if users else []
+    pools = faker_pools.active()
+    rows = range(1, count + 1)
+    companies = pools.pick('company', rows, 'shelters')
+    addresses = pools.pick('address', rows, 'shelters')
+    contacts = pools.pick('name', rows, 'shelters')
+    phones = pools.pick('phone_number', rows, 'shelters')
+    emails = pools.pick('safe_email', rows, 'shelters')
         
-    for i in range(1, count + 1):
+    for j, i in enumerate(rows):
         sid = make_id('shelter', i)
         manager = random.choice(public_officers)['user_id'] if public_officers else make_id('user', 1)
         lat, lon = rand_coords()
@@ -231,10 +362,10 @@ def generate_fake_shelters(fake, count, users):
         shelters.append({
             'shelter_id': sid,
             'manager_id': manager,
-            'shelter_name': fake.company() + ' 대피소',
+            'shelter_name': companies[j] + ' 대피소',
             'disaster_type': random.choice(['지진', '홍수', '태풍', '화재', '한파', '폭염']),
             'status': random.choice(['운영중', '포화', '폐쇄']),
-            'address': fake.address().split('\n')[0],
+            'address': addresses[j],
             'latitude': lat,
             'longitude': lon,
             'total_capacity': total_capacity,
@@ -243,9 +374,9 @@ def generate_fake_shelters(fake, count, users):
             'has_disabled_facility': random.choice([True, False]),
             'has_pet_zone': random.choice([True, False]),
             'amenities': ','.join(random.sample(['의료실', '급식실', '샤워실', '휴게실'], k=2)),
-            'contact_person': fake.name(),
-            'contact_phone': fake.phone_number(),
-            'contact_email': fake.safe_email(),
+            'contact_person': contacts[j],
+            'contact_phone': phones[j],
+            'contact_email': emails[j],
             'total_requests': 0,      # 초기값 0
             'fulfilled_requests': 0,  # 초기값 0  
             'pending_requests': 0,    # 초기값 0
@@ -256,11 +387,14 @@ def generate_fake_shelters(fake, count, users):
     return shelters
 
 
-def generate_user_donation_wishes(fake, count, users, relief_items):
+def generate_user_donation_wishes(fake, count, users, relief_items, start=1, update_users=True):
     """기부 의사 데이터 생성 - general_user만 기부 가능
     - 구호품 카테고리 다양성 반영(가중치)
     - 계절성 반영(여름/겨울 수요 차등)
     - 아이템 단위/카테고리에 따른 수량 범위 정교화
+    - start: 첫 wish_id 번호(샤드 생성 시 오프셋)
+    - update_users=False면 users의 preferred_categories를 갱신하지 않음(배치 생성 시 호출 측에서 누적)
+    - 카테고리 가중치는 (계절, 선호 카테고리) 구성별 alias 테이블로 캐시해 행당 O(1) 추출
     """
     wishes = []
 
@@ -270,67 +404,27 @@ def generate_user_donation_wishes(fake, count, users, relief_items):
         print("⚠️ general_user가 없어 기부 의사 데이터를 생성할 수 없습니다.")
         return []
 
-    # 계절 판단 도우미
-    def get_season(dt: datetime):
-        m = dt.month
-        if m in (12, 1, 2):
-            return '겨울'
-        if m in (3, 4, 5):
-            return '봄'
-        if m in (6, 7, 8):
-            return '여름'
-        return '가을'
-
-    # 카테고리별 기본 가중치(현실 비율 가정)
-    base_weights = {
-        '식량': 0.32,
-        '생활용품': 0.18,
-        '의류': 0.08,
-        '의약품': 0.15,
-        '침구류': 0.06,
-        '전자용품': 0.04,
-        '주방용품': 0.05,
-        '개인위생': 0.07,
-        '교육/오락': 0.03,
-        '반려동물': 0.02,
-    }
-
     # 아이템 인덱싱
     items_by_category = {}
     for it in relief_items:
         items_by_category.setdefault(it['category'], []).append(it)
 
-    # 사용자별 선호 카테고리 추적
-    user_categories = {}
-
-    def pick_category(weights: dict):
-        total = sum(weights.values())
-        r = random.random() * total
-        acc = 0.0
-        for k, w in weights.items():
-            acc += w
-            if r <= acc:
-                return k
-        return list(weights.keys())[-1]
-
-    def quantity_range_for(item):
-        cat = item['category']
-        unit = item.get('unit', '')
-        if cat in ['식량', '생활용품']:
-            return (10, 120) if unit in ['개', '팩'] else (2, 20)
-        if cat in ['의류', '침구류']:
-            return (2, 40)
-        if cat in ['전자용품', '주방용품']:
-            return (1, 15)
-        if cat in ['의약품']:
-            return (5, 60)
-        if cat in ['개인위생']:
-            return (10, 100)
-        if cat in ['교육/오락', '반려동물']:
-            return (1, 20)
-        return (1, 30)
+    def category_weights(season, preferred):
+        # 카테고리별 기본 가중치(현실 비율 가정)
+        weights = dict(WISH_CATEGORY_WEIGHTS)
+        # 계절 보정치(겨울엔 침구/의류/의약품↑, 여름엔 생활용품/개인위생/음료↑)
+        for k, v in WISH_SEASON_MULTIPLIERS.get(season, {}).items():
+            weights[k] *= v
+        # 사용자의 기존 선호가 있으면 해당 카테고리를 소폭 가중
+        if preferred:
+            for pc in preferred.split(','):
+                if pc in weights:
+                    weights[pc] *= 1.25
+        return AliasTable.from_weights(weights)
+
+    category_sampler = SamplerCache(category_weights)
 
-    for i in range(1, count + 1):
+    for i in range(start, start + count):
         wid = make_id('wish', i)
         user = random.choice(general_users)
         user_id = user['user_id']
@@ -338,43 +432,23 @@ def generate_user_donation_wishes(fake, count, users, relief_items):
         created = fake.date_time_between(start_date='-6m', end_date='now')
         season = get_season(created)
 
-        # 계절 보정치(겨울엔 침구/의류/의약품↑, 여름엔 생활용품/개인위생/음료↑)
-        weights = dict(base_weights)
-        if season == '겨울':
-            weights['침구류'] *= 1.8
-            weights['의류'] *= 1.4
-            weights['의약품'] *= 1.2
-        elif season == '여름':
-            weights['개인위생'] *= 1.5
-            weights['생활용품'] *= 1.2
-            weights['식량'] *= 1.1
-
-        # 사용자의 기존 선호가 있으면 해당 카테고리를 소폭 가중
-        if user.get('preferred_categories'):
-            for pc in user['preferred_categories'].split(','):
-                if pc in weights:
-                    weights[pc] *= 1.25
-
-        # 카테고리 선택 후 아이템 선택
-        chosen_category = pick_category(weights)
+        # 카테고리 선택(계절/선호 카테고리 반영) 후 아이템 선택
+        chosen_category = category_sampler(season, user.get('preferred_categories') or '').draw()
         pool = items_by_category.get(chosen_category) or relief_items
         item = random.choice(pool)
 
         # 수량 결정
-        lo, hi = quantity_range_for(item)
+        lo, hi = wish_quantity_range(item)
         qty = random.randint(lo, hi)
 
         remaining = max(0, qty - random.randint(0, qty))
 
-        # 사용자 선호 업데이트 후보군 저장
-        user_categories.setdefault(user_id, set()).add(item['category'])
-
         wishes.append({
             'wish_id': wid,
             'user_id': user_id,
             'relief_item_id': item['item_id'],
             'quantity': qty,
-            'status': random.choices(['대기중', '매칭완료', '배송중', '완료', '취소'], weights=[0.45, 0.2, 0.15, 0.15, 0.05])[0],
+            'status': WISH_STATUS_SAMPLER.draw(),
             'matched_request_ids': '',
             'total_matched_quantity': qty - remaining,
             'remaining_quantity': remaining,
@@ -384,17 +458,43 @@ def generate_user_donation_wishes(fake, count, users, relief_items):
         })
 
     # 사용자의 preferred_categories 업데이트
-    for user in general_users:
+    if update_users:
+        update_preferred_categories(general_users, wishes, relief_items)
+
+    return wishes
+
+
+def collect_user_categories(wishes, relief_items, user_categories=None):
+    """user_id → 기부 의사에 등장한 카테고리 집합(user_categories에 누적)"""
+    category_by_item = {it['item_id']: it['category'] for it in relief_items}
+    if user_categories is None:
+        user_categories = {}
+    for w in wishes:
+        user_categories.setdefault(w['user_id'], set()).add(category_by_item[w['relief_item_id']])
+    return user_categories
+
+
+def apply_preferred_categories(users, user_categories):
+    """수집한 카테고리 집합으로 preferred_categories 갱신(기부 이력이 있는 사용자만)"""
+    for user in users:
         if user['user_id'] in user_categories:
             user['preferred_categories'] = ','.join(sorted(user_categories[user['user_id']]))
 
-    return wishes
+
+def update_preferred_categories(users, wishes, relief_items):
+    """기부 의사에 등장한 카테고리로 사용자의 preferred_categories를 갱신(기부 이력이 있는 사용자만)"""
+    apply_preferred_categories(users, collect_user_categories(wishes, relief_items))
 
 
-def generate_shelter_relief_requests(fake, count, shelters, relief_items, wishes=None):
+def generate_shelter_relief_requests(fake, count, shelters, relief_items, wishes=None, index=None,
+                                     start=1, item_popularity=None):
     """대피소 구호품 요청 데이터 생성 - 현실적인 수요량 고려(고도화)
     - 대피소 수용규모/편의시설/재난유형/계절 반영
     - 카테고리별 요청량 범위 정교화
+    - 아이템별 기부 인기도: item_popularity(미리 계산) > index(GenerationIndex) > wishes 순으로 사용
+    - start: 첫 request_id 번호(샤드 생성 시 오프셋)
+    - 카테고리는 (재난유형, 편의시설, 계절) 구성별, 인기도 가중 아이템은 카테고리별 alias 테이블로
+      캐시해 행당 O(1) 추출(아이템 풀 크기와 무관)
     """
     requests = []
 
@@ -405,69 +505,39 @@ def generate_shelter_relief_requests(fake, count, shelters, relief_items, wishes
 
     # 기부 인기 아이템 가중치(아이템별 등장 횟수)
     wish_item_pop = {}
-    if wishes:
-        for w in wishes:
-            wid = w.get('relief_item_id')
-            if wid:
-                wish_item_pop[wid] = wish_item_pop.get(wid, 0) + 1
-
-    # 계절 판단 도우미
-    def get_season(dt: datetime):
-        m = dt.month
-        if m in (12, 1, 2):
-            return '겨울'
-        if m in (3, 4, 5):
-            return '봄'
-        if m in (6, 7, 8):
-            return '여름'
-        return '가을'
-
-    # 재난유형→선호 카테고리 맵
-    disaster_pref = {
-        '지진': {'의약품': 1.5, '침구류': 1.3, '식량': 1.2},
-        '홍수': {'개인위생': 1.6, '생활용품': 1.3, '식량': 1.2},
-        '태풍': {'식량': 1.3, '주방용품': 1.2, '전자용품': 1.1},
-        '화재': {'의약품': 1.6, '의류': 1.3, '침구류': 1.2},
-        '한파': {'침구류': 1.8, '의류': 1.4, '의약품': 1.2},
-        '폭염': {'개인위생': 1.6, '식량': 1.2, '전자용품': 1.1},
-    }
+    if item_popularity is not None:
+        wish_item_pop = item_popularity
+    elif index is not None and index.wishes_by_item:
+        wish_item_pop = index.item_popularity()
+    elif wishes:
+        wish_item_pop = GenerationIndex(wishes=wishes).item_popularity()
+
+    def category_weights(disaster_type, has_pet_zone, has_disabled_facility, season):
+        # 가중치 구성: 기본 + 재난유형 + 편의시설 + 계절
+        weights = dict(REQUEST_CATEGORY_WEIGHTS)
+        # 재난유형
+        for k, v in DISASTER_CATEGORY_PREF.get(disaster_type, {}).items():
+            if k in weights:
+                weights[k] *= v
+        # 편의시설
+        if has_pet_zone:
+            weights['반려동물'] = weights.get('반려동물', 0.02) * 2.0
+        if has_disabled_facility:
+            weights['의약품'] = weights.get('의약품', 0.12) * 1.3
+        # 계절성
+        for k, v in REQUEST_SEASON_MULTIPLIERS.get(season, {}).items():
+            weights[k] = weights.get(k, 0.0) * v
+        return AliasTable.from_weights(weights)
 
-    base_weights = {
-        '식량': 0.30,
-        '생활용품': 0.17,
-        '의류': 0.08,
-        '의약품': 0.15,
-        '침구류': 0.06,
-        '전자용품': 0.05,
-        '주방용품': 0.06,
-        '개인위생': 0.08,
-        '교육/오락': 0.03,
-        '반려동물': 0.02,
-    }
+    def item_weights(category):
+        # 인기 아이템 우선 선택(겹침 증가)
+        pool = items_by_category.get(category) or relief_items
+        return AliasTable(pool, [1 + wish_item_pop.get(it['item_id'], 0) for it in pool])
 
-    def pick_category(weights: dict):
-        total = sum(weights.values())
-        r = random.random() * total
-        acc = 0.0
-        for k, w in weights.items():
-            acc += w
-            if r <= acc:
-                return k
-        return list(weights.keys())[-1]
-
-    def requested_range_for(cat: str, capacity: int):
-        base_need = max(10, int(capacity * 0.1))
-        if cat in ['식량', '생활용품']:
-            return (base_need, base_need * 5)
-        if cat in ['의류', '침구류']:
-            return (base_need // 2, base_need * 2)
-        if cat in ['의약품', '개인위생']:
-            return (base_need // 2, int(base_need * 2.5))
-        if cat in ['주방용품', '전자용품']:
-            return (max(5, base_need // 3), max(20, int(base_need * 1.2)))
-        return (max(5, base_need // 3), base_need)
+    category_sampler = SamplerCache(category_weights)
+    item_sampler = SamplerCache(item_weights)
 
-    for i in range(1, count + 1):
+    for i in range(start, start + count):
         rid = make_id('request', i)
         shelter = random.choice(shelters)
         capacity = shelter['total_capacity']
@@ -475,46 +545,15 @@ def generate_shelter_relief_requests(fake, count, shelters, relief_items, wishes
         created = fake.date_time_between(start_date='-3m', end_date='now')
         season = get_season(created)
 
-        # 가중치 구성: 기본 + 재난유형 + 편의시설 + 계절
-        weights = dict(base_weights)
-        # 재난유형
-        pref = disaster_pref.get(shelter.get('disaster_type', ''), {})
-        for k, v in pref.items():
-            if k in weights:
-                weights[k] *= v
-        # 편의시설
-        if shelter.get('has_pet_zone'):
-            weights['반려동물'] = weights.get('반려동물', 0.02) * 2.0
-        if shelter.get('has_disabled_facility'):
-            weights['의약품'] = weights.get('의약품', 0.12) * 1.3
-        # 계절성
-        if season == '겨울':
-            weights['침구류'] = weights.get('침구류', 0.05) * 1.7
-            weights['의류'] = weights.get('의류', 0.08) * 1.3
-        elif season == '여름':
-            weights['개인위생'] = weights.get('개인위생', 0.07) * 1.5
-            weights['생활용품'] = weights.get('생활용품', 0.15) * 1.2
-
         # 카테고리 및 아이템 선택
-        chosen_category = pick_category(weights)
-        pool = items_by_category.get(chosen_category) or relief_items
-        # 인기 아이템 우선 선택(겹침 증가)
-        if pool and wish_item_pop:
-            weights = [1 + wish_item_pop.get(it['item_id'], 0) for it in pool]
-            total = sum(weights)
-            r = random.random() * total
-            acc = 0.0
-            chosen = pool[-1]
-            for it, w in zip(pool, weights):
-                acc += w
-                if r <= acc:
-                    chosen = it
-                    break
-            item = chosen
+        chosen_category = category_sampler(shelter.get('disaster_type', ''), bool(shelter.get('has_pet_zone')),
+                                           bool(shelter.get('has_disabled_facility')), season).draw()
+        if wish_item_pop:
+            item = item_sampler(chosen_category).draw()
         else:
-            item = random.choice(pool)
+            item = random.choice(items_by_category.get(chosen_category) or relief_items)
 
-        lo, hi = requested_range_for(chosen_category, capacity)
+        lo, hi = request_quantity_range(chosen_category, capacity)
         requested = random.randint(lo, hi)
         current_stock = random.randint(0, max(0, requested // 3))
         urgent_gap = requested - current_stock
@@ -534,7 +573,7 @@ def generate_shelter_relief_requests(fake, count, shelters, relief_items, wishes
             'urgent_quantity': urgent,
             'urgency_level': urgency_level,
             'needed_by': (created + timedelta(days=random.randint(1, 30))).isoformat(),
-            'status': random.choices(['대기중', '매칭완료', '배송중', '완료', '취소'], weights=[0.5, 0.2, 0.15, 0.1, 0.05])[0],
+            'status': REQUEST_STATUS_SAMPLER.draw(),
             'notes': f"{shelter.get('disaster_type','일반')} 상황 대비 요청",
             'matched_wish_ids': '',
             'total_matched_quantity': 0,
@@ -546,52 +585,25 @@ def generate_shelter_relief_requests(fake, count, shelters, relief_items, wishes
     return requests
 
 
-def generate_donation_matches(fake, count, wishes, requests, users, shelters, relief_items):
-    """기부 매칭 데이터 생성 - 실제 wishes와 requests 연계"""
+def generate_donation_matches(fake, count, wishes, requests, users, shelters, relief_items, index=None):
+    """기부 매칭 데이터 생성 - 실제 wishes와 requests 연계
+    - index(GenerationIndex)의 아이템별 wishes/requests, shelter_id 조회를 사용
+    - 배분은 matching.MatchingEngine(긴급도·request_id 순 요청 큐, 기부 의사 wish_id 순) 그리디 결과를
+      count건까지 사용하고, 상태/배송 정보만 무작위로 채움
+    """
     matches = []
-    
-    # 매칭 가능한 wishes와 requests 필터링 (같은 relief_item_id)
-    available_wishes = [w for w in wishes if w['remaining_quantity'] > 0 and w['status'] in ['대기중', '매칭완료']]
-    available_requests = [r for r in requests if r['remaining_quantity'] > 0 and r['status'] in ['대기중', '매칭완료']]
-    
-    # 아이템별로 그룹화
-    wishes_by_item = {}
-    requests_by_item = {}
-    
-    for wish in available_wishes:
-        item_id = wish['relief_item_id']
-        if item_id not in wishes_by_item:
-            wishes_by_item[item_id] = []
-        wishes_by_item[item_id].append(wish)
-    
-    for request in available_requests:
-        item_id = request['relief_item_id']
-        if item_id not in requests_by_item:
-            requests_by_item[item_id] = []
-        requests_by_item[item_id].append(request)
-    
-    # 요청한 카운트까지 최대한 매칭 시도
-    match_count = 0
-    
-    for i in range(1, count + 1):
-        # 상한 없이 요청된 횟수까지 시도
-
-        # 공통 아이템이 있는 경우에만 매칭
-        common_items = set(wishes_by_item.keys()) & set(requests_by_item.keys())
-        if not common_items:
-            break
-            
-        item_id = random.choice(list(common_items))
-        wish = random.choice(wishes_by_item[item_id])
-        request = random.choice(requests_by_item[item_id])
-        
-        # 매칭 가능한 수량 계산
-        max_quantity = min(wish['remaining_quantity'], request['remaining_quantity'])
-        if max_quantity <= 0:
-            continue
-            
-        matched_qty = random.randint(1, max_quantity)
-        
+    if index is None:
+        index = GenerationIndex(shelters=shelters, wishes=wishes, requests=requests)
+
+    # needed_by/created_at은 실행 시각 기준이라 샤드마다 어긋나므로 id 순서 사용
+    engine = MatchingEngine(wish_key=lambda w: w['wish_id'],
+                            request_key=lambda r: (urgency_rank(r), r['request_id']))
+    for rows in index.requests_by_item.values():
+        engine.add_requests(rows)
+    for rows in index.wishes_by_item.values():
+        engine.add_wishes(rows)
+
+    for i, (wish, request, matched_qty) in enumerate(engine.allocate(limit=count), 1):
         mid = make_id('match', i)
         matched_at = fake.date_time_between(start_date='-2m', end_date='now')
         
@@ -607,7 +619,7 @@ def generate_donation_matches(fake, count, wishes, requests, users, shelters, re
             'matched_quantity': matched_qty,
             'donor_id': wish['user_id'],
             'shelter_id': request['shelter_id'],
-            'relief_item_id': item_id,
+            'relief_item_id': wish['relief_item_id'],
             'status': random.choice(['매칭완료', '배송중', '배송완료', '검수완료', '취소']),
             'matched_at': matched_at.isoformat(),
             'delivery_scheduled_at': delivery_scheduled.isoformat(),
@@ -615,27 +627,23 @@ def generate_donation_matches(fake, count, wishes, requests, users, shelters, re
             'verified_at': verified.isoformat(),
             'delivery_company': random.choice(['한진택배', 'CJ대한통운', '우체국택배', '롯데택배']),
             'tracking_number': f"TRK{random.randint(100000000,999999999)}",
-            'delivery_address': [s for s in shelters if s['shelter_id'] == request['shelter_id']][0]['address'],
+            'delivery_address': index.shelter(request['shelter_id'])['address'],
             'created_at': matched_at.isoformat(),
             'updated_at': matched_at.isoformat(),
         })
-        
-        # 매칭된 수량만큼 차감
-        wish['remaining_quantity'] -= matched_qty
-        request['remaining_quantity'] -= matched_qty
-        
-        match_count += 1
     
     return matches
 
 
-def generate_disaster_incidents(fake, count, shelters):
+def generate_disaster_incidents(fake, count, shelters, geo_index=None):
     """재난 사건 데이터 생성 - 실제 대피소 위치를 사건 중심으로 고정
     - 사건 발생 지점 = 무작위로 선택한 실제(또는 가상) 대피소의 정확한 좌표
     - 주소 필드(detail_address/road_detail_address)도 해당 대피소 주소 사용
-    - 영향 반경 내 관련 대피소 식별
+    - 영향 반경 내 관련 대피소 식별(geo_index: ShelterGeoIndex 반경 질의)
     """
     incidents = []
+    if geo_index is None:
+        geo_index = ShelterGeoIndex.from_records(shelters)
 
     for i in range(1, count + 1):
         iid = make_id('incident', i)
@@ -648,13 +656,9 @@ def generate_disaster_incidents(fake, count, shelters):
         # 영향 반경 설정 (현실 범위: 0.5km ~ 15km)
         impact_radius = random.uniform(0.5, 15.0)
 
-        # 영향 반경 내의 대피소들 찾기 (anchor 포함 보장)
-        related_shelters = []
-        for shelter in shelters:
-            distance = calculate_distance(incident_lat, incident_lon,
-                                          float(shelter['latitude']), float(shelter['longitude']))
-            if distance <= impact_radius:
-                related_shelters.append(shelter['shelter_id'])
+        # 영향 반경 내의 대피소들 찾기 (대피소 목록 순서 유지, anchor 포함 보장)
+        within = geo_index.query_radius(incident_lat, incident_lon, impact_radius)[0]
+        related_shelters = [shelters[j]['shelter_id'] for j in within]
         if anchor['shelter_id'] not in related_shelters:
             related_shelters.append(anchor['shelter_id'])
 
@@ -695,14 +699,19 @@ def generate_disaster_incidents(fake, count, shelters):
     return incidents
 
 
-def generate_consumption_info(fake, count, shelters, incidents, relief_items, matches):
-    """소비 정보 데이터 생성 - 실제 매칭 데이터 기반"""
+def generate_consumption_info(fake, count, shelters, incidents, relief_items, matches, index=None, start=1):
+    """소비 정보 데이터 생성 - 실제 매칭 데이터 기반
+    - index(GenerationIndex)로 대피소/관련 재난 사건을 O(1) 조회
+    - start: 첫 consumption_id 번호(샤드 생성 시 오프셋)
+    """
     consumptions = []
+    if index is None:
+        index = GenerationIndex(shelters=shelters, incidents=incidents)
     
     # 매칭 완료된 데이터만 소비 정보 생성
     completed_matches = [m for m in matches if m['status'] in ['배송완료', '검수완료']]
     
-    for i in range(1, count + 1):
+    for i in range(start, start + count):
         cid = make_id('consumption', i)
         
         # 매칭된 데이터 기반으로 생성
@@ -720,11 +729,7 @@ def generate_consumption_info(fake, count, shelters, incidents, relief_items, ma
             base_quantity = random.randint(10, 100)
         
         # 관련 재난 사건 찾기
-        related_incident = None
-        for incident in incidents:
-            if shelter_id in incident['related_shelter_ids'].split(','):
-                related_incident = incident['incident_id']
-                break
+        related_incident = index.first_incident_id(shelter_id)
         
         # LSTM 학습을 위해 최근 10년 범위에서 임의의 시작일 선택
         start_date = fake.date_between(start_date='-10y', end_date='-1d')
@@ -735,7 +740,7 @@ def generate_consumption_info(fake, count, shelters, incidents, relief_items, ma
         daily_rate = round(consumed / max(1, duration), 2)
         
         # 대피소 정보 가져오기
-        shelter_info = next((s for s in shelters if s['shelter_id'] == shelter_id), shelters[0])
+        shelter_info = index.shelter(shelter_id, shelters[0])
         capacity = int(shelter_info.get('total_capacity', 0) or 0)
         upper = max(0, capacity)
         lower = 0 if capacity < 10 else 10
@@ -744,17 +749,6 @@ def generate_consumption_info(fake, count, shelters, incidents, relief_items, ma
         occupancy = random.randint(lower, upper)
         occupancy_rate = round(occupancy / max(1, capacity), 2)
         
-        # start_date 기반 계절 계산
-        def _season_from_date(d):
-            m = d.month
-            if m in (12, 1, 2):
-                return '겨울'
-            if m in (3, 4, 5):
-                return '봄'
-            if m in (6, 7, 8):
-                return '여름'
-            return '가을'
-
         consumptions.append({
             'consumption_id': cid,
             'shelter_id': shelter_id,
@@ -777,7 +771,7 @@ def generate_consumption_info(fake, count, shelters, incidents, relief_items, ma
             'satisfaction_score': round(random.uniform(2.0, 5.0), 1),
             'adequacy_level': random.choice(['부족', '적정', '충분', '과다']),
             'restock_frequency': random.randint(0, 5),
-            'seasonality': _season_from_date(start_date),
+            'seasonality': get_season(start_date),
             'children_ratio': round(random.uniform(0, 0.4), 2),
             'elderly_ratio': round(random.uniform(0, 0.3), 2),
             'disabled_ratio': round(random.uniform(0, 0.15), 2),
@@ -792,9 +786,26 @@ def generate_consumption_info(fake, count, shelters, incidents, relief_items, ma
 
 
 def save_json(obj, path):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
+    write_table(obj, path, 'json')
+
+
+def adjust_counts(args, actual_shelter_count):
+    """실제 대피소 수에 따라 요청/매칭/재난/소비이력 수 재조정 → (requests, matches, incidents, consumptions)"""
+    if actual_shelter_count > 1000 and not args.no_auto_adjust:  # 실제 데이터 사용 시 (옵션으로 비활성화 가능)
+        adjusted_requests = min(args.requests, int(actual_shelter_count * 0.15))
+        adjusted_matches = min(args.matches, int(actual_shelter_count * 0.1))
+        adjusted_incidents = min(args.incidents, max(50, actual_shelter_count // 100))
+        adjusted_consumptions = min(args.consumptions, int(actual_shelter_count * 0.05))
+        
+        print(f"📊 실제 대피소 수({actual_shelter_count})에 맞춰 데이터 규모 조정:")
+        print(f"   └─ 요청: {adjusted_requests}, 매칭: {adjusted_matches}")
+        print(f"   └─ 재난: {adjusted_incidents}, 소비이력: {adjusted_consumptions}")
+    else:
+        adjusted_requests = args.requests
+        adjusted_matches = args.matches
+        adjusted_incidents = args.incidents
+        adjusted_consumptions = args.consumptions
+    return adjusted_requests, adjusted_matches, adjusted_incidents, adjusted_consumptions
 
 
 def calculate_recommended_counts(shelter_count=22000, user_count=10000):
@@ -815,6 +826,132 @@ def calculate_recommended_counts(shelter_count=22000, user_count=10000):
     return recommendations
 
 
+def add_faker_pool_args(parser):
+    """Faker 값 풀 CLI 옵션 추가(generate_fake_data / generate_fake_data_csv 공통)"""
+    parser.add_argument('--faker_pool_size', type=int, default=faker_pools.DEFAULT_POOL_SIZE,
+                        help='Faker 필드별 값 풀 크기(이름/주소/전화번호/이메일/회사명)')
+    parser.add_argument('--faker_cache_dir', type=str, default=faker_pools.DEFAULT_CACHE_DIR,
+                        help="값 풀 디스크 캐시 폴더('' 이면 캐시하지 않음)")
+    return parser
+
+
+def configure_faker_pools(args):
+    """--seed/--faker_pool_size로 값 풀 설정 후 미리 로드(샤드 워커는 같은 캐시를 읽음)"""
+    if args.faker_pool_size <= 0:
+        raise SystemExit('--faker_pool_size는 1 이상이어야 합니다.')
+    return faker_pools.configure('ko_KR', args.seed, args.faker_pool_size, args.faker_cache_dir or None).warm()
+
+
+def create_engines(args):
+    """--engine/--workers에 따른 (columnar 엔진 모듈, numpy Generator, 샤드 생성기) 준비(미사용 시 None)"""
+    engine = None
+    rng = None
+    if args.engine == 'numpy':
+        import numpy as np
+        import columnar_engine as engine
+        rng = np.random.default_rng(args.seed)
+
+    sharder = None
+    if args.workers:
+        from sharding import ShardedGenerator
+        sharder = ShardedGenerator(args.seed, args.workers, args.shard_size, args.engine)
+    return engine, rng, sharder
+
+
+def generate_tables(args, fake, engine=None, rng=None, sharder=None):
+    """전체 테이블 생성(generate_fake_data / generate_fake_data_csv 공통)
+
+    대용량 단계(사용자/기부 의사/요청/소비이력)는 sharder → numpy 엔진 → 행 단위 python 순으로 선택합니다.
+    반환: 파일 이름(확장자 제외) → 레코드 목록, 저장 순서대로
+    """
+    # 1단계: 사용자 데이터 생성
+    print(f"👥 사용자 데이터 생성 중... ({args.users}명)")
+    if sharder:
+        users = sharder.generate_users(args.users)
+    elif engine:
+        users_df = engine.generate_users(rng, fake, args.users)
+        users = users_df.to_dict('records')
+    else:
+        users = generate_users(fake, args.users)
+    general_users = [u for u in users if u['user_type'] == 'general_user']
+    public_officers = [u for u in users if u['user_type'] == 'public_officer']
+    print(f"   └─ 일반 사용자: {len(general_users)}명, 관리자: {len(public_officers)}명")
+    
+    # 2단계: 구호품 데이터 생성
+    print(f"📦 구호품 데이터 생성 중... ({args.relief_items}개)")
+    relief_items = generate_relief_items(fake, args.relief_items)
+    
+    # 3단계: 대피소 데이터 로드/생성
+    print(f"🏠 대피소 데이터 처리 중...")
+    if engine:
+        shelters = engine.generate_shelters(rng, fake, args.shelters, users, args.real_shelter_csv).to_dict('records')
+    else:
+        shelters = generate_shelters(fake, args.shelters, users, args.real_shelter_csv)
+    # 생성 단계 간 공유 인덱스(shelter_id/incident/아이템별 조회)
+    index = GenerationIndex(shelters=shelters)
+    
+    # 실제 대피소 수에 따라 요청/매칭 수 재조정
+    adjusted_requests, adjusted_matches, adjusted_incidents, adjusted_consumptions = adjust_counts(args, len(shelters))
+    
+    # 4단계: 기부 의사 데이터 생성 (general_user만)
+    print(f"💝 기부 의사 데이터 생성 중... ({args.wishes}개)")
+    if sharder:
+        wishes = sharder.generate_user_donation_wishes(args.wishes, users, relief_items)
+    elif engine:
+        wishes_df = engine.generate_user_donation_wishes(rng, args.wishes, users_df, relief_items)
+        wishes = wishes_df.to_dict('records')
+        users = users_df.to_dict('records')
+    else:
+        wishes = generate_user_donation_wishes(fake, args.wishes, users, relief_items)
+    index.add_wishes(wishes)
+    
+    # 5단계: 대피소 요청 데이터 생성
+    print(f"📋 대피소 요청 데이터 생성 중... ({adjusted_requests}개)")
+    if sharder:
+        requests = sharder.generate_shelter_relief_requests(adjusted_requests, shelters, relief_items, index)
+    elif engine:
+        requests = engine.generate_shelter_relief_requests(rng, adjusted_requests, shelters, relief_items, wishes_df).to_dict('records')
+    else:
+        requests = generate_shelter_relief_requests(fake, adjusted_requests, shelters, relief_items, wishes, index=index)
+    index.add_requests(requests)
+    
+    # 6단계: 매칭 데이터 생성
+    print(f"🤝 매칭 데이터 생성 중... ({adjusted_matches}개)")
+    matches = generate_donation_matches(fake, adjusted_matches, wishes, requests, users, shelters, relief_items, index=index)
+    
+    # 7단계: 재난 사건 데이터 생성
+    print(f"⚠️ 재난 사건 데이터 생성 중... ({adjusted_incidents}개)")
+    incidents = generate_disaster_incidents(fake, adjusted_incidents, shelters)
+    index.add_incidents(incidents)
+    
+    # 8단계: 소비 정보 데이터 생성
+    print(f"📈 소비 정보 데이터 생성 중... ({adjusted_consumptions}개)")
+    if sharder:
+        consumptions = sharder.generate_consumption_info(adjusted_consumptions, shelters, incidents, relief_items, matches)
+    elif engine:
+        consumptions = engine.generate_consumption_info(rng, adjusted_consumptions, shelters, incidents, relief_items, matches, index=index).to_dict('records')
+    else:
+        consumptions = generate_consumption_info(fake, adjusted_consumptions, shelters, incidents, relief_items, matches, index=index)
+
+    return {
+        'users': users,
+        'shelters': shelters,
+        'relief_items': relief_items,
+        'user_donation_wishes': wishes,
+        'shelter_relief_requests': requests,
+        'donation_matches': matches,
+        'disaster_incidents': incidents,
+        'consumption_info': consumptions,
+    }
+
+
+def write_tables(tables, out, fmt):
+    """generate_tables 결과를 테이블별 파일(out/<이름>.<형식>)로 저장"""
+    ext = FORMAT_EXTENSIONS[fmt]
+    for name, rows in tables.items():
+        write_table(rows, os.path.join(out, name + ext), fmt)
+
+
 def main():
     parser = argparse.ArgumentParser(description='이어드림 플랫폼 가상 데이터 생성기 (ML/DL 학습용)')
     
@@ -843,6 +980,19 @@ def main():
                        help='실제 대피소 CSV 파일 경로')
     parser.add_argument('--no_auto_adjust', action='store_true',
                        help='실제 대피소 수 기준 자동 규모 조정을 비활성화합니다')
+    parser.add_argument('--engine', type=str, default='python', choices=['python', 'numpy'],
+                       help='생성 엔진: python(행 단위, 기존 방식) 또는 numpy(컬럼형 일괄 생성)')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='샤드 병렬 생성 프로세스 수 (지정 시 대용량 테이블을 샤드 단위로 생성, 1이면 단일 프로세스)')
+    parser.add_argument('--shard_size', type=int, default=50000,
+                       help='샤드 크기(행 수). 같은 --seed/--shard_size면 --workers와 무관하게 결과 동일')
+    parser.add_argument('--format', type=str, default='parquet', choices=['json', 'ndjson', 'csv', 'parquet'],
+                       help='출력 형식 (parquet은 pyarrow 필요)')
+    parser.add_argument('--stream', action='store_true',
+                       help='대용량 테이블을 배치 단위로 생성해 바로 파일에 기록(메모리 사용량 제한)')
+    parser.add_argument('--batch_size', type=int, default=50000,
+                       help='--stream 배치 크기(행 수, --workers 지정 시에는 --shard_size 사용)')
+    add_faker_pool_args(parser)
     
     args = parser.parse_args()
 
@@ -852,92 +1002,56 @@ def main():
     fake = Faker('ko_KR')
     if args.seed is not None:
         fake.seed_instance(args.seed)
+    configure_faker_pools(args)
+
+    engine, rng, sharder = create_engines(args)
 
     print("🚀 이어드림 플랫폼 데이터 생성 시작")
     print("=" * 50)
+
+    if args.stream:
+        from streaming import generate_streaming
+        counts = generate_streaming(args, fake, args.format, engine, rng, sharder)
+        print("\n✅ 데이터 생성 완료!")
+        print("=" * 50)
+        print(f"📁 출력 위치: {args.out}/")
+        print(f"📊 총 데이터 현황:")
+        print(f"   ├─ 사용자: {counts['users']:,}명")
+        print(f"   ├─ 대피소: {counts['shelters']:,}개")
+        print(f"   ├─ 구호품: {counts['relief_items']:,}개")
+        print(f"   ├─ 기부의사: {counts['user_donation_wishes']:,}개")
+        print(f"   ├─ 요청: {counts['shelter_relief_requests']:,}개")
+        print(f"   ├─ 매칭: {counts['donation_matches']:,}개")
+        print(f"   ├─ 재난사건: {counts['disaster_incidents']:,}개")
+        print(f"   └─ 소비이력: {counts['consumption_info']:,}개")
+        return
     
-    # 1단계: 사용자 데이터 생성
-    print(f"👥 사용자 데이터 생성 중... ({args.users}명)")
-    users = generate_users(fake, args.users)
-    general_users = [u for u in users if u['user_type'] == 'general_user']
-    public_officers = [u for u in users if u['user_type'] == 'public_officer']
-    print(f"   └─ 일반 사용자: {len(general_users)}명, 관리자: {len(public_officers)}명")
-    
-    # 2단계: 구호품 데이터 생성
-    print(f"📦 구호품 데이터 생성 중... ({args.relief_items}개)")
-    relief_items = generate_relief_items(fake, args.relief_items)
-    
-    # 3단계: 대피소 데이터 로드/생성
-    print(f"🏠 대피소 데이터 처리 중...")
-    shelters = generate_shelters(fake, args.shelters, users, args.real_shelter_csv)
-    
-    # 실제 대피소 수에 따라 요청/매칭 수 재조정
-    actual_shelter_count = len(shelters)
-    if actual_shelter_count > 1000 and not args.no_auto_adjust:  # 실제 데이터 사용 시 (옵션으로 비활성화 가능)
-        adjusted_requests = min(args.requests, int(actual_shelter_count * 0.15))
-        adjusted_matches = min(args.matches, int(actual_shelter_count * 0.1))
-        adjusted_incidents = min(args.incidents, max(50, actual_shelter_count // 100))
-        adjusted_consumptions = min(args.consumptions, int(actual_shelter_count * 0.05))
-        
-        print(f"📊 실제 대피소 수({actual_shelter_count})에 맞춰 데이터 규모 조정:")
-        print(f"   └─ 요청: {adjusted_requests}, 매칭: {adjusted_matches}")
-        print(f"   └─ 재난: {adjusted_incidents}, 소비이력: {adjusted_consumptions}")
-    else:
-        adjusted_requests = args.requests
-        adjusted_matches = args.matches
-        adjusted_incidents = args.incidents
-        adjusted_consumptions = args.consumptions
-    
-    # 4단계: 기부 의사 데이터 생성 (general_user만)
-    print(f"💝 기부 의사 데이터 생성 중... ({args.wishes}개)")
-    wishes = generate_user_donation_wishes(fake, args.wishes, users, relief_items)
-    
-    # 5단계: 대피소 요청 데이터 생성
-    print(f"📋 대피소 요청 데이터 생성 중... ({adjusted_requests}개)")
-    requests = generate_shelter_relief_requests(fake, adjusted_requests, shelters, relief_items, wishes)
-    
-    # 6단계: 매칭 데이터 생성
-    print(f"🤝 매칭 데이터 생성 중... ({adjusted_matches}개)")
-    matches = generate_donation_matches(fake, adjusted_matches, wishes, requests, users, shelters, relief_items)
-    
-    # 7단계: 재난 사건 데이터 생성
-    print(f"⚠️ 재난 사건 데이터 생성 중... ({adjusted_incidents}개)")
-    incidents = generate_disaster_incidents(fake, adjusted_incidents, shelters)
-    
-    # 8단계: 소비 정보 데이터 생성
-    print(f"📈 소비 정보 데이터 생성 중... ({adjusted_consumptions}개)")
-    consumptions = generate_consumption_info(fake, adjusted_consumptions, shelters, incidents, relief_items, matches)
+    tables = generate_tables(args, fake, engine, rng, sharder)
 
     # 데이터 저장
     print(f"\n💾 데이터 저장 중... ({args.out}/)")
-    out = args.out
-    save_json(users, os.path.join(out, 'users.json'))
-    save_json(shelters, os.path.join(out, 'shelters.json'))
-    save_json(relief_items, os.path.join(out, 'relief_items.json'))
-    save_json(wishes, os.path.join(out, 'user_donation_wishes.json'))
-    save_json(requests, os.path.join(out, 'shelter_relief_requests.json'))
-    save_json(matches, os.path.join(out, 'donation_matches.json'))
-    save_json(incidents, os.path.join(out, 'disaster_incidents.json'))
-    save_json(consumptions, os.path.join(out, 'consumption_info.json'))
+    write_tables(tables, args.out, args.format)
+    counts = {name: len(rows) for name, rows in tables.items()}
 
     print("\n✅ 데이터 생성 완료!")
     print("=" * 50)
     print(f"📁 출력 위치: {args.out}/")
     print(f"📊 총 데이터 현황:")
-    print(f"   ├─ 사용자: {len(users):,}명")
-    print(f"   ├─ 대피소: {len(shelters):,}개")
-    print(f"   ├─ 구호품: {len(relief_items):,}개")
-    print(f"   ├─ 기부의사: {len(wishes):,}개")
-    print(f"   ├─ 요청: {len(requests):,}개")
-    print(f"   ├─ 매칭: {len(matches):,}개")
-    print(f"   ├─ 재난사건: {len(incidents):,}개")
-    print(f"   └─ 소비이력: {len(consumptions):,}개")
+    print(f"   ├─ 사용자: {counts['users']:,}명")
+    print(f"   ├─ 대피소: {counts['shelters']:,}개")
+    print(f"   ├─ 구호품: {counts['relief_items']:,}개")
+    print(f"   ├─ 기부의사: {counts['user_donation_wishes']:,}개")
+    print(f"   ├─ 요청: {counts['shelter_relief_requests']:,}개")
+    print(f"   ├─ 매칭: {counts['donation_matches']:,}개")
+    print(f"   ├─ 재난사건: {counts['disaster_incidents']:,}개")
+    print(f"   └─ 소비이력: {counts['consumption_info']:,}개")
     
     # ML/DL 학습용 데이터 품질 체크
+    n_general = sum(1 for u in tables['users'] if u['user_type'] == 'general_user')
     print(f"\n🎯 ML/DL 학습 데이터 품질:")
-    print(f"   ├─ 매칭 성공률: {len(matches)/max(1,len(wishes))*100:.1f}%")
-    print(f"   ├─ 대피소당 평균 요청: {len(requests)/max(1,len(shelters)):.1f}개")
-    print(f"   └─ 사용자당 평균 기부: {len(wishes)/max(1,len(general_users)):.1f}개")
+    print(f"   ├─ 매칭 성공률: {counts['donation_matches']/max(1,counts['user_donation_wishes'])*100:.1f}%")
+    print(f"   ├─ 대피소당 평균 요청: {counts['shelter_relief_requests']/max(1,counts['shelters']):.1f}개")
+    print(f"   └─ 사용자당 평균 기부: {counts['user_donation_wishes']/max(1,n_general):.1f}개")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""생성 단계 간 공유 인메모리 인덱스
+
+generate_donation_matches / generate_consumption_info 등은 행마다 shelters·incidents
+목록을 선형 탐색했습니다. GenerationIndex는 생성된 테이블을 한 번만 훑어 다음 조회를
+O(1)로 제공합니다.
+
+- shelter_id → shelter
+- shelter_id → 관련 incident_id 목록(사건 생성 순서 유지)
+- relief_item_id → wishes / requests 목록(생성 순서 유지)
+
+각 테이블이 생성되는 즉시 add_* 로 추가하며, 모든 generate_* 함수는 index 인자가
+없으면 전달받은 테이블로 인덱스를 직접 만듭니다.
+"""
+
+
+class GenerationIndex:
+    def __init__(self, shelters=None, incidents=None, wishes=None, requests=None):
+        self.shelters_by_id = {}
+        self.incident_ids_by_shelter = {}
+        self.wishes_by_item = {}
+        self.requests_by_item = {}
+        if shelters:
+            self.add_shelters(shelters)
+        if incidents:
+            self.add_incidents(incidents)
+        if wishes:
+            self.add_wishes(wishes)
+        if requests:
+            self.add_requests(requests)
+
+    def add_shelters(self, shelters):
+        for s in shelters:
+            # 중복 ID는 먼저 나온 행 우선(기존 선형 탐색과 동일)
+            self.shelters_by_id.setdefault(s['shelter_id'], s)
+        return self
+
+    def add_incidents(self, incidents):
+        for inc in incidents:
+            for sid in str(inc.get('related_shelter_ids') or '').split(','):
+                if sid:
+                    self.incident_ids_by_shelter.setdefault(sid, []).append(inc['incident_id'])
+        return self
+
+    def add_wishes(self, wishes):
+        for w in wishes:
+            item_id = w.get('relief_item_id')
+            if item_id:
+                self.wishes_by_item.setdefault(item_id, []).append(w)
+        return self
+
+    def add_requests(self, requests):
+        for r in requests:
+            item_id = r.get('relief_item_id')
+            if item_id:
+                self.requests_by_item.setdefault(item_id, []).append(r)
+        return self
+
+    def shelter(self, shelter_id, default=None):
+        return self.shelters_by_id.get(shelter_id, default)
+
+    def first_incident_id(self, shelter_id):
+        """대피소가 포함된 첫 번째 재난 사건 ID(없으면 None)"""
+        ids = self.incident_ids_by_shelter.get(shelter_id)
+        return ids[0] if ids else None
+
+    def item_popularity(self):
+        """relief_item_id → 기부 의사 등장 횟수"""
+        return {item_id: len(ws) for item_id, ws in self.wishes_by_item.items()}
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""대피소 좌표 기반 공간 인덱스
+
+대피소 위도/경도로 BallTree(haversine metric)를 구성해 반경 질의와 k-최근접 질의를
+벡터화해서 제공합니다. scikit-learn이 없으면 동일한 인터페이스의 NumPy 전수 계산으로
+대체합니다(소규모 데이터용).
+
+- haversine_km: 브로드캐스팅 가능한 벡터화 허버사인 거리(km)
+- ShelterGeoIndex.query_radius: 점(들) 기준 반경 내 대피소 인덱스
+- ShelterGeoIndex.query_knn: 점(들) 기준 가장 가까운 k개 대피소 (거리 km, 인덱스)
+
+사용 예시:
+  geo = ShelterGeoIndex.from_records(shelters)
+  idx = geo.query_radius(37.56, 126.97, 5.0)[0]
+"""
+import numpy as np
+
+# scikit-learn은 모듈 로드 시점에 import합니다(import가 전역 random 상태를 건드리므로
+# 시드 설정 이후 지연 import하면 동일 시드의 생성 결과가 달라집니다).
+try:
+    from sklearn.neighbors import BallTree
+except ImportError:  # 선택 의존성
+    BallTree = None
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """두 지점(배열) 간 허버사인 거리(km). 입력은 도(degree) 단위이며 브로드캐스팅됩니다."""
+    lat1 = np.radians(lat1); lon1 = np.radians(lon1)
+    lat2 = np.radians(lat2); lon2 = np.radians(lon2)
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(a))
+
+
+class ShelterGeoIndex:
+    def __init__(self, latitudes, longitudes, ids=None, leaf_size: int = 40):
+        self.lat = np.asarray(latitudes, dtype='float64')
+        self.lon = np.asarray(longitudes, dtype='float64')
+        self.ids = np.asarray(ids, dtype=object) if ids is not None else None
+        self._tree = None
+        if BallTree is not None and len(self.lat):
+            self._tree = BallTree(np.radians(np.column_stack([self.lat, self.lon])),
+                                  leaf_size=leaf_size, metric='haversine')
+
+    @classmethod
+    def from_records(cls, shelters, **kwargs):
+        """shelters: dict 목록 또는 DataFrame(shelter_id/latitude/longitude 컬럼)"""
+        if hasattr(shelters, 'columns'):
+            return cls(shelters['latitude'].astype(float).to_numpy(), shelters['longitude'].astype(float).to_numpy(),
+                       shelters['shelter_id'].to_numpy(), **kwargs)
+        return cls([float(s['latitude']) for s in shelters], [float(s['longitude']) for s in shelters],
+                   [s['shelter_id'] for s in shelters], **kwargs)
+
+    def __len__(self):
+        return len(self.lat)
+
+    @staticmethod
+    def _points(lat, lon):
+        return np.atleast_1d(np.asarray(lat, dtype='float64')), np.atleast_1d(np.asarray(lon, dtype='float64'))
+
+    def query_radius(self, lat, lon, radius_km, sort_results: bool = False):
+        """점(들) 기준 반경 radius_km 이내 대피소 인덱스 배열 목록
+
+        반환 인덱스는 기본적으로 원본(대피소 목록) 순서로 정렬되며,
+        sort_results=True면 거리순으로 정렬됩니다.
+        """
+        qlat, qlon = self._points(lat, lon)
+        radius = np.broadcast_to(np.asarray(radius_km, dtype='float64'), qlat.shape)
+        if self._tree is not None:
+            pts = np.radians(np.column_stack([qlat, qlon]))
+            if sort_results:
+                ind, _ = self._tree.query_radius(pts, r=radius / EARTH_RADIUS_KM, return_distance=True, sort_results=True)
+                return list(ind)
+            ind = self._tree.query_radius(pts, r=radius / EARTH_RADIUS_KM)
+            return [np.sort(i) for i in ind]
+        out = []
+        for la, lo, r in zip(qlat, qlon, radius):
+            d = haversine_km(la, lo, self.lat, self.lon)
+            hit = np.flatnonzero(d <= r)
+            out.append(hit[np.argsort(d[hit], kind='stable')] if sort_results else hit)
+        return out
+
+    def query_knn(self, lat, lon, k: int = 1):
+        """점(들) 기준 가장 가까운 k개 대피소의 (거리 km, 인덱스) — 각각 (n, k) 배열"""
+        qlat, qlon = self._points(lat, lon)
+        k = min(k, len(self))
+        if self._tree is not None:
+            dist, ind = self._tree.query(np.radians(np.column_stack([qlat, qlon])), k=k)
+            return dist * EARTH_RADIUS_KM, ind
+        d = haversine_km(qlat[:, None], qlon[:, None], self.lat[None, :], self.lon[None, :])
+        ind = np.argsort(d, axis=1, kind='stable')[:, :k]
+        return np.take_along_axis(d, ind, axis=1), ind
+
+    def distances_to(self, lat, lon, idx):
+        """점(들)과 지정 대피소 인덱스 간 거리(km)"""
+        return haversine_km(lat, lon, self.lat[idx], self.lon[idx])
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""가중치 샘플러 — Walker/Vose alias 테이블 + 설정별 캐시
+
+행마다 가중치 dict를 만들고 누적합을 선형 탐색하면 추출 1회가 O(k)입니다.
+가중치 구성(계절/재난유형/편의시설 등)이 같으면 테이블을 한 번만 만들고 재사용합니다.
+
+- AliasTable: 생성 O(k), 추출 O(1)
+  - draw(): random.random() 1회로 추출(전역 random 흐름을 쓰는 python 엔진용. 행당 소비하는 난수 수가
+    가중치와 무관하게 1개로 고정되어 배치/스트리밍 분할과 무관하게 같은 결과)
+  - sample(rng, size): NumPy Generator로 size개 일괄 추출(columnar 엔진용)
+- SamplerCache: 키(가중치 구성) → AliasTable. build(*key)로 처음 한 번만 생성
+
+사용 예시:
+  status = AliasTable(STATUS_CHOICES, WISH_STATUS_WEIGHTS)
+  status.draw()                       # '대기중'
+  status.sample(rng, 1000)            # object 배열
+  by_season = SamplerCache(lambda season: AliasTable.from_weights(weights_for(season)))
+  by_season('겨울').draw()
+"""
+import random
+
+import numpy as np
+
+
+class AliasTable:
+    """Walker/Vose alias 테이블(labels[i]를 weights[i]에 비례해 추출)"""
+
+    __slots__ = ('labels', 'prob', 'alias', 'size', '_prob_list', '_alias_list', '_labels_array')
+
+    def __init__(self, labels, weights):
+        labels = list(labels)
+        w = np.asarray(weights, dtype='float64')
+        if len(labels) == 0 or len(labels) != len(w):
+            raise ValueError(f'labels/weights 길이가 잘못되었습니다: {len(labels)} / {len(w)}')
+        if not np.all(np.isfinite(w)) or (w < 0).any() or w.sum() <= 0:
+            raise ValueError('가중치는 0 이상의 유한한 값이어야 하며 합이 0보다 커야 합니다.')
+        n = len(w)
+        scaled = w * (n / w.sum())
+        prob = np.ones(n)
+        alias = np.arange(n)
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            s, g = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = g
+            scaled[g] -= 1.0 - scaled[s]
+            (small if scaled[g] < 1.0 else large).append(g)
+        # 남은 항목은 부동소수 오차로 1 근처 → 자기 자신(prob=1)
+        self.labels = labels
+        self.prob = prob
+        self.alias = alias
+        self.size = n
+        # draw()는 행 단위 호출이므로 NumPy 스칼라 인덱싱 대신 리스트 사용
+        self._prob_list = prob.tolist()
+        self._alias_list = alias.tolist()
+        self._labels_array = None
+
+    @classmethod
+    def from_weights(cls, weights: dict) -> 'AliasTable':
+        """{label: weight} → AliasTable(dict 순서 유지)"""
+        return cls(weights.keys(), list(weights.values()))
+
+    def draw_index(self, rnd=random) -> int:
+        # 균등난수 하나를 칸 번호(정수부)와 칸 안 위치(소수부)로 나눠 사용
+        u = rnd.random() * self.size
+        i = min(int(u), self.size - 1)
+        return i if u - i < self._prob_list[i] else self._alias_list[i]
+
+    def draw(self, rnd=random):
+        return self.labels[self.draw_index(rnd)]
+
+    def sample_indices(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        idx = rng.integers(0, self.size, size=size)
+        return np.where(rng.random(size) < self.prob[idx], idx, self.alias[idx])
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        """size개 일괄 추출(labels의 object 배열)"""
+        if self._labels_array is None:
+            self._labels_array = np.empty(self.size, dtype=object)
+            self._labels_array[:] = self.labels
+        return self._labels_array[self.sample_indices(rng, size)]
+
+
+class SamplerCache:
+    """가중치 구성 키 → AliasTable. build(*key)는 키마다 한 번만 호출"""
+
+    def __init__(self, build):
+        self._build = build
+        self._tables = {}
+
+    def __call__(self, *key) -> AliasTable:
+        table = self._tables.get(key)
+        if table is None:
+            table = self._tables[key] = self._build(*key)
+        return table
+
+    def __len__(self):
+        return len(self._tables)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""샤드 단위 병렬 생성
+
+대용량 테이블(users / user_donation_wishes / shelter_relief_requests / consumption_info)을
+고정 크기 샤드로 나눠 여러 프로세스에서 생성한 뒤 샤드 순서대로 합칩니다.
+
+- 샤드 i는 (마스터 시드, 테이블명, i)에서 파생한 시드로 random / Faker / NumPy RNG를
+  다시 초기화하므로, 같은 --seed / --shard_size면 워커 수와 무관하게 결과가 같습니다.
+- ID는 샤드 시작 번호(start)부터 이어 붙이므로 전역적으로 중복되지 않습니다.
+- 공유 입력(사용자·구호품·대피소 등)과 Faker 값 풀 설정은 워커 초기화 시 한 번만 전달합니다.
+- 샤드 경계가 곧 재현 단위이므로, 샤드 모드 결과는 단일 프로세스 기본 모드(--workers 미지정)
+  결과와는 다릅니다.
+
+사용 예시:
+  sharder = ShardedGenerator(seed=42, workers=4)
+  users = sharder.generate_users(1_000_000)
+"""
+import hashlib
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from faker import Faker
+
+import faker_pools
+import generate_fake_data as gen
+from generation_index import GenerationIndex
+
+DEFAULT_SHARD_SIZE = 50_000
+
+# 워커 프로세스별 공유 입력(초기화 함수에서 설정)
+_CONTEXT = {}
+
+
+def shard_ranges(count: int, shard_size: int = DEFAULT_SHARD_SIZE):
+    """[(shard_idx, start, size)] — start는 1부터 시작하는 ID 번호"""
+    shard_size = max(1, int(shard_size))
+    return [(i, 1 + off, min(shard_size, count - off)) for i, off in enumerate(range(0, count, shard_size))]
+
+
+def shard_seed(master_seed: int, stage: str, shard_idx: int) -> int:
+    """마스터 시드와 테이블명/샤드 번호로 결정적인 32비트 시드 파생(PYTHONHASHSEED 무관)"""
+    digest = hashlib.sha256(f'{master_seed}:{stage}:{shard_idx}'.encode('utf-8')).digest()
+    return int.from_bytes(digest[:4], 'little')
+
+
+def _init_worker(engine_name, context, pools_config=None):
+    if pools_config is not None:
+        faker_pools.configure(config=pools_config)
+    _CONTEXT.clear()
+    _CONTEXT.update(context)
+    _CONTEXT['engine_name'] = engine_name
+    _CONTEXT['fake'] = Faker('ko_KR')
+    if context.get('shelters') is not None and context.get('incidents') is not None:
+        _CONTEXT['index'] = GenerationIndex(shelters=context['shelters'], incidents=context['incidents'])
+
+
+def _run_shard(stage, seed, start, count):
+    """샤드 하나 생성 → dict 레코드 목록"""
+    ctx = _CONTEXT
+    fake = ctx['fake']
+    random.seed(seed)
+    fake.seed_instance(seed)
+
+    if ctx['engine_name'] == 'numpy':
+        import numpy as np
+        import columnar_engine as engine
+        rng = np.random.default_rng(seed)
+        if stage == 'users':
+            df = engine.generate_users(rng, fake, count, start=start, total=ctx['total'])
+        elif stage == 'wishes':
+            df = engine.generate_user_donation_wishes(rng, count, ctx['users'], ctx['relief_items'], start=start)
+        elif stage == 'requests':
+            df = engine.generate_shelter_relief_requests(rng, count, ctx['shelters'], ctx['relief_items'],
+                                                         start=start, item_popularity=ctx['item_popularity'])
+        else:
+            df = engine.generate_consumption_info(rng, count, ctx['shelters'], ctx['incidents'], ctx['relief_items'],
+                                                  ctx['matches'], start=start, index=ctx['index'])
+        return df.to_dict('records')
+
+    if stage == 'users':
+        return gen.generate_users(fake, count, start=start, total=ctx['total'])
+    if stage == 'wishes':
+        # preferred_categories는 전체 샤드 생성 후 호출 측에서 한 번에 갱신
+        return gen.generate_user_donation_wishes(fake, count, ctx['users'], ctx['relief_items'],
+                                                 start=start, update_users=False)
+    if stage == 'requests':
+        return gen.generate_shelter_relief_requests(fake, count, ctx['shelters'], ctx['relief_items'],
+                                                    start=start, item_popularity=ctx['item_popularity'])
+    return gen.generate_consumption_info(fake, count, ctx['shelters'], ctx['incidents'], ctx['relief_items'],
+                                         ctx['matches'], index=ctx['index'], start=start)
+
+
+class ShardedGenerator:
+    """테이블별 샤드 생성기
+
+    workers=1이면 같은 샤드를 현재 프로세스에서 순서대로 생성합니다(결과 동일).
+    """
+
+    def __init__(self, seed=None, workers: int = 1, shard_size: int = DEFAULT_SHARD_SIZE, engine: str = 'python'):
+        # 시드 미지정 시 마스터 시드를 무작위로 정해 샤드 간 시드만 결정적으로 파생
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.workers = max(1, int(workers))
+        self.shard_size = shard_size
+        self.engine = engine
+
+    def iter_batches(self, stage, count, context):
+        """샤드 결과(dict 레코드 목록)를 샤드 순서대로 하나씩 반환(스트리밍 저장용)
+
+        stage: users / wishes / requests / consumptions, context: 해당 단계의 공유 입력
+        """
+        shards = shard_ranges(count, self.shard_size)
+        seeds = [shard_seed(self.seed, stage, i) for i, _, _ in shards]
+        starts = [start for _, start, _ in shards]
+        sizes = [size for _, _, size in shards]
+        if self.workers == 1 or len(shards) <= 1:
+            # 전역 random 상태를 보존해 이후 단계(매칭/재난 등)가 샤드 생성에 영향받지 않도록 함
+            state = random.getstate()
+            saved = dict(_CONTEXT)
+            try:
+                _init_worker(self.engine, context)
+                for s, st, n in zip(seeds, starts, sizes):
+                    yield _run_shard(stage, s, st, n)
+            finally:
+                _CONTEXT.clear()
+                _CONTEXT.update(saved)
+                random.setstate(state)
+        else:
+            # 워커는 부모와 같은 Faker 값 풀 설정(디스크 캐시)을 사용
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(shards)), initializer=_init_worker,
+                                     initargs=(self.engine, context, faker_pools.active().config())) as pool:
+                yield from pool.map(_run_shard, [stage] * len(shards), seeds, starts, sizes)
+
+    def _run(self, stage, count, context):
+        return [row for part in self.iter_batches(stage, count, context) for row in part]
+
+    def generate_users(self, count):
+        return self._run('users', count, {'total': count})
+
+    def generate_user_donation_wishes(self, count, users, relief_items):
+        """기부 의사 생성 후 전체 결과 기준으로 users의 preferred_categories 갱신"""
+        general_users = [u for u in users if u['user_type'] == 'general_user']
+        if not general_users:
+            print("⚠️ general_user가 없어 기부 의사 데이터를 생성할 수 없습니다.")
+            return []
+        wishes = self._run('wishes', count, {'users': general_users, 'relief_items': relief_items})
+        gen.update_preferred_categories(users, wishes, relief_items)
+        return wishes
+
+    def generate_shelter_relief_requests(self, count, shelters, relief_items, index):
+        # 아이템 인기도는 부모에서 한 번만 계산해 전달(wishes 전체를 워커로 보내지 않음)
+        return self._run('requests', count, {'shelters': shelters, 'relief_items': relief_items,
+                                             'item_popularity': index.item_popularity()})
+
+    def generate_consumption_info(self, count, shelters, incidents, relief_items, matches):
+        return self._run('consumptions', count, {'shelters': shelters, 'incidents': incidents,
+                                                 'relief_items': relief_items, 'matches': matches})
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""행 배치 단위 스트리밍 출력(sink)
+
+save_json / save_csv는 테이블 전체 dict 목록(및 DataFrame 사본)을 메모리에 올린 뒤 한 번에
+저장합니다. 여기의 sink는 행 배치를 받는 즉시 파일에 이어 쓰므로 메모리 사용량이 배치 크기로
+제한됩니다.
+
+- JSONArraySink: json.dump(rows, indent=2, ensure_ascii=False)와 바이트 단위로 같은 JSON 배열
+- NDJSONSink: 한 줄에 한 행(JSON Lines)
+- CSVSink: UTF-8-sig CSV(pandas.to_csv(index=False)와 같은 형식)
+- ParquetSink: 배치마다 row group 하나, ID 컬럼(*_id)과 DICTIONARY_COLUMNS(status/category 등)는
+  dictionary 인코딩(pyarrow 필요)
+- Spool: 나중에 다시 읽어 보정할 행을 임시 NDJSON 파일에 보관
+- read_table: 저장된 테이블(json/ndjson/csv/parquet) → dict 목록(매칭/배분 CLI 입력용, pandas 필요)
+
+사용 예시:
+  with open_sink('output/user_donation_wishes.ndjson') as sink:
+      for batch in batches:
+          sink.write(batch)
+"""
+import csv
+import json
+import os
+import tempfile
+
+# 출력 형식 → 파일 확장자
+FORMAT_EXTENSIONS = {
+    'json': '.json',
+    'ndjson': '.ndjson',
+    'csv': '.csv',
+    'parquet': '.parquet',
+}
+# ID 외에 dictionary 인코딩할 값 종류가 적은 텍스트 컬럼(models/code/table_io.CATEGORY_COLUMNS와 같음)
+DICTIONARY_COLUMNS = {
+    'status', 'category', 'subcategory', 'unit', 'user_type', 'urgency_level', 'disaster_type',
+    'seasonality', 'disaster_severity', 'weather_conditions', 'adequacy_level', 'delivery_company',
+}
+
+
+class RowSink:
+    """행 배치 출력 기본 클래스(with 문 지원)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows_written = 0
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+
+    def write(self, rows):
+        rows = list(rows)
+        if rows:
+            self._write(rows)
+            self.rows_written += len(rows)
+        return self
+
+    def _write(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class JSONArraySink(RowSink):
+    def __init__(self, path):
+        super().__init__(path)
+        self._f = open(path, 'w', encoding='utf-8')
+
+    def _write(self, rows):
+        sep = '[\n  ' if self.rows_written == 0 else ',\n  '
+        for row in rows:
+            self._f.write(sep + json.dumps(row, ensure_ascii=False, indent=2).replace('\n', '\n  '))
+            sep = ',\n  '
+
+    def close(self):
+        if self._f.closed:
+            return
+        self._f.write('\n]' if self.rows_written else '[]')
+        self._f.close()
+
+
+class NDJSONSink(RowSink):
+    def __init__(self, path):
+        super().__init__(path)
+        self._f = open(path, 'w', encoding='utf-8')
+
+    def _write(self, rows):
+        self._f.writelines(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+
+    def close(self):
+        self._f.close()
+
+
+class CSVSink(RowSink):
+    def __init__(self, path, encoding='utf-8-sig'):
+        super().__init__(path)
+        self._f = open(path, 'w', encoding=encoding, newline='')
+        self._writer = None
+
+    def _write(self, rows):
+        if self._writer is None:
+            # 헤더는 첫 배치의 컬럼 순서를 따름
+            self._writer = csv.DictWriter(self._f, fieldnames=list(rows[0].keys()), lineterminator=os.linesep)
+            self._writer.writeheader()
+        self._writer.writerows(rows)
+
+    def close(self):
+        if self._f.closed:
+            return
+        if self._writer is None:
+            self._f.write(os.linesep)
+        self._f.close()
+
+
+class ParquetSink(RowSink):
+    def __init__(self, path, compression='zstd'):
+        import pyarrow  # noqa: F401  (선택 의존성: 미설치 시 여기서 ImportError)
+        super().__init__(path)
+        self.compression = compression
+        self._writer = None
+        self._schema = None
+
+    def _write(self, rows):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if self._writer is None:
+            table = pa.Table.from_pylist(rows)
+            # ID 컬럼(*_id)과 DICTIONARY_COLUMNS는 dictionary 인코딩(pandas로 읽으면 category)
+            self._schema = pa.schema([
+                pa.field(f.name, pa.dictionary(pa.int32(), pa.string()))
+                if (f.name.endswith('_id') or f.name in DICTIONARY_COLUMNS) and pa.types.is_string(f.type) else f
+                for f in table.schema])
+            table = table.cast(self._schema)
+            self._writer = pq.ParquetWriter(self.path, self._schema, compression=self.compression)
+        else:
+            table = pa.Table.from_pylist(rows, schema=self._schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        elif not os.path.exists(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            pq.write_table(pa.table({}), self.path)
+
+
+SINKS = {
+    'json': JSONArraySink,
+    'ndjson': NDJSONSink,
+    'csv': CSVSink,
+    'parquet': ParquetSink,
+}
+
+
+def open_sink(path, fmt=None):
+    """경로(또는 fmt)에 맞는 sink 생성. fmt 미지정 시 확장자로 판단"""
+    if fmt is None:
+        ext = os.path.splitext(path)[1].lower()
+        fmt = next((k for k, v in FORMAT_EXTENSIONS.items() if v == ext), None)
+    if fmt not in SINKS:
+        raise ValueError(f"지원하지 않는 출력 형식: {fmt} (지원: {', '.join(SINKS)})")
+    return SINKS[fmt](path)
+
+
+def write_table(rows, path, fmt=None, batch_size=50_000):
+    """행 목록(또는 배치 iterable)을 sink로 저장. rows가 list면 batch_size씩 나눠 씀"""
+    with open_sink(path, fmt) as sink:
+        if isinstance(rows, list):
+            for i in range(0, len(rows), batch_size):
+                sink.write(rows[i:i + batch_size])
+        else:
+            for batch in rows:
+                sink.write(batch)
+    return path
+
+
+def read_table(path, fmt=None):
+    """sink로 저장한 테이블 → dict 목록(문자열 컬럼은 날짜로 바꾸지 않고 그대로 유지)"""
+    import pandas as pd
+    if fmt is None:
+        ext = os.path.splitext(path)[1].lower()
+        fmt = next((k for k, v in FORMAT_EXTENSIONS.items() if v == ext), None)
+    if fmt == 'json':
+        df = pd.read_json(path, convert_dates=False, dtype=False)
+    elif fmt == 'ndjson':
+        df = pd.read_json(path, lines=True, convert_dates=False, dtype=False)
+    elif fmt == 'csv':
+        df = pd.read_csv(path, encoding='utf-8-sig', dtype={'needed_by': str, 'created_at': str})
+    elif fmt == 'parquet':
+        df = pd.read_parquet(path)
+    else:
+        raise ValueError(f"지원하지 않는 입력 형식: {path} (지원: {', '.join(SINKS)})")
+    return df.to_dict('records')
+
+
+class Spool:
+    """임시 NDJSON 파일에 행을 보관했다가 배치 단위로 다시 읽기"""
+
+    def __init__(self, dir=None):
+        fd, self.path = tempfile.mkstemp(suffix='.ndjson', prefix='.spool_', dir=dir)
+        self._f = os.fdopen(fd, 'w', encoding='utf-8')
+        self.rows_written = 0
+
+    def write(self, rows):
+        for row in rows:
+            self._f.write(json.dumps(row, ensure_ascii=False) + '\n')
+            self.rows_written += 1
+
+    def iter_batches(self, batch_size=50_000):
+        self._f.close()
+        with open(self.path, encoding='utf-8') as f:
+            batch = []
+            for line in f:
+                batch.append(json.loads(line))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+    def close(self):
+        if not self._f.closed:
+            self._f.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""스트리밍 생성 파이프라인 (--stream)
+
+기본 흐름은 모든 테이블을 dict 목록으로 메모리에 모은 뒤 마지막에 저장합니다. 스트리밍 모드는
+대용량 테이블(users / user_donation_wishes / shelter_relief_requests / consumption_info)을
+--batch_size 행 단위로 생성해 곧바로 sink(JSON 배열/NDJSON/CSV/Parquet)에 씁니다.
+
+- 다음 단계에 필요한 정보만 메모리에 유지합니다.
+  · users: (user_id, user_type) 요약 + 기부 의사로 수집한 선호 카테고리
+  · wishes/requests: 아이템별 기부 인기도(개수)와 매칭 후보(필요 필드만, 아이템당 상한)
+- 매칭 이후에 값이 바뀌는 테이블(users의 preferred_categories, wishes/requests의
+  remaining_quantity)은 임시 spool 파일에 먼저 쓰고, 매칭이 끝난 뒤 보정하며 최종 sink로 옮깁니다.
+- python 엔진(샤드 미사용)은 배치 생성이 같은 전역 random 흐름을 이어 쓰므로, 매칭 후보가
+  상한(MATCH_POOL_PER_ITEM)을 넘지 않는 한 기본 흐름과 같은 시드에서 같은 결과를 냅니다.
+
+사용 예시:
+  python tools/generate_fake_data.py --stream --format ndjson --wishes 10000000 --seed 42
+"""
+import os
+import random
+from collections import Counter
+from contextlib import ExitStack
+
+import generate_fake_data as gen
+from generation_index import GenerationIndex
+from matching import is_matchable
+from sharding import DEFAULT_SHARD_SIZE, shard_ranges
+from sinks import FORMAT_EXTENSIONS, Spool, open_sink, write_table
+
+# 매칭 후보로 메모리에 유지할 아이템별 최대 행 수(초과분은 저수지 표본추출)
+MATCH_POOL_PER_ITEM = 2_000
+
+
+class CandidatePool:
+    """아이템별 매칭 후보 — 매칭에 필요한 필드만 보관
+
+    아이템당 cap개까지는 생성 순서대로 모두 보관하고, 초과분은 별도 RNG로 저수지 표본추출합니다
+    (전역 random 흐름에는 영향을 주지 않음).
+    """
+
+    def __init__(self, id_field, fields, cap=MATCH_POOL_PER_ITEM, seed=0):
+        self.id_field = id_field
+        self.fields = fields
+        self.cap = cap
+        self.by_item = {}
+        self._seen = Counter()
+        self._rng = random.Random(seed)
+
+    def add(self, rows):
+        for r in rows:
+            if not is_matchable(r):
+                continue
+            item_id = r['relief_item_id']
+            light = {k: r[k] for k in self.fields}
+            bucket = self.by_item.setdefault(item_id, [])
+            self._seen[item_id] += 1
+            if len(bucket) < self.cap:
+                bucket.append(light)
+            else:
+                j = self._rng.randrange(self._seen[item_id])
+                if j < self.cap:
+                    bucket[j] = light
+
+    def remaining_by_id(self, ids):
+        """ids에 해당하는 후보의 (매칭 후) 잔여 수량"""
+        return {r[self.id_field]: r['remaining_quantity']
+                for rows in self.by_item.values() for r in rows if r[self.id_field] in ids}
+
+
+def _batches(count, batch_size, make, sharder=None, stage=None, context=None):
+    """배치 단위 레코드 목록 생성기(sharder가 있으면 샤드 결과를 순서대로)"""
+    if sharder is not None:
+        yield from sharder.iter_batches(stage, count, context)
+        return
+    for _, start, size in shard_ranges(count, batch_size):
+        yield make(start, size)
+
+
+def _records(df):
+    return df.to_dict('records')
+
+
+def generate_streaming(args, fake, fmt, engine=None, rng=None, sharder=None):
+    """스트리밍 모드 전체 생성/저장. 반환: 테이블명 → 행 수"""
+    # 중간 단계에서 예외가 나도 spool 임시 파일(.spool_*.ndjson)을 지움
+    with ExitStack() as spools:
+        return _generate_streaming(args, fake, fmt, engine, rng, sharder, spools)
+
+
+def _generate_streaming(args, fake, fmt, engine, rng, sharder, spools):
+    out = args.out
+    os.makedirs(out, exist_ok=True)
+    ext = FORMAT_EXTENSIONS[fmt]
+    batch_size = args.batch_size or DEFAULT_SHARD_SIZE
+
+    def path(name):
+        return os.path.join(out, name + ext)
+
+    counts = {}
+
+    # 1단계: 사용자 — 전체 행은 spool에, 이후 단계용 요약만 메모리에 유지
+    print(f"👥 사용자 데이터 생성 중... ({args.users}명)")
+    user_spool = spools.enter_context(Spool(dir=out))
+    stubs = []
+    if engine:
+        make_users = lambda start, size: _records(engine.generate_users(rng, fake, size, start=start, total=args.users))
+    else:
+        make_users = lambda start, size: gen.generate_users(fake, size, start=start, total=args.users)
+    for batch in _batches(args.users, batch_size, make_users, sharder, 'users', {'total': args.users}):
+        user_spool.write(batch)
+        stubs.extend({'user_id': u['user_id'], 'user_type': u['user_type'], 'preferred_categories': ''}
+                     for u in batch)
+    general_stubs = [u for u in stubs if u['user_type'] == 'general_user']
+    print(f"   └─ 일반 사용자: {len(general_stubs)}명, 관리자: {len(stubs) - len(general_stubs)}명")
+
+    # 2단계: 구호품(소규모, 메모리)
+    print(f"📦 구호품 데이터 생성 중... ({args.relief_items}개)")
+    relief_items = gen.generate_relief_items(fake, args.relief_items)
+
+    # 3단계: 대피소(이후 모든 단계에서 조회하므로 메모리)
+    print(f"🏠 대피소 데이터 처리 중...")
+    if engine:
+        shelters = _records(engine.generate_shelters(rng, fake, args.shelters, stubs, args.real_shelter_csv))
+    else:
+        shelters = gen.generate_shelters(fake, args.shelters, stubs, args.real_shelter_csv)
+    index = GenerationIndex(shelters=shelters)
+    adjusted_requests, adjusted_matches, adjusted_incidents, adjusted_consumptions = gen.adjust_counts(args, len(shelters))
+
+    # 4단계: 기부 의사 — 선호 카테고리/인기도/매칭 후보만 누적
+    print(f"💝 기부 의사 데이터 생성 중... ({args.wishes}개)")
+    wish_spool = spools.enter_context(Spool(dir=out))
+    user_categories = {}
+    popularity = Counter()
+    wish_pool = CandidatePool('wish_id', ['wish_id', 'user_id', 'relief_item_id', 'remaining_quantity', 'status',
+                                          'created_at'],
+                              seed=args.seed or 0)
+    if not general_stubs:
+        print("⚠️ general_user가 없어 기부 의사 데이터를 생성할 수 없습니다.")
+    else:
+        if engine:
+            import pandas as pd
+            general_df = pd.DataFrame(general_stubs)
+            make_wishes = lambda start, size: _records(engine.generate_user_donation_wishes(
+                rng, size, general_df, relief_items, start=start, update_users=False))
+        else:
+            make_wishes = lambda start, size: gen.generate_user_donation_wishes(
+                fake, size, general_stubs, relief_items, start=start, update_users=False)
+        for batch in _batches(args.wishes, batch_size, make_wishes, sharder, 'wishes',
+                              {'users': general_stubs, 'relief_items': relief_items}):
+            wish_spool.write(batch)
+            gen.collect_user_categories(batch, relief_items, user_categories)
+            popularity.update(w['relief_item_id'] for w in batch if w.get('relief_item_id'))
+            wish_pool.add(batch)
+
+    # 5단계: 대피소 요청
+    print(f"📋 대피소 요청 데이터 생성 중... ({adjusted_requests}개)")
+    request_spool = spools.enter_context(Spool(dir=out))
+    request_pool = CandidatePool('request_id', ['request_id', 'shelter_id', 'relief_item_id', 'remaining_quantity', 'status',
+                                                'urgency_level', 'needed_by'],
+                                 seed=args.seed or 0)
+    item_popularity = dict(popularity)
+    if engine:
+        make_requests = lambda start, size: _records(engine.generate_shelter_relief_requests(
+            rng, size, shelters, relief_items, start=start, item_popularity=item_popularity))
+    else:
+        make_requests = lambda start, size: gen.generate_shelter_relief_requests(
+            fake, size, shelters, relief_items, start=start, item_popularity=item_popularity)
+    for batch in _batches(adjusted_requests, batch_size, make_requests, sharder, 'requests',
+                          {'shelters': shelters, 'relief_items': relief_items, 'item_popularity': item_popularity}):
+        request_spool.write(batch)
+        request_pool.add(batch)
+
+    # 6단계: 매칭(후보 풀 기준, 잔여 수량은 후보 dict에 차감)
+    print(f"🤝 매칭 데이터 생성 중... ({adjusted_matches}개)")
+    index.wishes_by_item = wish_pool.by_item
+    index.requests_by_item = request_pool.by_item
+    matches = gen.generate_donation_matches(fake, adjusted_matches, [], [], stubs, shelters, relief_items, index=index)
+    wish_remaining = wish_pool.remaining_by_id({m['donation_wish_id'] for m in matches})
+    request_remaining = request_pool.remaining_by_id({m['relief_request_id'] for m in matches})
+    del wish_pool, request_pool
+
+    # 7단계: 재난 사건
+    print(f"⚠️ 재난 사건 데이터 생성 중... ({adjusted_incidents}개)")
+    incidents = gen.generate_disaster_incidents(fake, adjusted_incidents, shelters)
+    index.add_incidents(incidents)
+
+    # 8단계: 소비 정보 — 바로 sink로
+    print(f"📈 소비 정보 데이터 생성 중... ({adjusted_consumptions}개)")
+    if engine:
+        make_consumptions = lambda start, size: _records(engine.generate_consumption_info(
+            rng, size, shelters, incidents, relief_items, matches, start=start, index=index))
+    else:
+        make_consumptions = lambda start, size: gen.generate_consumption_info(
+            fake, size, shelters, incidents, relief_items, matches, index=index, start=start)
+    with open_sink(path('consumption_info'), fmt) as sink:
+        for batch in _batches(adjusted_consumptions, batch_size, make_consumptions, sharder, 'consumptions',
+                              {'shelters': shelters, 'incidents': incidents, 'relief_items': relief_items,
+                               'matches': matches}):
+            sink.write(batch)
+        counts['consumption_info'] = sink.rows_written
+
+    # spool → 보정 → 최종 sink
+    print(f"\n💾 데이터 저장 중... ({out}/)")
+
+    def finalize(spool, name, patch):
+        with spool, open_sink(path(name), fmt) as sink:
+            for batch in spool.iter_batches(batch_size):
+                patch(batch)
+                sink.write(batch)
+            counts[name] = sink.rows_written
+
+    def patch_remaining(remaining, key):
+        def patch(batch):
+            for r in batch:
+                if r[key] in remaining:
+                    r['remaining_quantity'] = remaining[r[key]]
+        return patch
+
+    finalize(user_spool, 'users', lambda batch: gen.apply_preferred_categories(batch, user_categories))
+    finalize(wish_spool, 'user_donation_wishes', patch_remaining(wish_remaining, 'wish_id'))
+    finalize(request_spool, 'shelter_relief_requests', patch_remaining(request_remaining, 'request_id'))
+    for name, rows in [('shelters', shelters), ('relief_items', relief_items),
+                       ('donation_matches', matches), ('disaster_incidents', incidents)]:
+        write_table(rows, path(name), fmt, batch_size)
+        counts[name] = len(rows)
+    return counts